@@ -0,0 +1,24 @@
+"""add processing_info to analysis
+
+Revision ID: c3d4e5f6a7b8
+Revises: 89b0e3ae8696
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'c3d4e5f6a7b8'
+down_revision = '89b0e3ae8696'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('analyses', sa.Column('processing_info', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('analyses', 'processing_info')
@@ -0,0 +1,30 @@
+"""add quality_tier to analysis
+
+Revision ID: d4e5f6a7b8c9
+Revises: c3d4e5f6a7b8
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'd4e5f6a7b8c9'
+down_revision = 'c3d4e5f6a7b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    analysis_tier = postgresql.ENUM('PREVIEW', 'FULL', name='analysistier')
+    analysis_tier.create(op.get_bind())
+
+    op.add_column('analyses', sa.Column('quality_tier', sa.Enum('PREVIEW', 'FULL', name='analysistier'), nullable=True))
+    # Existing analyses were produced by the full-quality model
+    op.execute("UPDATE analyses SET quality_tier = 'FULL' WHERE data IS NOT NULL")
+
+
+def downgrade() -> None:
+    op.drop_column('analyses', 'quality_tier')
+    postgresql.ENUM(name='analysistier').drop(op.get_bind())
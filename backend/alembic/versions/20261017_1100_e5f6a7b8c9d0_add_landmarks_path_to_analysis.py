@@ -0,0 +1,24 @@
+"""add landmarks_path to analysis
+
+Revision ID: e5f6a7b8c9d0
+Revises: d4e5f6a7b8c9
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'e5f6a7b8c9d0'
+down_revision = 'd4e5f6a7b8c9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing rows keep their JSONB `data`; new analyses store a binary blob in MinIO
+    op.add_column('analyses', sa.Column('landmarks_path', sa.String(length=512), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('analyses', 'landmarks_path')
@@ -0,0 +1,30 @@
+"""add content hash to videos and cache key to analysis
+
+Revision ID: f6a7b8c9d0e1
+Revises: e5f6a7b8c9d0
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'f6a7b8c9d0e1'
+down_revision = 'e5f6a7b8c9d0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing videos get their hash computed lazily by the next analysis
+    op.add_column('videos', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_videos_content_hash'), 'videos', ['content_hash'], unique=False)
+    op.add_column('analyses', sa.Column('cache_key', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_analyses_cache_key'), 'analyses', ['cache_key'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_analyses_cache_key'), table_name='analyses')
+    op.drop_column('analyses', 'cache_key')
+    op.drop_index(op.f('ix_videos_content_hash'), table_name='videos')
+    op.drop_column('videos', 'content_hash')
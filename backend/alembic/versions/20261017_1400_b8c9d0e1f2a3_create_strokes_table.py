@@ -0,0 +1,48 @@
+"""create strokes table
+
+Revision ID: b8c9d0e1f2a3
+Revises: a7b8c9d0e1f2
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'b8c9d0e1f2a3'
+down_revision = 'a7b8c9d0e1f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('strokes',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('analysis_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('video_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('stroke_index', sa.Integer(), nullable=False),
+        sa.Column('start_frame', sa.Integer(), nullable=False),
+        sa.Column('end_frame', sa.Integer(), nullable=False),
+        sa.Column('start_time', sa.Float(), nullable=False),
+        sa.Column('end_time', sa.Float(), nullable=False),
+        sa.Column('contact_frame', sa.Integer(), nullable=False),
+        sa.Column('contact_time', sa.Float(), nullable=False),
+        sa.Column('stroke_type', sa.String(length=20), nullable=False),
+        sa.Column('side', sa.String(length=10), nullable=False),
+        sa.Column('peak_wrist_speed', sa.Float(), nullable=True),
+        sa.Column('phases', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('clip_path', sa.String(length=512), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['analysis_id'], ['analyses.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['video_id'], ['videos.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_strokes_analysis_id'), 'strokes', ['analysis_id'], unique=False)
+    op.create_index(op.f('ix_strokes_video_id'), 'strokes', ['video_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_strokes_video_id'), table_name='strokes')
+    op.drop_index(op.f('ix_strokes_analysis_id'), table_name='strokes')
+    op.drop_table('strokes')
@@ -0,0 +1,48 @@
+"""create analysis_metrics table
+
+Revision ID: c9d0e1f2a3b4
+Revises: b8c9d0e1f2a3
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'c9d0e1f2a3b4'
+down_revision = 'b8c9d0e1f2a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('analysis_metrics',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('analysis_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('video_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('metric', sa.String(length=64), nullable=False),
+        sa.Column('phase', sa.String(length=20), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('mean', sa.Float(), nullable=False),
+        sa.Column('min', sa.Float(), nullable=False),
+        sa.Column('max', sa.Float(), nullable=False),
+        sa.Column('p10', sa.Float(), nullable=False),
+        sa.Column('p50', sa.Float(), nullable=False),
+        sa.Column('p90', sa.Float(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['analysis_id'], ['analyses.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['video_id'], ['videos.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('video_id', 'metric', 'phase', name='uq_analysis_metrics_video_metric_phase')
+    )
+    op.create_index(op.f('ix_analysis_metrics_analysis_id'), 'analysis_metrics', ['analysis_id'], unique=False)
+    op.create_index(op.f('ix_analysis_metrics_video_id'), 'analysis_metrics', ['video_id'], unique=False)
+    op.create_index(op.f('ix_analysis_metrics_metric'), 'analysis_metrics', ['metric'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_analysis_metrics_metric'), table_name='analysis_metrics')
+    op.drop_index(op.f('ix_analysis_metrics_video_id'), table_name='analysis_metrics')
+    op.drop_index(op.f('ix_analysis_metrics_analysis_id'), table_name='analysis_metrics')
+    op.drop_table('analysis_metrics')
@@ -0,0 +1,63 @@
+"""create user_metric_progress table
+
+Revision ID: d0e1f2a3b4c5
+Revises: c9d0e1f2a3b4
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'd0e1f2a3b4c5'
+down_revision = 'c9d0e1f2a3b4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('analysis_metrics', sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=True))
+    op.add_column('analysis_metrics', sa.Column('recorded_at', sa.DateTime(), nullable=True))
+    op.execute(
+        "UPDATE analysis_metrics m SET user_id = v.uploaded_by, recorded_at = v.created_at "
+        "FROM videos v WHERE v.id = m.video_id"
+    )
+    op.create_index('ix_analysis_metrics_user_series', 'analysis_metrics',
+                    ['user_id', 'phase', 'metric', 'recorded_at'], unique=False)
+
+    op.create_table('user_metric_progress',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('metric', sa.String(length=64), nullable=False),
+        sa.Column('session_count', sa.Integer(), nullable=False),
+        sa.Column('mean', sa.Float(), nullable=False),
+        sa.Column('min', sa.Float(), nullable=False),
+        sa.Column('max', sa.Float(), nullable=False),
+        sa.Column('first_at', sa.DateTime(), nullable=False),
+        sa.Column('last_at', sa.DateTime(), nullable=False),
+        sa.Column('last_value', sa.Float(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'metric', name='uq_user_metric_progress_user_metric')
+    )
+    op.create_index(op.f('ix_user_metric_progress_user_id'), 'user_metric_progress', ['user_id'], unique=False)
+
+    # Aggregates for analyses completed before this revision
+    op.execute(
+        "INSERT INTO user_metric_progress (id, user_id, metric, session_count, mean, min, max, "
+        "first_at, last_at, last_value, updated_at) "
+        "SELECT gen_random_uuid(), m.user_id, m.metric, count(*), avg(m.mean), min(m.mean), max(m.mean), "
+        "min(m.recorded_at), max(m.recorded_at), (array_agg(m.mean ORDER BY m.recorded_at DESC))[1], now() "
+        "FROM analysis_metrics m JOIN videos v ON v.id = m.video_id "
+        "WHERE m.user_id IS NOT NULL AND m.phase = 'all' AND v.deleted_at IS NULL AND NOT v.is_reference "
+        "GROUP BY m.user_id, m.metric"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_user_metric_progress_user_id'), table_name='user_metric_progress')
+    op.drop_table('user_metric_progress')
+    op.drop_index('ix_analysis_metrics_user_series', table_name='analysis_metrics')
+    op.drop_column('analysis_metrics', 'recorded_at')
+    op.drop_column('analysis_metrics', 'user_id')
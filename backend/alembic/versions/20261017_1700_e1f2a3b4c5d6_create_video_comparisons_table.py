@@ -0,0 +1,40 @@
+"""create video_comparisons table
+
+Revision ID: e1f2a3b4c5d6
+Revises: d0e1f2a3b4c5
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'e1f2a3b4c5d6'
+down_revision = 'd0e1f2a3b4c5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('video_comparisons',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('video_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('reference_video_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('cache_key', sa.String(length=64), nullable=False),
+        sa.Column('result', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['video_id'], ['videos.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['reference_video_id'], ['videos.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('video_id', 'reference_video_id', name='uq_video_comparisons_pair')
+    )
+    op.create_index(op.f('ix_video_comparisons_video_id'), 'video_comparisons', ['video_id'], unique=False)
+    op.create_index(op.f('ix_video_comparisons_reference_video_id'), 'video_comparisons', ['reference_video_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_video_comparisons_reference_video_id'), table_name='video_comparisons')
+    op.drop_index(op.f('ix_video_comparisons_video_id'), table_name='video_comparisons')
+    op.drop_table('video_comparisons')
@@ -0,0 +1,26 @@
+"""add embedding to strokes
+
+Revision ID: f2a3b4c5d6e7
+Revises: e1f2a3b4c5d6
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'f2a3b4c5d6e7'
+down_revision = 'e1f2a3b4c5d6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('strokes', sa.Column('embedding', postgresql.ARRAY(postgresql.REAL()), nullable=True))
+    op.add_column('strokes', sa.Column('embedding_version', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('strokes', 'embedding_version')
+    op.drop_column('strokes', 'embedding')
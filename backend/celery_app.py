@@ -3,8 +3,16 @@ Celery Application Configuration
 For asynchronous video processing tasks
 """
 from celery import Celery
+from kombu import Queue
 from config import settings
 
+# Queues, listed in the order a worker consuming several of them polls them
+QUEUE_INTERACTIVE = 'interactive'  # Player uploads and re-analysis requests
+QUEUE_FEEDBACK = 'feedback'  # LLM feedback generation (network bound)
+QUEUE_BULK = 'bulk'  # Batch re-analysis and reference imports
+QUEUE_HOUSEKEEPING = 'housekeeping'  # Maintenance jobs
+QUEUES = (QUEUE_INTERACTIVE, QUEUE_FEEDBACK, QUEUE_BULK, QUEUE_HOUSEKEEPING)
+
 # Create Celery app
 celery_app = Celery(
     'carlitos',
@@ -14,15 +22,58 @@ celery_app = Celery(
 
 # Configure Celery
 celery_app.conf.update(
-    task_serializer='json',
-    accept_content=['json'],
-    result_serializer='json',
+    task_serializer='msgpack',
+    # JSON stays accepted for messages queued before the switch
+    accept_content=['msgpack', 'json'],
+    result_serializer='msgpack',
+    # Results only hold small manifests (see services.task_manifest); they
+    # are compressed and expire so Redis memory stays bounded
+    result_compression='gzip',
+    result_expires=settings.CELERY_RESULT_EXPIRES_SECONDS,
     timezone='UTC',
     enable_utc=True,
+
+    task_queues=[Queue(name) for name in QUEUES],
+    # Unrouted tasks wait behind player-facing work
+    task_default_queue=QUEUE_BULK,
+    task_routes={
+        'tasks.video_analysis.analyze_video_task': {'queue': QUEUE_INTERACTIVE},
+        'tasks.feedback.*': {'queue': QUEUE_FEEDBACK},
+        'tasks.housekeeping.*': {'queue': QUEUE_HOUSEKEEPING},
+        'celery_app.test_task': {'queue': QUEUE_HOUSEKEEPING},
+    },
+
+    # Analyses run for minutes: a worker process reserves one task at a time
+    # and acknowledges it once done, so queued work stays in Redis where an
+    # idle worker (or a restarted one) can take it
+    worker_prefetch_multiplier=1,
+    task_acks_late=True,
+    # Native MediaPipe/OpenCV memory is not always returned between videos:
+    # worker processes are recycled by task count and resident size (checked
+    # after each task), and the replacement warms up its models again
+    worker_max_tasks_per_child=settings.CELERY_MAX_TASKS_PER_CHILD or None,
+    worker_max_memory_per_child=settings.CELERY_MAX_MEMORY_PER_CHILD_MB * 1024 or None,
+    broker_transport_options={
+        # A worker consuming several queues drains them in QUEUES order
+        'queue_order_strategy': 'priority',
+        # Unacknowledged tasks are redelivered after this delay: it must
+        # outlast the longest analysis
+        'visibility_timeout': settings.ANALYSIS_LOCK_TTL_SECONDS,
+    },
+
+    # Periodic jobs, run by the beat embedded in the housekeeping worker
+    beat_schedule={
+        'sweep-analysis-scheduler': {
+            'task': 'tasks.housekeeping.sweep_analysis_scheduler',
+            'schedule': settings.ANALYSIS_SCHEDULER_SWEEP_SECONDS,
+            # A sweep nobody picked up before the next one is redundant
+            'options': {'expires': settings.ANALYSIS_SCHEDULER_SWEEP_SECONDS},
+        },
+    },
 )
 
 # Explicitly include task modules
-celery_app.conf.imports = ['tasks.video_analysis']
+celery_app.conf.imports = ['tasks.video_analysis', 'tasks.feedback', 'tasks.housekeeping']
 
 @celery_app.task
 def test_task():
@@ -37,6 +37,12 @@ class Settings(BaseSettings):
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
     
+    # Celery
+    CELERY_RESULT_EXPIRES_SECONDS: int = 6 * 3600  # Task results are dropped from Redis after this
+    CELERY_INLINE_RESULT_BYTES: int = 8 * 1024  # Larger task manifests are parked in MinIO (see task_manifest)
+    CELERY_MAX_TASKS_PER_CHILD: int = 50  # Worker processes are replaced after this many tasks (0 = never)
+    CELERY_MAX_MEMORY_PER_CHILD_MB: int = 2048  # ...or once a task leaves them above this resident size (0 = no limit)
+    
     # Storage
     MAX_VIDEO_SIZE_MB: int = 100
     MAX_VIDEO_SIZE_BYTES: int = MAX_VIDEO_SIZE_MB * 1024 * 1024
@@ -47,6 +53,44 @@ class Settings(BaseSettings):
     USER_STORAGE_QUOTA_GB: int = 1
     USER_STORAGE_QUOTA_BYTES: int = USER_STORAGE_QUOTA_GB * 1024 * 1024 * 1024
     
+    # Pose analysis
+    ANALYSIS_SAMPLING_MODE: str = "target_fps"  # all, target_fps, stride, adaptive
+    ANALYSIS_TARGET_FPS: float = 60.0  # Used by target_fps and adaptive modes
+    ANALYSIS_FRAME_STRIDE: int = 1  # Used by stride mode
+    ANALYSIS_ADAPTIVE_MOTION_FACTOR: float = 2.0  # Motion spike threshold vs running average
+    ANALYSIS_INFERENCE_MAX_DIM: int = 960  # Longest side of frames sent to pose inference (0 = source size)
+    ANALYSIS_DECODER: str = "opencv"  # opencv or ffmpeg (pipe with scale filter)
+    ANALYSIS_DECODE_QUEUE_FRAMES: int = 8  # Frames decoded ahead of inference on a background thread (0 = inline)
+    ANALYSIS_PARALLEL_WORKERS: int = 0  # Processes per video for segmented extraction (0 = CPU count / Celery concurrency, 1 = serial)
+    ANALYSIS_SEGMENT_MIN_SECONDS: float = 10.0  # Videos are never split into segments shorter than this
+    ANALYSIS_SEGMENT_OVERLAP_SECONDS: float = 1.0  # Warm-up overlap used to re-establish tracking
+    ANALYSIS_LANDMARK_DTYPE: str = "float16"  # Storage precision of landmark blobs (float16 or float32)
+    ANALYSIS_EXTRACTOR: str = "solutions"  # solutions (mp.solutions.pose) or tasks (PoseLandmarker, VIDEO mode)
+    ANALYSIS_MODEL_DIR: str = ".cache/pose-models"  # PoseLandmarker bundles, downloaded on first use (prefetched in the image)
+    ANALYSIS_WARM_WORKERS: bool = True  # Build pose graphs when a worker process starts
+    ANALYSIS_MODEL_COMPLEXITY: int = 2  # MediaPipe Pose model for the full-quality pass (0, 1, 2 = lite, full, heavy)
+    ANALYSIS_PREVIEW_ENABLED: bool = True  # Run a fast preview pass before the full-quality pass
+    ANALYSIS_PREVIEW_MODEL_COMPLEXITY: int = 0
+    ANALYSIS_PREVIEW_TARGET_FPS: float = 15.0
+    ANALYSIS_PREVIEW_MAX_DIM: int = 480
+    ANALYSIS_CHECKPOINT_FRAMES: int = 300  # Analysed frames per flushed chunk, so retries resume (0 = off)
+    ANALYSIS_LOCK_TTL_SECONDS: int = 2 * 3600  # Upper bound on how long one video's job blocks new requests
+    ANALYSIS_HEARTBEAT_SECONDS: int = 30  # How often a running analysis stage reports that it is alive
+    ANALYSIS_HEARTBEAT_TIMEOUT_SECONDS: int = 300  # Silence after which its worker is considered dead and the job reclaimed
+    ANALYSIS_SCHEDULER_SLOTS: int = 2  # Interactive analyses handed to Celery at once, shared fairly between users (0 = enqueue directly)
+    ANALYSIS_USER_MAX_RUNNING: int = 1  # Interactive analyses of one user in flight at once
+    ANALYSIS_SCHEDULER_SWEEP_SECONDS: int = 60  # Beat interval reclaiming slots of dead jobs and dispatching queued ones
+    ANALYSIS_SMOOTHING_METHOD: str = "savgol"  # none, savgol or one_euro
+    ANALYSIS_GAP_FILL_SECONDS: float = 0.2  # Interpolate missing poses across gaps up to this long (0 = off)
+    ANALYSIS_SAVGOL_WINDOW_SECONDS: float = 0.12  # Window length in seconds (7 frames at 60 fps), whatever the sampling density
+    ANALYSIS_SAVGOL_POLYORDER: int = 2
+    ANALYSIS_ONE_EURO_MIN_CUTOFF: float = 1.0  # Hz; lower = smoother at rest
+    ANALYSIS_ONE_EURO_BETA: float = 5.0  # Higher = less lag on fast motion (speed in frame widths/s)
+    ANALYSIS_STROKE_CLIPS: bool = False  # Cut one clip per detected stroke (ffmpeg stream copy)
+    ANALYSIS_AUTO_FEEDBACK: bool = True  # Generate AI feedback as the last stage of every full analysis
+    ANALYSIS_COMPARISON_BAND: float = 0.1  # DTW band half width, as a fraction of the longer window
+    ANALYSIS_COMPARISON_MAX_FRAMES: int = 300  # Frames per aligned stroke (or clip), evenly subsampled beyond this
+    
     # Security
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
@@ -9,5 +9,9 @@ from models.training_program import TrainingProgram
 from models.video import Video
 from models.user import User
 from models.analysis import Analysis
+from models.stroke import Stroke
+from models.analysis_metric import AnalysisMetric
+from models.user_metric_progress import UserMetricProgress
+from models.video_comparison import VideoComparison
 
-__all__ = ["Drill", "Exercise", "Tip", "TrainingProgram", "Video", "User", "Analysis"]
+__all__ = ["Drill", "Exercise", "Tip", "TrainingProgram", "Video", "User", "Analysis", "Stroke", "AnalysisMetric", "UserMetricProgress", "VideoComparison"]
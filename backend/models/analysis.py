@@ -17,6 +17,10 @@ class AnalysisStatus(str, enum.Enum):
     COMPLETED = "completed"
     FAILED = "failed"
 
+class AnalysisTier(str, enum.Enum):
+    PREVIEW = "preview"  # Fast low-complexity pass shown right after upload
+    FULL = "full"        # Full-quality pass that replaces the preview
+
 class Analysis(Base):
     """Analysis model for storing pose detection results"""
     __tablename__ = "analyses"
@@ -24,8 +28,13 @@ class Analysis(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     video_id = Column(UUID(as_uuid=True), ForeignKey("videos.id", ondelete="CASCADE"), nullable=False, unique=True)
     status = Column(Enum(AnalysisStatus), default=AnalysisStatus.PENDING, nullable=False)
-    data = Column(JSONB, nullable=True)  # Stores the list of frames with landmarks
+    data = Column(JSONB, nullable=True)  # Legacy: list of frames with landmarks (see landmarks_path)
+    landmarks_path = Column(String(512), nullable=True)  # MinIO path of the binary landmark blob
+    quality_tier = Column(Enum(AnalysisTier), nullable=True)  # Pipeline tier that produced `data`
     ai_feedback = Column(JSONB, nullable=True)  # Stores the LLM generated feedback
+    processing_info = Column(JSONB, nullable=True)  # Sampling/decode parameters used to produce data
+    cache_key = Column(String(64), nullable=True, index=True)  # Content hash + pipeline version of a FULL result
+    phases = Column(JSONB, nullable=True)  # Stroke phase boundaries and per-phase metric summaries
     error_message = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
@@ -0,0 +1,42 @@
+"""
+Analysis Metric Model
+Precomputed per-video metric aggregates (one row per metric and phase)
+"""
+from sqlalchemy import Column, String, Integer, Float, DateTime, ForeignKey, UUID, UniqueConstraint, Index
+from sqlalchemy.orm import relationship, backref
+from datetime import datetime
+import uuid
+
+from database import Base
+
+
+class AnalysisMetric(Base):
+    """Aggregates of one metric over a whole video (phase "all") or one of its phases"""
+    __tablename__ = "analysis_metrics"
+    __table_args__ = (
+        UniqueConstraint("video_id", "metric", "phase", name="uq_analysis_metrics_video_metric_phase"),
+        # Per-user time series (see progress_service) read straight from this index
+        Index("ix_analysis_metrics_user_series", "user_id", "phase", "metric", "recorded_at"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    analysis_id = Column(UUID(as_uuid=True), ForeignKey("analyses.id", ondelete="CASCADE"), nullable=False, index=True)
+    video_id = Column(UUID(as_uuid=True), ForeignKey("videos.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(UUID(as_uuid=True), nullable=True)  # Video owner (denormalised from videos.uploaded_by)
+    recorded_at = Column(DateTime, nullable=True)  # Video upload time, the x axis of progress series
+    metric = Column(String(64), nullable=False, index=True)  # e.g. right_knee_angle
+    phase = Column(String(20), nullable=False)  # "all" or a phase name (see phase_segmentation.PHASES)
+    count = Column(Integer, nullable=False)  # Frames with a valid value
+    mean = Column(Float, nullable=False)
+    min = Column(Float, nullable=False)
+    max = Column(Float, nullable=False)
+    p10 = Column(Float, nullable=False)
+    p50 = Column(Float, nullable=False)
+    p90 = Column(Float, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    # Relationships
+    analysis = relationship("Analysis", backref=backref("metrics", cascade="all, delete-orphan"))
+
+    def __repr__(self):
+        return f"<AnalysisMetric(video_id={self.video_id}, metric={self.metric}, phase={self.phase})>"
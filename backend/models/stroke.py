@@ -0,0 +1,44 @@
+"""
+Stroke Model
+Individual strokes detected in an analysed video (one row per swing)
+"""
+from sqlalchemy import Column, String, Integer, Float, DateTime, ForeignKey, UUID
+from sqlalchemy.dialects.postgresql import JSONB, ARRAY, REAL
+from sqlalchemy.orm import relationship, backref
+from datetime import datetime
+import uuid
+
+from database import Base
+
+
+class Stroke(Base):
+    """Stroke model: bounds, type guess and phase summary of one swing"""
+    __tablename__ = "strokes"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    analysis_id = Column(UUID(as_uuid=True), ForeignKey("analyses.id", ondelete="CASCADE"), nullable=False, index=True)
+    video_id = Column(UUID(as_uuid=True), ForeignKey("videos.id", ondelete="CASCADE"), nullable=False, index=True)
+    stroke_index = Column(Integer, nullable=False)  # Order within the video, from 0
+    start_frame = Column(Integer, nullable=False)  # Source frame, inclusive
+    end_frame = Column(Integer, nullable=False)  # Source frame, exclusive
+    start_time = Column(Float, nullable=False)
+    end_time = Column(Float, nullable=False)
+    contact_frame = Column(Integer, nullable=False)
+    contact_time = Column(Float, nullable=False)
+    stroke_type = Column(String(20), nullable=False)  # forehand, backhand, serve, unknown (heuristic guess)
+    side = Column(String(10), nullable=False)  # Hitting arm: left or right
+    peak_wrist_speed = Column(Float, nullable=True)
+    phases = Column(JSONB, nullable=True)  # Same structure as Analysis.phases, for this stroke only
+    clip_path = Column(String(512), nullable=True)  # MinIO path of the stream-copied clip, if cut
+    embedding = Column(ARRAY(REAL), nullable=True)  # Pose embedding (see services.pose_embedding)
+    embedding_version = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    # Relationships
+    analysis = relationship(
+        "Analysis",
+        backref=backref("strokes", cascade="all, delete-orphan", order_by="Stroke.stroke_index")
+    )
+
+    def __repr__(self):
+        return f"<Stroke(video_id={self.video_id}, index={self.stroke_index}, type={self.stroke_type})>"
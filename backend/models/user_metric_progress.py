@@ -0,0 +1,37 @@
+"""
+User Metric Progress Model
+Per-user aggregates of each metric across all analysed videos
+"""
+from sqlalchemy import Column, String, Integer, Float, DateTime, UUID, UniqueConstraint
+from datetime import datetime
+import uuid
+
+from database import Base
+
+
+class UserMetricProgress(Base):
+    """
+    Running summary of one metric for one player
+
+    Refreshed from analysis_metrics whenever one of the user's analyses
+    completes or a video is deleted (see progress_service).
+    """
+    __tablename__ = "user_metric_progress"
+    __table_args__ = (
+        UniqueConstraint("user_id", "metric", name="uq_user_metric_progress_user_metric"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    metric = Column(String(64), nullable=False)
+    session_count = Column(Integer, nullable=False)  # Videos with a value for this metric
+    mean = Column(Float, nullable=False)  # Mean of per-video means
+    min = Column(Float, nullable=False)  # Lowest per-video mean
+    max = Column(Float, nullable=False)  # Highest per-video mean
+    first_at = Column(DateTime, nullable=False)
+    last_at = Column(DateTime, nullable=False)
+    last_value = Column(Float, nullable=False)  # Per-video mean of the most recent video
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<UserMetricProgress(user_id={self.user_id}, metric={self.metric}, sessions={self.session_count})>"
@@ -23,6 +23,7 @@ class Video(Base):
     size_bytes = Column(BigInteger, nullable=False)
     format = Column(String(10), nullable=False)  # mp4, mov, avi
     extra_metadata = Column(JSONB, nullable=True)  # Extensible metadata
+    content_hash = Column(String(64), nullable=True, index=True)  # SHA-256 of the file bytes
     uploaded_by = Column(UUID(as_uuid=True), nullable=True)  # FK to users table (future)
     is_reference = Column(Boolean, default=False, nullable=False)  # Pro/Reference video
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
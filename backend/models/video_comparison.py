@@ -0,0 +1,34 @@
+"""
+Video Comparison Model
+Cached alignment of a player's video against a reference video
+"""
+from sqlalchemy import Column, String, DateTime, ForeignKey, UUID, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
+from datetime import datetime
+import uuid
+
+from database import Base
+
+
+class VideoComparison(Base):
+    """
+    Result of services.pose_comparison for one (video, reference video) pair
+
+    `cache_key` fingerprints both analyses and the comparison settings; a
+    mismatch means either side was re-analysed and the row is recomputed.
+    """
+    __tablename__ = "video_comparisons"
+    __table_args__ = (
+        UniqueConstraint("video_id", "reference_video_id", name="uq_video_comparisons_pair"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    video_id = Column(UUID(as_uuid=True), ForeignKey("videos.id", ondelete="CASCADE"), nullable=False, index=True)
+    reference_video_id = Column(UUID(as_uuid=True), ForeignKey("videos.id", ondelete="CASCADE"), nullable=False, index=True)
+    cache_key = Column(String(64), nullable=False)
+    result = Column(JSONB, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<VideoComparison(video_id={self.video_id}, reference_video_id={self.reference_video_id})>"
@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from typing import Any
+from typing import Any, Optional
 
 from database import get_db
 from models.user import User, UserRole
 from schemas.user import UserResponse, UserUpdate, UserAdminUpdate
+from schemas.progress import ProgressResponse
+from services.progress_service import progress_service
 from core.deps import get_current_user, get_current_active_superuser
 
 router = APIRouter()
@@ -38,6 +40,19 @@ async def update_user_me(
     db.refresh(current_user)
     return current_user
 
+@router.get("/me/progress", response_model=ProgressResponse)
+async def read_users_me_progress(
+    metrics: Optional[str] = Query(None, description="Comma-separated metric names (default: all)"),
+    limit: int = Query(50, ge=1, le=500, description="Most recent videos per metric"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> Any:
+    """
+    Get own metric time series across analysed videos.
+    """
+    names = [name.strip() for name in metrics.split(",") if name.strip()] if metrics else None
+    return {"metrics": progress_service.get_progress(db, current_user.id, names, limit)}
+
 @router.get("/", response_model=list[UserResponse])
 async def read_users(
     db: Session = Depends(get_db),
@@ -2,14 +2,18 @@
 Video API Routes
 Handles video upload, retrieval, and deletion
 """
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, status
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Query, Header, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy import func
 from sqlalchemy import func
-from sqlalchemy.orm import Session
-from typing import Optional
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, defer
+from typing import Optional, List
 import tempfile
 import os
 import uuid
+import hashlib
+import logging
 from datetime import datetime
 
 from database import get_db
@@ -20,7 +24,30 @@ from models.user import User, UserRole
 from pydantic import BaseModel
 from core.deps import get_current_active_user
 from models.analysis import Analysis, AnalysisStatus
-from tasks.video_analysis import analyze_video_task
+from models.stroke import Stroke
+from models.analysis_metric import AnalysisMetric
+from models.video_comparison import VideoComparison
+from tasks.video_analysis import start_video_analysis
+from services.landmark_store import landmark_store
+from services.analysis_progress import analysis_progress
+from services.analysis_scheduler import analysis_scheduler
+from services.progress_service import progress_service
+from services.biomechanics import NUM_LANDMARKS
+from services.pose_comparison import COMPARISON_VERSION, compare_sequences
+from services.pose_embedding import EMBEDDING_VERSION
+from services.reference_index import reference_index
+from services.feedback_service import feedback_service
+from services.analysis_export import (
+    EXPORT_MEDIA_TYPES,
+    EXPORT_BATCH_FRAMES,
+    negotiate_export_format,
+    iter_json_array,
+    iter_ndjson,
+    iter_binary,
+    frames_to_sequences,
+)
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -131,6 +158,7 @@ async def upload_video(
                 "resolution": {"width": width, "height": height},
                 "mime_type": mime_type
             },
+            content_hash=hashlib.sha256(content).hexdigest(),
             uploaded_by=current_user.id
         )
         
@@ -148,7 +176,7 @@ async def upload_video(
         
         # Trigger analysis task
         try:
-            analyze_video_task.delay(str(video.id))
+            start_video_analysis(str(video.id), str(current_user.id))
         except Exception as e:
             # Log error but don't fail upload
             print(f"Failed to trigger analysis task: {e}")
@@ -290,6 +318,8 @@ async def delete_video(
     
     # Soft delete
     video.deleted_at = datetime.utcnow()
+    db.flush()
+    progress_service.refresh(db, video.uploaded_by)
     db.commit()
     
     # Note: Physical file remains in MinIO for potential recovery
@@ -320,13 +350,38 @@ async def get_storage_quota(
     }
 
 
+def _parse_landmark_indices(landmarks: Optional[str]) -> Optional[List[int]]:
+    """Parse a comma-separated landmark subset such as "11,12,13,14"."""
+    if landmarks is None:
+        return None
+    try:
+        indices = [int(part) for part in landmarks.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="landmarks must be a comma-separated list of indices")
+    if not indices or any(i < 0 or i >= NUM_LANDMARKS for i in indices):
+        raise HTTPException(status_code=400, detail=f"landmark indices must be between 0 and {NUM_LANDMARKS - 1}")
+    return indices
+
+
 @router.get("/{video_id}/analysis")
 async def get_video_analysis(
     video_id: str,
+    start_time: Optional[float] = Query(None, ge=0, description="Window start in seconds (inclusive)"),
+    end_time: Optional[float] = Query(None, ge=0, description="Window end in seconds (exclusive)"),
+    start_frame: Optional[int] = Query(None, ge=0, description="First source frame index (inclusive)"),
+    end_frame: Optional[int] = Query(None, ge=0, description="Last source frame index (exclusive)"),
+    stride: int = Query(1, ge=1, description="Return every n-th analysed frame of the window"),
+    landmarks: Optional[str] = Query(None, description="Comma-separated landmark indices to return"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Get video analysis results"""
+    """
+    Get video analysis results
+    
+    Without window parameters the full frame list is returned. With any of
+    start_time/end_time/start_frame/end_frame/stride/landmarks, only that slice
+    is read from storage, so clients can fetch pose data progressively.
+    """
     video = db.query(Video).filter(
         Video.id == uuid.UUID(video_id),
         Video.deleted_at.is_(None)
@@ -338,36 +393,410 @@ async def get_video_analysis(
     if video.uploaded_by != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    analysis = db.query(Analysis).filter(Analysis.video_id == video.id).first()
+    # Frame data is loaded explicitly below, never as part of the row
+    analysis = db.query(Analysis).options(defer(Analysis.data)).filter(Analysis.video_id == video.id).first()
     if not analysis:
         # Return empty/pending status instead of 404 if video exists?
         # Or just 404. 404 is fine.
         raise HTTPException(status_code=404, detail="Analysis not found")
-        
-    print(f"DEBUG: GET /analysis - Video {video_id}")
-    print(f"DEBUG: Analysis Status: {analysis.status}")
-    if analysis.data:
-        print(f"DEBUG: Analysis Data Frames: {len(analysis.data)}")
+
+    landmark_indices = _parse_landmark_indices(landmarks)
+    windowed = any(
+        value is not None for value in (start_time, end_time, start_frame, end_frame, landmark_indices)
+    ) or stride > 1
+    window = None
+    total_frames = None
+
+    if windowed:
+        window = {
+            "start_time": start_time,
+            "end_time": end_time,
+            "start_frame": start_frame,
+            "end_frame": end_frame,
+            "stride": stride,
+            "landmarks": landmark_indices
+        }
+        if analysis.landmarks_path:
+            sequence, total_frames = landmark_store.load_window(
+                analysis, start_time, end_time, start_frame, end_frame, stride
+            )
+            frames = sequence.to_frames(landmark_indices)
+        else:
+            frames, total_frames = landmark_store.load_window_legacy(
+                db, analysis.id, start_time, end_time, start_frame, end_frame, stride, landmark_indices
+            )
     else:
-        print(f"DEBUG: Analysis Data is EMPTY")
+        frames = landmark_store.load_frames(analysis)
         
-    if analysis.ai_feedback:
-        print(f"DEBUG: AI Feedback Keys: {analysis.ai_feedback.keys()}")
-    else:
-        print(f"DEBUG: AI Feedback is None")
+    logger.debug(
+        f"GET /analysis - video {video_id}, status {analysis.status}, "
+        f"{len(frames) if frames else 0} frame(s), feedback: {list(analysis.ai_feedback or {})}"
+    )
 
     return {
         "id": str(analysis.id),
         "video_id": str(analysis.video_id),
         "status": analysis.status,
-        "data": analysis.data,
+        "data": frames,
+        "window": window,
+        "total_frames": total_frames,
+        "quality_tier": analysis.quality_tier,
         "ai_feedback": analysis.ai_feedback,
+        "processing_info": analysis.processing_info,
+        "phases": analysis.phases,
+        "progress": analysis_progress.get(video_id) if analysis.status == AnalysisStatus.PROCESSING else None,
+        "queue": (
+            analysis_scheduler.position(str(video.id), str(video.uploaded_by))
+            if analysis.status == AnalysisStatus.PENDING else None
+        ),
         "error_message": analysis.error_message,
         "created_at": analysis.created_at,
         "updated_at": analysis.updated_at
     }
 
 
+@router.get("/{video_id}/analysis/export")
+async def export_video_analysis(
+    video_id: str,
+    accept: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Stream every analysed frame of a video
+    
+    The format follows the Accept header: application/json (a single array),
+    application/x-ndjson (one frame per line) or application/octet-stream
+    (length-prefixed landmark blobs, see services.landmark_codec). Frames are
+    read from storage and encoded chunk by chunk, so memory use does not grow
+    with the clip length.
+    """
+    export_format = negotiate_export_format(accept)
+    if export_format is None:
+        raise HTTPException(
+            status_code=status.HTTP_406_NOT_ACCEPTABLE,
+            detail=f"Supported formats: {', '.join(EXPORT_MEDIA_TYPES)}"
+        )
+
+    video = db.query(Video).filter(
+        Video.id == uuid.UUID(video_id),
+        Video.deleted_at.is_(None)
+    ).first()
+    
+    if not video:
+        raise HTTPException(status_code=404, detail="Video not found")
+        
+    if video.uploaded_by != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    analysis = db.query(Analysis).options(defer(Analysis.data)).filter(Analysis.video_id == video.id).first()
+    if not analysis or (not analysis.landmarks_path and analysis.status != AnalysisStatus.COMPLETED):
+        raise HTTPException(status_code=404, detail="Analysis not found")
+
+    if analysis.landmarks_path:
+        chunks = landmark_store.iter_chunks(analysis, EXPORT_BATCH_FRAMES)
+        frames = (frame for chunk in chunks for frame in chunk.to_frames())
+    else:
+        frames = landmark_store.iter_legacy_frames(analysis.id, EXPORT_BATCH_FRAMES)
+        chunks = None
+
+    if export_format == "binary":
+        body = iter_binary(chunks if chunks is not None else frames_to_sequences(frames),
+                           settings.ANALYSIS_LANDMARK_DTYPE)
+    elif export_format == "ndjson":
+        body = iter_ndjson(frames)
+    else:
+        body = iter_json_array(frames)
+
+    media_type = next(media for media, fmt in EXPORT_MEDIA_TYPES.items() if fmt == export_format)
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="analysis-{video.id}.{export_format}"',
+            "X-Analysis-Quality-Tier": analysis.quality_tier.value if analysis.quality_tier else "",
+            "Vary": "Accept"
+        }
+    )
+
+
+@router.get("/{video_id}/strokes")
+async def get_video_strokes(
+    video_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    List the strokes detected in a video
+    
+    Each stroke's start_frame/end_frame can be passed to GET /analysis to
+    fetch only that swing's landmarks.
+    """
+    video = db.query(Video).filter(
+        Video.id == uuid.UUID(video_id),
+        Video.deleted_at.is_(None)
+    ).first()
+    
+    if not video:
+        raise HTTPException(status_code=404, detail="Video not found")
+        
+    if video.uploaded_by != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    strokes = db.query(Stroke).filter(Stroke.video_id == video.id).order_by(Stroke.stroke_index).all()
+    return [
+        {
+            "id": str(stroke.id),
+            "index": stroke.stroke_index,
+            "start_frame": stroke.start_frame,
+            "end_frame": stroke.end_frame,
+            "start_time": stroke.start_time,
+            "end_time": stroke.end_time,
+            "contact_frame": stroke.contact_frame,
+            "contact_time": stroke.contact_time,
+            "stroke_type": stroke.stroke_type,
+            "side": stroke.side,
+            "peak_wrist_speed": stroke.peak_wrist_speed,
+            "phases": stroke.phases,
+            "clip_url": storage_service.get_signed_url(stroke.clip_path) if stroke.clip_path else None
+        }
+        for stroke in strokes
+    ]
+
+
+@router.get("/{video_id}/metrics")
+async def get_video_metrics(
+    video_id: str,
+    phase: Optional[str] = Query(None, description="Only this phase ('all' = whole clip)"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Precomputed metric aggregates of a video, per metric and phase
+    """
+    video = db.query(Video).filter(
+        Video.id == uuid.UUID(video_id),
+        Video.deleted_at.is_(None)
+    ).first()
+    
+    if not video:
+        raise HTTPException(status_code=404, detail="Video not found")
+        
+    if video.uploaded_by != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    query = db.query(AnalysisMetric).filter(AnalysisMetric.video_id == video.id)
+    if phase:
+        query = query.filter(AnalysisMetric.phase == phase)
+
+    return [
+        {
+            "metric": row.metric,
+            "phase": row.phase,
+            "count": row.count,
+            "mean": row.mean,
+            "min": row.min,
+            "max": row.max,
+            "p10": row.p10,
+            "p50": row.p50,
+            "p90": row.p90
+        }
+        for row in query.order_by(AnalysisMetric.metric, AnalysisMetric.phase).all()
+    ]
+
+
+def _comparison_cache_key(analysis: Analysis, reference: Analysis) -> str:
+    """Fingerprint of both analysis results and the comparison settings"""
+    parts = [
+        str(COMPARISON_VERSION),
+        repr(settings.ANALYSIS_COMPARISON_BAND),
+        str(settings.ANALYSIS_COMPARISON_MAX_FRAMES),
+        # cache_key identifies a FULL result; fall back to the row version otherwise
+        analysis.cache_key or f"{analysis.id}:{analysis.updated_at}",
+        reference.cache_key or f"{reference.id}:{reference.updated_at}",
+    ]
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+
+def _comparison_strokes(db: Session, video_id) -> List[dict]:
+    """Stroke windows of a video, with the embeddings used to pair them (see pair_strokes)"""
+    rows = db.query(
+        Stroke.stroke_index, Stroke.start_frame, Stroke.end_frame, Stroke.stroke_type,
+        Stroke.embedding, Stroke.embedding_version
+    ).filter(Stroke.video_id == video_id).order_by(Stroke.stroke_index).all()
+    return [
+        {
+            "stroke_index": row.stroke_index,
+            "start_frame": row.start_frame,
+            "end_frame": row.end_frame,
+            "stroke_type": row.stroke_type,
+            "embedding": row.embedding if row.embedding_version == EMBEDDING_VERSION else None,
+        }
+        for row in rows
+    ]
+
+
+@router.get("/{video_id}/compare/{reference_id}")
+def compare_with_reference(
+    video_id: str,
+    reference_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Align a video with a reference video and compare joint angles per phase
+    
+    Each detected stroke of the video is aligned with the closest reference
+    stroke of the same type (whole clips when either video has no strokes).
+    The response maps every aligned frame of the video to a reference frame
+    (for synchronised playback) and lists user/reference angle differences for
+    the whole clip and each phase. Results are cached per pair and recomputed
+    only when either video is re-analysed.
+
+    A plain def: FastAPI runs it in the threadpool, so the blob loads and the
+    alignment never block the event loop.
+    """
+    video = db.query(Video).filter(
+        Video.id == uuid.UUID(video_id),
+        Video.deleted_at.is_(None)
+    ).first()
+    
+    if not video:
+        raise HTTPException(status_code=404, detail="Video not found")
+        
+    if video.uploaded_by != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    reference_video = db.query(Video).filter(
+        Video.id == uuid.UUID(reference_id),
+        Video.is_reference == True,
+        Video.deleted_at.is_(None)
+    ).first()
+    if not reference_video:
+        raise HTTPException(status_code=404, detail="Reference video not found")
+
+    analyses = {
+        row.video_id: row
+        for row in db.query(Analysis).options(defer(Analysis.data)).filter(
+            Analysis.video_id.in_([video.id, reference_video.id]),
+            Analysis.status == AnalysisStatus.COMPLETED
+        )
+    }
+    analysis = analyses.get(video.id)
+    reference = analyses.get(reference_video.id)
+    if not analysis or not reference:
+        raise HTTPException(status_code=409, detail="Both videos must be analysed first")
+
+    cache_key = _comparison_cache_key(analysis, reference)
+    comparison = db.query(VideoComparison).filter(
+        VideoComparison.video_id == video.id,
+        VideoComparison.reference_video_id == reference_video.id
+    ).first()
+    if comparison and comparison.cache_key == cache_key:
+        return comparison.result
+
+    result = compare_sequences(
+        landmark_store.load_sequence(analysis),
+        landmark_store.load_sequence(reference),
+        analysis.phases,
+        reference.phases,
+        band=settings.ANALYSIS_COMPARISON_BAND,
+        user_strokes=_comparison_strokes(db, video.id),
+        reference_strokes=_comparison_strokes(db, reference_video.id),
+        max_frames=settings.ANALYSIS_COMPARISON_MAX_FRAMES
+    )
+    if result is None:
+        raise HTTPException(status_code=422, detail="No pose detected in one of the videos")
+
+    result = {"video_id": str(video.id), "reference_video_id": str(reference_video.id), **result}
+    if comparison:
+        comparison.cache_key = cache_key
+        comparison.result = result
+    else:
+        db.add(VideoComparison(
+            video_id=video.id,
+            reference_video_id=reference_video.id,
+            cache_key=cache_key,
+            result=result
+        ))
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent first view stored the same pair
+        db.rollback()
+
+    return result
+
+
+@router.get("/{video_id}/similar-references")
+async def get_similar_references(
+    video_id: str,
+    k: int = Query(5, ge=1, le=50, description="Matches per stroke"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Closest reference strokes for each stroke of a video
+    
+    Strokes are compared through their pose embeddings (see
+    services.pose_embedding), against references of the same stroke type
+    when the type is known. `references` ranks reference videos by their
+    best match over all strokes.
+    """
+    video = db.query(Video).filter(
+        Video.id == uuid.UUID(video_id),
+        Video.deleted_at.is_(None)
+    ).first()
+    
+    if not video:
+        raise HTTPException(status_code=404, detail="Video not found")
+        
+    if video.uploaded_by != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    strokes = db.query(Stroke).filter(
+        Stroke.video_id == video.id,
+        Stroke.embedding_version == EMBEDDING_VERSION,
+        Stroke.embedding.isnot(None)
+    ).order_by(Stroke.stroke_index).all()
+
+    matches = reference_index.search(
+        db,
+        [stroke.embedding for stroke in strokes],
+        k,
+        [stroke.stroke_type for stroke in strokes],
+        exclude_video_id=str(video.id)
+    )
+
+    references = {}
+    for stroke, stroke_matches in zip(strokes, matches):
+        for match in stroke_matches:
+            best = references.get(match["video_id"])
+            if best is None or match["distance"] < best["distance"]:
+                references[match["video_id"]] = {
+                    "video_id": match["video_id"],
+                    "filename": match["filename"],
+                    "distance": match["distance"],
+                    "stroke_index": stroke.stroke_index,
+                    "reference_stroke_index": match["stroke_index"]
+                }
+
+    return {
+        "video_id": str(video.id),
+        "strokes": [
+            {
+                "stroke_index": stroke.stroke_index,
+                "stroke_type": stroke.stroke_type,
+                "start_time": stroke.start_time,
+                "end_time": stroke.end_time,
+                "matches": stroke_matches
+            }
+            for stroke, stroke_matches in zip(strokes, matches)
+        ],
+        "references": sorted(references.values(), key=lambda item: item["distance"])
+    }
+
+
 @router.post("/{video_id}/analyze")
 async def trigger_video_analysis(
     video_id: str,
@@ -386,16 +815,10 @@ async def trigger_video_analysis(
     if video.uploaded_by != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    analysis = db.query(Analysis).filter(Analysis.video_id == video.id).first()
-    if not analysis:
-        analysis = Analysis(video_id=video.id)
-        db.add(analysis)
-    
-    analysis.status = AnalysisStatus.PENDING
-    analysis.error_message = None
-    db.commit()
-    
-    analyze_video_task.delay(str(video.id))
+    # Repeated clicks while a job is queued or running collapse into that job;
+    # the status is set to PENDING only by the request that takes the lock
+    if not start_video_analysis(str(video.id), str(video.uploaded_by), mark_pending=True):
+        return {"status": "analysis_in_progress"}
     
     return {"status": "analysis_triggered"}
 
@@ -558,7 +981,7 @@ async def generate_video_feedback(
     if video.uploaded_by != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    analysis = db.query(Analysis).filter(Analysis.video_id == video.id).first()
+    analysis = db.query(Analysis).options(defer(Analysis.data)).filter(Analysis.video_id == video.id).first()
     if not analysis:
         raise HTTPException(status_code=404, detail="Analysis not found")
         
@@ -569,34 +992,13 @@ async def generate_video_feedback(
     if analysis.ai_feedback and not force_regenerate:
         return analysis.ai_feedback
         
-    # Prepare data for LLM
-    # We need to extract relevant metrics from analysis.data
-    # analysis.data is a list of frames. We should probably aggregate or pick key frames.
-    # For MVP, let's pass a summary if possible, or just the raw data if it's small enough.
-    # But raw data is huge (30fps * 33 landmarks).
-    # We need to calculate summary metrics first if they aren't already there.
-    # The `analysis_service.py` calculates metrics. Let's check what's in `analysis.data`.
-    # It has `metrics` per frame.
-    
-    # Let's extract a summary of metrics (e.g., average angles, or key phases).
-    # For now, let's just pass the stroke type (from metadata?) and maybe some sample metrics.
-    # We don't have stroke type in metadata yet?
-    # Let's assume we pass the first valid frame's metrics for now as a placeholder.
-    
-    analysis_data = {
-        "stroke_type": video.extra_metadata.get("stroke_type", "Unknown") if video.extra_metadata else "Unknown",
-        "metrics": _extract_summary_metrics(analysis.data)
-    }
-    
-    print(f"DEBUG: Analysis Data sent to LLM: {analysis_data}")
-    
-    # Fetch available drills
-    from models.drill import Drill
-    drills = db.query(Drill).filter(Drill.deleted_at.is_(None)).all()
-    available_drills = [
-        {"id": str(d.id), "title": d.title, "focus_area": d.focus_area} 
-        for d in drills
-    ]
+    # Normally generated by the analysis pipeline (see tasks.feedback); this
+    # path covers forced regeneration and analyses that predate it
+    analysis_data, available_drills = feedback_service.feedback_input(db, video, analysis)
+    logger.debug(
+        f"Feedback input for video {video.id}: {len(analysis_data.get('metrics') or {})} metrics, "
+        f"{len(available_drills)} drills"
+    )
     
     feedback = await llm_service.generate_feedback(analysis_data, available_drills)
     
@@ -605,26 +1007,3 @@ async def generate_video_feedback(
     db.commit()
     
     return feedback
-
-def _extract_summary_metrics(data: list) -> dict:
-    """Helper to extract summary metrics from frame data"""
-    if not data:
-        return {}
-        
-    # Simple aggregation: Average of non-null metrics
-    # This is a placeholder. Real implementation needs phase detection.
-    summary = {}
-    count = 0
-    
-    for frame in data:
-        if frame.get("metrics"):
-            for key, value in frame["metrics"].items():
-                if value is not None:
-                    summary[key] = summary.get(key, 0) + value
-            count += 1
-            
-    if count > 0:
-        for key in summary:
-            summary[key] /= count
-            
-    return summary
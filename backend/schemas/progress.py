@@ -0,0 +1,31 @@
+from typing import Dict, List, Optional
+from pydantic import BaseModel
+from datetime import datetime
+from uuid import UUID
+
+
+class MetricPoint(BaseModel):
+    video_id: UUID
+    recorded_at: Optional[datetime] = None
+    mean: float
+    p10: float
+    p90: float
+
+
+class MetricSummary(BaseModel):
+    session_count: int
+    mean: float
+    min: float
+    max: float
+    first_at: datetime
+    last_at: datetime
+    last_value: float
+
+
+class MetricProgress(BaseModel):
+    summary: MetricSummary
+    series: List[MetricPoint]
+
+
+class ProgressResponse(BaseModel):
+    metrics: Dict[str, MetricProgress]
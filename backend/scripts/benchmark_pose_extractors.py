@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Script de benchmark des extracteurs de pose (mp.solutions vs Tasks PoseLandmarker)
+
+Décode une vidéo locale une seule fois, puis mesure pour chaque extracteur le
+débit d'inférence (images/s, CPU) et l'écart avec une référence :
+taux de détection, distance moyenne des landmarks et écart moyen des angles.
+
+Usage:
+    python scripts/benchmark_pose_extractors.py video.mp4
+    python scripts/benchmark_pose_extractors.py video.mp4 --max-frames 300 --max-dim 960
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+# Colors
+GREEN = '\033[0;32m'
+RED = '\033[0;31m'
+YELLOW = '\033[1;33m'
+BLUE = '\033[0;34m'
+NC = '\033[0m'
+
+# Ajouter le répertoire parent au path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.biomechanics import compute_joint_angles, empty_landmarks, VISIBILITY_THRESHOLD
+from services.frame_sampling import FrameSampler
+from services.video_decoder import VideoFrameReader
+from services.pose_extractors import create_extractor
+
+# (extracteur, model_complexity) : la première configuration sert de référence
+CONFIGURATIONS = [
+    ("solutions", 2),
+    ("solutions", 1),
+    ("solutions", 0),
+    ("tasks", 2),
+    ("tasks", 1),
+    ("tasks", 0),
+]
+
+
+def print_header(title: str):
+    """Affiche un header formaté"""
+    print("\n" + "=" * 80)
+    print(f"  {BLUE}{title}{NC}")
+    print("=" * 80)
+
+
+def decode_frames(path: str, max_frames: int, max_dim: int, target_fps: float):
+    """Décode les images une fois pour que seule l'inférence soit chronométrée"""
+    sampler = FrameSampler(mode="target_fps", target_fps=target_fps)
+    frames = []
+    with VideoFrameReader(path, sampler=sampler, max_dim=max_dim) as reader:
+        for _, timestamp, image in reader:
+            frames.append((timestamp, image))
+            if max_frames and len(frames) >= max_frames:
+                break
+    return frames
+
+
+def run_extractor(name: str, complexity: int, frames):
+    """Landmarks (frames, 33, 4) et durée d'inférence en secondes"""
+    landmarks = empty_landmarks(len(frames))
+    with create_extractor({"extractor": name, "model_complexity": complexity}) as extractor:
+        # Première image hors chrono : initialisation du graphe
+        extractor.detect(frames[0][1], 0)
+        extractor.reset()
+
+        started = time.perf_counter()
+        for i, (timestamp, image) in enumerate(frames):
+            detected = extractor.detect(image, int(round(timestamp * 1000)))
+            if detected is not None:
+                landmarks[i] = detected
+        elapsed = time.perf_counter() - started
+    return landmarks, elapsed
+
+
+def compare(landmarks: np.ndarray, reference: np.ndarray) -> dict:
+    """Écarts par rapport à la référence, sur les images détectées des deux côtés"""
+    detected = ~np.isnan(landmarks[:, :, 0]).all(axis=1)
+    both = detected & ~np.isnan(reference[:, :, 0]).all(axis=1)
+
+    visible = both[:, None] & (landmarks[:, :, 3] > VISIBILITY_THRESHOLD) & (reference[:, :, 3] > VISIBILITY_THRESHOLD)
+    distances = np.linalg.norm(landmarks[:, :, :2] - reference[:, :, :2], axis=-1)
+    reference_angles = compute_joint_angles(reference)
+    angle_diffs = [
+        np.abs(values - reference_angles[metric])[both]
+        for metric, values in compute_joint_angles(landmarks).items()
+    ]
+    angle_diffs = np.concatenate(angle_diffs) if angle_diffs else np.zeros(0)
+    angle_diffs = angle_diffs[np.isfinite(angle_diffs)]
+
+    return {
+        "detection_rate": float(detected.mean()) if len(detected) else 0.0,
+        "landmark_error": float(distances[visible].mean()) if visible.any() else float("nan"),
+        "angle_error": float(angle_diffs.mean()) if len(angle_diffs) else float("nan"),
+    }
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Benchmark des extracteurs de pose")
+    parser.add_argument("video", help="Chemin d'une vidéo locale")
+    parser.add_argument("--max-frames", type=int, default=300, help="Nombre d'images analysées (0 = toutes)")
+    parser.add_argument("--max-dim", type=int, default=960, help="Plus grand côté des images d'inférence")
+    parser.add_argument("--target-fps", type=float, default=60.0, help="Cadence d'échantillonnage")
+    args = parser.parse_args()
+
+    print("\n" + "=" * 80)
+    print(f"{BLUE}🎾 CARLITOS COACH - Benchmark des extracteurs de pose{NC}")
+    print("=" * 80)
+
+    frames = decode_frames(args.video, args.max_frames, args.max_dim, args.target_fps)
+    if not frames:
+        print(f"   {RED}❌ Aucune image décodée{NC}")
+        return
+    height, width = frames[0][1].shape[:2]
+    print(f"   📹 {len(frames)} images {width}x{height}")
+
+    print_header("RÉSULTATS")
+    print(f"   {'Extracteur':<22}{'img/s':>8}{'Détection':>12}{'Landmarks':>12}{'Angles (°)':>12}")
+
+    reference = None
+    for name, complexity in CONFIGURATIONS:
+        label = f"{name} (complexity {complexity})"
+        try:
+            landmarks, elapsed = run_extractor(name, complexity, frames)
+        except Exception as e:
+            print(f"   {label:<22}{RED}❌ {e}{NC}")
+            continue
+
+        if reference is None:
+            reference = landmarks
+        scores = compare(landmarks, reference)
+        print(
+            f"   {label:<22}{len(frames) / elapsed:>8.1f}"
+            f"{scores['detection_rate']:>12.1%}"
+            f"{scores['landmark_error']:>12.4f}"
+            f"{scores['angle_error']:>12.2f}"
+        )
+
+    print(f"\n   {YELLOW}💡 Écarts mesurés par rapport à la première ligne (référence).{NC}")
+    print("\n" + "=" * 80)
+    print(f"{GREEN}✅ Benchmark terminé!{NC}")
+    print("=" * 80 + "\n")
+
+
+if __name__ == "__main__":
+    main()
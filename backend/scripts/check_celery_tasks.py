@@ -26,7 +26,7 @@ for logger_name in ['celery', 'kombu', 'amqp', 'redis']:
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from celery.result import AsyncResult
-from celery_app import celery_app
+from celery_app import celery_app, QUEUES
 
 
 def print_header(title: str):
@@ -77,7 +77,7 @@ def check_active_tasks():
         else:
             print(f"   {YELLOW}⚠️  Aucun worker actif trouvé{NC}")
             print("   → Vérifier que le worker Celery est lancé:")
-            print("      docker-compose ps celery-worker")
+            print("      docker-compose ps | grep celery-worker")
             
     except Exception as e:
         print(f"   {RED}❌ Erreur: {e}{NC}")
@@ -181,25 +181,26 @@ def check_redis_queue():
         with Connection(celery_app.conf.broker_url) as conn:
             channel = conn.channel()
             
-            # Queue par défaut
-            queue_name = 'celery'
-            
-            try:
-                # Obtenir le nombre de messages dans la queue
-                queue = channel.queue_declare(queue=queue_name, passive=True)
-                message_count = queue.message_count
-                
-                print(f"   Queue: {queue_name}")
-                print(f"     └─ Messages en attente: {message_count}")
-                
-                if message_count > 0:
-                    print(f"\n   {YELLOW}⚠️  {message_count} message(s) en attente d'être traité(s){NC}")
-                    print("   → Vérifier que le worker Celery est actif")
-                else:
-                    print(f"\n   {GREEN}✅ Aucun message en attente{NC}")
+            # Queues déclarées dans celery_app (par ordre de priorité)
+            total = 0
+            for queue_name in QUEUES:
+                try:
+                    # Obtenir le nombre de messages dans la queue
+                    queue = channel.queue_declare(queue=queue_name, passive=True)
+                    message_count = queue.message_count
+                    total += message_count
                     
-            except Exception as e:
-                print(f"   {YELLOW}⚠️  Queue '{queue_name}' non trouvée ou vide{NC}")
+                    print(f"   Queue: {queue_name}")
+                    print(f"     └─ Messages en attente: {message_count}")
+                    
+                except Exception as e:
+                    print(f"   {YELLOW}⚠️  Queue '{queue_name}' non trouvée ou vide{NC}")
+            
+            if total > 0:
+                print(f"\n   {YELLOW}⚠️  {total} message(s) en attente d'être traité(s){NC}")
+                print("   → Vérifier que les workers Celery sont actifs")
+            else:
+                print(f"\n   {GREEN}✅ Aucun message en attente{NC}")
                 
     except Exception as e:
         print(f"   {RED}❌ Erreur de connexion Redis: {e}{NC}")
@@ -245,8 +246,8 @@ def get_task_recommendations():
         if not stats:
             recommendations.append(
                 f"{YELLOW}⚠️  Aucun worker Celery détecté{NC}\n"
-                "   → Lancer le worker: docker-compose up celery-worker\n"
-                "   → Vérifier les logs: docker-compose logs celery-worker"
+                "   → Lancer les workers: docker-compose up celery-worker-interactive celery-worker-bulk celery-worker-feedback celery-worker-housekeeping\n"
+                "   → Vérifier les logs: docker-compose logs celery-worker-interactive"
             )
         
         if stats and not active:
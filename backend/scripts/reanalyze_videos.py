@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Script de ré-analyse en masse des vidéos
+
+Les tâches partent sur la queue "bulk" : les uploads des joueurs (queue
+"interactive") restent traités en priorité pendant toute la ré-analyse.
+
+Une vidéo dont le résultat est déjà à jour (même cache_key) n'est pas
+recalculée : le résultat en cache est réutilisé. --force relance l'analyse
+quand même, par exemple après un changement de modèle ou de configuration
+que la cache_key ne couvre pas.
+
+Usage:
+    python scripts/reanalyze_videos.py --stale
+    python scripts/reanalyze_videos.py --references
+    python scripts/reanalyze_videos.py --all --dry-run
+    python scripts/reanalyze_videos.py --all --force
+"""
+import sys
+import argparse
+import logging
+from pathlib import Path
+
+# Colors
+GREEN = '\033[0;32m'
+RED = '\033[0;31m'
+YELLOW = '\033[1;33m'
+BLUE = '\033[0;34m'
+NC = '\033[0m'
+
+# Désactiver les logs verbeux pour une sortie propre
+logging.basicConfig(level=logging.ERROR)
+
+# Ajouter le répertoire parent au path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from celery_app import QUEUE_BULK
+from database import SessionLocal
+from models.video import Video
+from models.analysis import Analysis
+from services.analysis_service import analysis_service
+from tasks.video_analysis import start_video_analysis
+
+
+def select_videos(db, args):
+    """Vidéos non supprimées correspondant aux filtres"""
+    query = db.query(Video, Analysis).outerjoin(Analysis, Analysis.video_id == Video.id).filter(
+        Video.deleted_at.is_(None)
+    )
+    if args.references:
+        query = query.filter(Video.is_reference == True)
+    videos = query.order_by(Video.created_at).all()
+
+    if args.stale:
+        # Résultat absent ou calculé par une autre version du pipeline
+        videos = [
+            (video, analysis) for video, analysis in videos
+            if analysis is None or not video.content_hash
+            or analysis.cache_key != analysis_service.cache_key(video.content_hash)
+        ]
+    return [video for video, _ in videos]
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Ré-analyse en masse (queue bulk)")
+    scope = parser.add_mutually_exclusive_group(required=True)
+    scope.add_argument("--all", action="store_true", help="Toutes les vidéos (les résultats à jour sont réutilisés, voir --force)")
+    scope.add_argument("--stale", action="store_true", help="Vidéos sans résultat à jour")
+    scope.add_argument("--references", action="store_true", help="Vidéos de référence")
+    parser.add_argument("--force", action="store_true", help="Recalculer même les résultats à jour (ignore le cache)")
+    parser.add_argument("--dry-run", action="store_true", help="Lister sans mettre en file")
+    args = parser.parse_args()
+
+    print("\n" + "=" * 80)
+    print(f"{BLUE}🎾 CARLITOS COACH - Ré-analyse en masse{NC}")
+    print("=" * 80)
+
+    db = SessionLocal()
+    try:
+        videos = select_videos(db, args)
+        print(f"   📹 {len(videos)} vidéo(s) sélectionnée(s)\n")
+
+        queued = skipped = 0
+        for video in videos:
+            if args.dry_run:
+                print(f"     - {video.id} {video.filename}")
+                continue
+            try:
+                if start_video_analysis(str(video.id), queue=QUEUE_BULK, force=args.force):
+                    queued += 1
+                else:
+                    skipped += 1
+            except Exception as e:
+                print(f"   {RED}❌ {video.id}: {e}{NC}")
+    finally:
+        db.close()
+
+    if not args.dry_run:
+        print(f"   {GREEN}✅ {queued} tâche(s) en file sur '{QUEUE_BULK}'{NC}")
+        if skipped:
+            print(f"   {YELLOW}⚠️  {skipped} vidéo(s) déjà en cours d'analyse{NC}")
+
+    print("\n" + "=" * 80)
+    print(f"{GREEN}✅ Terminé!{NC}")
+    print("=" * 80 + "\n")
+
+
+if __name__ == "__main__":
+    main()
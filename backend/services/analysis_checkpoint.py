@@ -0,0 +1,87 @@
+"""
+Analysis Checkpoint Service
+Landmark chunks flushed to MinIO while an analysis runs, so retries resume
+"""
+import re
+import json
+import hashlib
+import logging
+from typing import Dict, Any, List, NamedTuple
+
+from config import settings
+from services.storage_service import storage_service
+from services.analysis_progress import analysis_progress
+from services.pose_sequence import PoseSequence
+from services.landmark_codec import encode_landmarks, decode_landmarks
+
+logger = logging.getLogger(__name__)
+
+# Chunk objects are named after the source frames they cover: [start, end)
+CHUNK_NAME = re.compile(r"(\d{10})-(\d{10})(-eof)?\.bin$")
+
+
+class Chunk(NamedTuple):
+    start: int
+    end: int
+    eof: bool  # The chunk ends at the real end of the file
+    path: str
+
+
+def flush_chunk(prefix: str, video_id: str, chunk: Dict[str, Any]):
+    """
+    Persist one chunk emitted by extract_segment and count it as progress
+
+    Module-level so a functools.partial of it can be shipped to pool processes.
+    """
+    name = f"{chunk['start']:010d}-{chunk['end']:010d}{'-eof' if chunk['eof'] else ''}.bin"
+    sequence = PoseSequence(chunk["frame_indices"], chunk["timestamps"], chunk["landmarks"])
+    storage_service.upload_bytes(prefix + name, encode_landmarks(sequence, settings.ANALYSIS_LANDMARK_DTYPE))
+    analysis_progress.advance(video_id, chunk["end"] - chunk["start"])
+
+
+def reset_after_fork():
+    """
+    Pool initializer: drop MinIO connections inherited from the parent
+
+    A kept-alive socket shared by several processes would interleave requests.
+    """
+    storage_service.reset_client()
+
+
+class AnalysisCheckpointService:
+    """Lists, loads and cleans up the chunks of a video's running analysis"""
+
+    @staticmethod
+    def prefix(video_id: str, tier: str, options: Dict[str, Any]) -> str:
+        # Chunks from a run with other extraction parameters are never mixed in
+        fingerprint = hashlib.sha1(json.dumps(options, sort_keys=True).encode()).hexdigest()[:12]
+        return f"analyses/{video_id}/chunks/{tier}-{fingerprint}/"
+
+    def list_chunks(self, prefix: str) -> List[Chunk]:
+        chunks = []
+        for path in storage_service.list_paths(prefix):
+            match = CHUNK_NAME.search(path)
+            if match:
+                chunks.append(Chunk(int(match.group(1)), int(match.group(2)), bool(match.group(3)), path))
+        return sorted(chunks)
+
+    def load_chunks(self, chunks: List[Chunk]) -> List[Dict[str, Any]]:
+        """Chunks as segment results, in frame order, ready for stitch_segments"""
+        segments = []
+        for chunk in sorted(chunks):
+            sequence = decode_landmarks(storage_service.get_bytes(chunk.path))
+            segments.append({
+                "frame_indices": sequence.frame_indices,
+                "timestamps": sequence.timestamps,
+                "landmarks": sequence.landmarks,
+                "end_position": chunk.end,
+            })
+        return segments
+
+    def clear(self, video_id: str, tier: str):
+        """Remove the checkpoints of a tier once its result is stored"""
+        storage_service.delete_prefix(f"analyses/{video_id}/chunks/{tier}-")
+
+
+# Create singleton instance
+analysis_checkpoint = AnalysisCheckpointService()
@@ -0,0 +1,99 @@
+"""
+Analysis Export
+Streaming encoders for exporting a whole analysis without materialising it
+"""
+import json
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from services.pose_sequence import PoseSequence
+from services.landmark_codec import encode_chunk
+
+# Media type -> export format, in server preference order
+EXPORT_MEDIA_TYPES = {
+    "application/json": "json",
+    "application/x-ndjson": "ndjson",
+    "application/octet-stream": "binary",
+}
+
+# Frames encoded per write to the response
+EXPORT_BATCH_FRAMES = 256
+
+
+def negotiate_export_format(accept: Optional[str]) -> Optional[str]:
+    """
+    Pick an export format from an Accept header
+
+    Honours q-values; on a tie the server order of EXPORT_MEDIA_TYPES wins.
+    A missing header or */* selects JSON. Returns None when nothing matches.
+    """
+    if not accept:
+        return "json"
+
+    preference = list(EXPORT_MEDIA_TYPES)
+    best = None
+    for item in accept.split(","):
+        media_type, *params = [part.strip() for part in item.split(";")]
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality <= 0:
+            continue
+
+        if media_type in ("*/*", "application/*"):
+            candidates = preference
+        elif media_type in EXPORT_MEDIA_TYPES:
+            candidates = [media_type]
+        else:
+            continue
+
+        for candidate in candidates:
+            key = (quality, -preference.index(candidate))
+            if best is None or key > best[0]:
+                best = (key, candidate)
+
+    return EXPORT_MEDIA_TYPES[best[1]] if best else None
+
+
+def _batches(frames: Iterable[Dict[str, Any]], size: int) -> Iterator[list]:
+    iterator = iter(frames)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def iter_ndjson(frames: Iterable[Dict[str, Any]], batch_size: int = EXPORT_BATCH_FRAMES) -> Iterator[bytes]:
+    """One JSON document per line, one frame per document"""
+    for batch in _batches(frames, batch_size):
+        yield "".join(json.dumps(frame) + "\n" for frame in batch).encode()
+
+
+def iter_json_array(frames: Iterable[Dict[str, Any]], batch_size: int = EXPORT_BATCH_FRAMES) -> Iterator[bytes]:
+    """A single JSON array of frames, written incrementally"""
+    separator = "["
+    for batch in _batches(frames, batch_size):
+        yield (separator + ",".join(json.dumps(frame) for frame in batch)).encode()
+        separator = ","
+    yield b"[]" if separator == "[" else b"]"
+
+
+def iter_binary(chunks: Iterable[PoseSequence], dtype: str = "float16") -> Iterator[bytes]:
+    """Length-prefixed landmark blobs, one per chunk"""
+    for chunk in chunks:
+        yield encode_chunk(chunk, dtype)
+
+
+def frames_to_sequences(
+    frames: Iterable[Dict[str, Any]],
+    batch_size: int = EXPORT_BATCH_FRAMES
+) -> Iterator[PoseSequence]:
+    """Group legacy per-frame JSON into PoseSequence chunks"""
+    for batch in _batches(frames, batch_size):
+        yield PoseSequence.from_frames(batch)
@@ -0,0 +1,96 @@
+"""
+Analysis Lock Service
+Collapses concurrent analysis requests for a video into one in-flight job
+"""
+import time
+import logging
+from typing import List
+
+import redis
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# video_id -> last heartbeat of the job stage running for it
+HEARTBEAT_KEY = "analysis:heartbeat"
+
+
+class AnalysisLockService:
+    """
+    Per-video Redis lock held from enqueue until the full pass ends
+
+    The TTL bounds how long a crashed worker can block new requests. When
+    Redis is unreachable the lock fails open: a duplicate job is cheaper than
+    no analysis at all.
+
+    A running stage also refreshes a heartbeat, which it removes when it
+    returns: a heartbeat that goes stale means the worker process died
+    mid-stage (OOM kill, recycling) without reaching its failure handling,
+    and the job can be reclaimed long before the TTL (see `lost`).
+    """
+
+    def __init__(self):
+        self._client = None
+
+    @property
+    def client(self) -> redis.Redis:
+        if self._client is None:
+            self._client = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+        return self._client
+
+    @staticmethod
+    def _key(video_id: str) -> str:
+        return f"analysis:lock:{video_id}"
+
+    def acquire(self, video_id: str) -> bool:
+        """Take the lock; False if a job for this video is already in flight"""
+        try:
+            return bool(self.client.set(
+                self._key(video_id), "1", nx=True, ex=settings.ANALYSIS_LOCK_TTL_SECONDS
+            ))
+        except redis.RedisError as e:
+            logger.warning(f"Could not lock analysis for {video_id}: {e}")
+            return True
+
+    def is_held(self, video_id: str) -> bool:
+        try:
+            return bool(self.client.exists(self._key(video_id)))
+        except redis.RedisError as e:
+            logger.warning(f"Could not read analysis lock for {video_id}: {e}")
+            return False
+
+    def release(self, video_id: str):
+        try:
+            pipe = self.client.pipeline()
+            pipe.delete(self._key(video_id))
+            pipe.zrem(HEARTBEAT_KEY, video_id)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Could not release analysis lock for {video_id}: {e}")
+
+    def heartbeat(self, video_id: str):
+        """A stage of the video's job is running"""
+        try:
+            self.client.zadd(HEARTBEAT_KEY, {video_id: time.time()})
+        except redis.RedisError as e:
+            logger.warning(f"Could not record analysis heartbeat for {video_id}: {e}")
+
+    def end_heartbeat(self, video_id: str):
+        """The running stage returned (the job may continue in a later stage)"""
+        try:
+            self.client.zrem(HEARTBEAT_KEY, video_id)
+        except redis.RedisError as e:
+            logger.warning(f"Could not clear analysis heartbeat for {video_id}: {e}")
+
+    def lost(self, timeout_seconds: float) -> List[str]:
+        """Videos whose running stage has not reported for `timeout_seconds`"""
+        try:
+            return self.client.zrangebyscore(HEARTBEAT_KEY, "-inf", time.time() - timeout_seconds)
+        except redis.RedisError as e:
+            logger.warning(f"Could not read analysis heartbeats: {e}")
+            return []
+
+
+# Create singleton instance
+analysis_lock = AnalysisLockService()
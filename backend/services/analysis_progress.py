@@ -0,0 +1,116 @@
+"""
+Analysis Progress Service
+Live frame counters for running analyses, kept in Redis
+"""
+import time
+import logging
+from typing import Dict, Any, Optional
+
+import redis
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Counters outlive a crashed worker long enough to be inspected, then expire
+PROGRESS_TTL_SECONDS = 24 * 3600
+
+
+def estimate_eta(
+    total_frames: int,
+    frames_processed: int,
+    resumed_frames: int,
+    started_at: float,
+    now: float
+) -> Optional[float]:
+    """
+    Seconds left at the rate observed since this run started
+
+    Frames restored from checkpoints (`resumed_frames`) are excluded from the
+    rate. Returns None until at least one frame has been processed.
+    """
+    done = frames_processed - resumed_frames
+    elapsed = now - started_at
+    if total_frames <= 0 or done <= 0 or elapsed <= 0:
+        return None
+    return max(0.0, (total_frames - frames_processed) * elapsed / done)
+
+
+class AnalysisProgressService:
+    """
+    Per-video progress counters shared by the task and its pool processes
+
+    Counting is in source frames (decoded or skipped), so the total is the
+    video frame count whatever the sampling mode. Redis errors are logged and
+    never fail an analysis.
+    """
+
+    def __init__(self):
+        # Created lazily: redis-py reconnects by itself after a fork
+        self._client = None
+
+    @property
+    def client(self) -> redis.Redis:
+        if self._client is None:
+            self._client = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+        return self._client
+
+    @staticmethod
+    def _key(video_id: str) -> str:
+        return f"analysis:progress:{video_id}"
+
+    def start(self, video_id: str, tier: str, total_frames: int, resumed_frames: int = 0):
+        """Reset the counters at the start of a run"""
+        key = self._key(video_id)
+        try:
+            pipe = self.client.pipeline()
+            pipe.delete(key)
+            pipe.hset(key, mapping={
+                "tier": tier,
+                "total_frames": total_frames,
+                "frames_processed": resumed_frames,
+                "resumed_frames": resumed_frames,
+                "started_at": time.time(),
+            })
+            pipe.expire(key, PROGRESS_TTL_SECONDS)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Could not reset analysis progress for {video_id}: {e}")
+
+    def advance(self, video_id: str, frames: int):
+        """Add processed source frames"""
+        try:
+            self.client.hincrby(self._key(video_id), "frames_processed", frames)
+        except redis.RedisError as e:
+            logger.warning(f"Could not update analysis progress for {video_id}: {e}")
+
+    def get(self, video_id: str) -> Optional[Dict[str, Any]]:
+        """Current progress with ETA, or None when no run is being tracked"""
+        try:
+            values = self.client.hgetall(self._key(video_id))
+        except redis.RedisError as e:
+            logger.warning(f"Could not read analysis progress for {video_id}: {e}")
+            return None
+        if not values:
+            return None
+
+        total = int(values["total_frames"])
+        processed = min(int(values["frames_processed"]), total) if total else int(values["frames_processed"])
+        return {
+            "tier": values["tier"],
+            "frames_processed": processed,
+            "total_frames": total,
+            "eta_seconds": estimate_eta(
+                total, processed, int(values["resumed_frames"]), float(values["started_at"]), time.time()
+            ),
+        }
+
+    def clear(self, video_id: str):
+        try:
+            self.client.delete(self._key(video_id))
+        except redis.RedisError as e:
+            logger.warning(f"Could not clear analysis progress for {video_id}: {e}")
+
+
+# Create singleton instance
+analysis_progress = AnalysisProgressService()
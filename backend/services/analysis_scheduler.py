@@ -0,0 +1,243 @@
+"""
+Analysis Scheduler Service
+Fair sharing of interactive analysis slots between users, kept in Redis
+"""
+import json
+import time
+import logging
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+import redis
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "analysis:sched:"
+RING_KEY = PREFIX + "users"  # Users with pending jobs, in round-robin order
+JOBS_KEY = PREFIX + "jobs"  # video_id -> job, from submit until finish
+RUNNING_KEY = PREFIX + "running"  # video_id -> dispatch time, all users
+JOB_SECONDS_KEY = PREFIX + "job_seconds"  # Moving average of slot hold time
+
+DEFAULT_JOB_SECONDS = 60.0  # Start-time estimate before any job has finished
+JOB_SECONDS_SMOOTHING = 0.2
+
+# Invariant: a user is in the ring exactly when their pending list is non-empty
+SUBMIT_SCRIPT = """
+redis.call('HSET', KEYS[3], ARGV[1], ARGV[2])
+if redis.call('RPUSH', KEYS[2], ARGV[1]) == 1 then
+    redis.call('RPUSH', KEYS[1], ARGV[3])
+end
+return 1
+"""
+
+# Next job to hand to Celery as {video_id, job}, or nil when every slot is
+# taken or every waiting user is at their cap. Slots held past the stale
+# time are dropped: a backstop, since the jobs of dead workers are normally
+# released within minutes through their stage heartbeat (see analysis_lock).
+DISPATCH_SCRIPT = """
+local ring, running, jobs = KEYS[1], KEYS[2], KEYS[3]
+local now, stale, slots, cap, prefix = ARGV[1], ARGV[2], tonumber(ARGV[3]), tonumber(ARGV[4]), ARGV[5]
+
+for _, vid in ipairs(redis.call('ZRANGEBYSCORE', running, '-inf', stale)) do
+    local job = redis.call('HGET', jobs, vid)
+    if job then
+        redis.call('ZREM', prefix .. 'running:' .. cjson.decode(job)['user_id'], vid)
+        redis.call('HDEL', jobs, vid)
+    end
+    redis.call('ZREM', running, vid)
+end
+if redis.call('ZCARD', running) >= slots then
+    return nil
+end
+
+for _ = 1, redis.call('LLEN', ring) do
+    local uid = redis.call('LPOP', ring)
+    local pending = prefix .. 'pending:' .. uid
+    local user_running = prefix .. 'running:' .. uid
+    if redis.call('LLEN', pending) > 0 then
+        if redis.call('ZCARD', user_running) < cap then
+            local vid = redis.call('LPOP', pending)
+            redis.call('ZADD', running, now, vid)
+            redis.call('ZADD', user_running, now, vid)
+            if redis.call('LLEN', pending) > 0 then
+                redis.call('RPUSH', ring, uid)
+            end
+            return {vid, redis.call('HGET', jobs, vid)}
+        end
+        redis.call('RPUSH', ring, uid)
+    end
+end
+return nil
+"""
+
+# Frees the slot of a job and folds its duration into the moving average
+FINISH_SCRIPT = """
+local running, jobs, average = KEYS[1], KEYS[2], KEYS[3]
+local vid, now, prefix, smoothing = ARGV[1], tonumber(ARGV[2]), ARGV[3], tonumber(ARGV[4])
+
+local started = redis.call('ZSCORE', running, vid)
+if not started then
+    return 0
+end
+local job = redis.call('HGET', jobs, vid)
+if job then
+    redis.call('ZREM', prefix .. 'running:' .. cjson.decode(job)['user_id'], vid)
+end
+redis.call('ZREM', running, vid)
+redis.call('HDEL', jobs, vid)
+
+local seconds = now - tonumber(started)
+local previous = tonumber(redis.call('GET', average) or seconds)
+redis.call('SET', average, tostring(previous + smoothing * (seconds - previous)))
+return 1
+"""
+
+
+def jobs_ahead(ring: List[str], pending: Dict[str, int], user_id: str, index: int) -> int:
+    """
+    Jobs dispatched before the `index`-th pending job of `user_id`
+
+    Round-robin hands out one job per user per round, in ring order: the job
+    goes out in round `index`, after one job of each user with enough pending
+    work, plus one more from the users ahead of this one in the ring.
+    """
+    me = ring.index(user_id)
+    ahead = index
+    for position, uid in enumerate(ring):
+        if uid != user_id:
+            ahead += min(pending.get(uid, 0), index + (1 if position < me else 0))
+    return ahead
+
+
+def estimate_start(ahead: int, own_ahead: int, running: int, slots: int, user_cap: int, job_seconds: float) -> float:
+    """
+    Seconds until a job with `ahead` jobs before it is handed to a worker
+
+    Slots free up at `slots / job_seconds` per second; a user's own earlier
+    jobs also have to clear their personal cap.
+    """
+    shared = max(0, ahead - max(0, slots - running) + 1) * job_seconds / max(1, slots)
+    own = own_ahead // max(1, user_cap) * job_seconds
+    return max(shared, float(own))
+
+
+class AnalysisSchedulerService:
+    """
+    Per-user queues of interactive analyses in front of Celery
+
+    Jobs wait in Redis, one list per user, and only `ANALYSIS_SCHEDULER_SLOTS`
+    of them are in Celery at any time, handed out round-robin across users
+    with at most `ANALYSIS_USER_MAX_RUNNING` per user. A burst of uploads
+    from one player then delays that player's later clips, not everyone
+    else's. A slot is held from dispatch until the task reports back through
+    `finish`, including the preview -> full chain.
+
+    Scheduling changes are Lua scripts, atomic across API and worker
+    processes. When Redis is unreachable `submit` fails and callers enqueue
+    directly: unfair ordering is better than no analysis at all.
+    """
+
+    def __init__(self):
+        self._client = None
+        self._scripts = {}
+
+    @property
+    def client(self) -> redis.Redis:
+        if self._client is None:
+            self._client = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+        return self._client
+
+    @property
+    def enabled(self) -> bool:
+        return settings.ANALYSIS_SCHEDULER_SLOTS > 0
+
+    def _script(self, source: str):
+        if source not in self._scripts:
+            self._scripts[source] = self.client.register_script(source)
+        return self._scripts[source]
+
+    @staticmethod
+    def _pending_key(user_id: str) -> str:
+        return f"{PREFIX}pending:{user_id}"
+
+    def submit(self, user_id: str, video_id: str, job: Dict[str, Any]) -> bool:
+        """Queue a job behind the user's earlier ones; False when Redis is unavailable"""
+        payload = json.dumps({**job, "user_id": user_id})
+        try:
+            self._script(SUBMIT_SCRIPT)(
+                keys=[RING_KEY, self._pending_key(user_id), JOBS_KEY],
+                args=[video_id, payload, user_id]
+            )
+            return True
+        except redis.RedisError as e:
+            logger.warning(f"Could not schedule analysis of {video_id}: {e}")
+            return False
+
+    def dispatch(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """(video_id, job) pairs to enqueue now, each holding a slot until `finish`"""
+        while True:
+            now = time.time()
+            try:
+                picked = self._script(DISPATCH_SCRIPT)(
+                    keys=[RING_KEY, RUNNING_KEY, JOBS_KEY],
+                    args=[
+                        now, now - settings.ANALYSIS_LOCK_TTL_SECONDS, settings.ANALYSIS_SCHEDULER_SLOTS,
+                        settings.ANALYSIS_USER_MAX_RUNNING, PREFIX
+                    ]
+                )
+            except redis.RedisError as e:
+                logger.warning(f"Could not dispatch scheduled analyses: {e}")
+                return
+            if not picked:
+                return
+            video_id, payload = picked
+            yield video_id, json.loads(payload)
+
+    def finish(self, video_id: str):
+        """Free the slot held by a video's job (no-op for jobs that bypassed the scheduler)"""
+        try:
+            self._script(FINISH_SCRIPT)(
+                keys=[RUNNING_KEY, JOBS_KEY, JOB_SECONDS_KEY],
+                args=[video_id, time.time(), PREFIX, JOB_SECONDS_SMOOTHING]
+            )
+        except redis.RedisError as e:
+            logger.warning(f"Could not release analysis slot of {video_id}: {e}")
+
+    def position(self, video_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Place of a waiting job and its estimated start
+
+        Returns None once the job has been handed to Celery (or was never
+        scheduled). The estimate assumes the current backlog and ignores
+        later arrivals from users served earlier in the rotation.
+        """
+        try:
+            index = self.client.lpos(self._pending_key(user_id), video_id)
+            if index is None:
+                return None
+            ring = self.client.lrange(RING_KEY, 0, -1)
+            pipe = self.client.pipeline()
+            for uid in ring:
+                pipe.llen(self._pending_key(uid))
+            pipe.zcard(RUNNING_KEY)
+            pipe.get(JOB_SECONDS_KEY)
+            *counts, running, job_seconds = pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Could not read queue position of {video_id}: {e}")
+            return None
+        if user_id not in ring:
+            return None
+
+        ahead = jobs_ahead(ring, dict(zip(ring, counts)), user_id, index)
+        return {
+            "position": ahead + 1,
+            "estimated_start_seconds": estimate_start(
+                ahead, index, running, settings.ANALYSIS_SCHEDULER_SLOTS, settings.ANALYSIS_USER_MAX_RUNNING,
+                float(job_seconds) if job_seconds else DEFAULT_JOB_SECONDS
+            ),
+        }
+
+
+# Create singleton instance
+analysis_scheduler = AnalysisSchedulerService()
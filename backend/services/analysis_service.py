@@ -2,142 +2,307 @@
 Analysis Service
 Handles video processing using MediaPipe Pose
 """
-import cv2
-import mediapipe as mp
-import numpy as np
 import tempfile
 import os
+import json
+import hashlib
 import logging
-from typing import List, Dict, Any
-import ssl
+from functools import partial
+import time
+from typing import Dict, Any, List, Optional, Tuple
 
-# WORKAROUND: Disable SSL verification for MediaPipe model download
-# This fixes "certificate verify failed: self-signed certificate in certificate chain"
-ssl._create_default_https_context = ssl._create_unverified_context
+import mediapipe as mp
 
+from config import settings
+from models.analysis import AnalysisTier
 from services.storage_service import storage_service
+from services.video_decoder import probe_video
+from services.pose_sequence import PoseSequence
+from services.smoothing import smooth_sequence
+from services.phase_segmentation import PHASES_VERSION
+from services.pose_embedding import EMBEDDING_VERSION
+from services.analysis_checkpoint import analysis_checkpoint, flush_chunk, reset_after_fork
+from services.analysis_progress import analysis_progress
+from services.pose_extractors import warm_extractor
+from services.memory_usage import peak_rss_kb
+from services.pose_extraction import (
+    plan_segments,
+    uncovered_ranges,
+    stitch_segments,
+    describe_extraction,
+    extract_segment_star,
+    SegmentPool,
+)
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever extraction output changes for identical options, so cached
+# results of the previous pipeline are no longer reused
+PIPELINE_VERSION = 2
+
+
+def _init_segment_process():
+    """Segment pool initializer: own MinIO connections (pose graphs are warmed by SegmentPool)"""
+    reset_after_fork()
+
+
+def _rss_mb(kb: Optional[int]) -> Optional[float]:
+    return round(kb / 1024, 1) if kb else None
+
+
 class AnalysisService:
+    # Pose extractors are cached per process and reset for every segment
+    # (see extract_segment), so the service itself holds no tracking state.
+
     def __init__(self):
-        self.mp_pose = mp.solutions.pose
-        # Initialize with default parameters
-        # We'll create a new instance per process_video call or use a context manager
-        # to ensure thread safety if needed, but for Celery it's usually one task per process.
+        # Analyses running side by side in this worker (Celery concurrency),
+        # set when the worker starts; they share the CPU cores
+        self.concurrency = 1
+        self._pool: Optional[SegmentPool] = None
+
+    @staticmethod
+    def _extraction_options(tier: AnalysisTier = AnalysisTier.FULL) -> Dict[str, Any]:
+        """Picklable extraction parameters shared by every segment"""
+        options = {
+            "sampling_mode": settings.ANALYSIS_SAMPLING_MODE,
+            "target_fps": settings.ANALYSIS_TARGET_FPS,
+            "stride": settings.ANALYSIS_FRAME_STRIDE,
+            "motion_factor": settings.ANALYSIS_ADAPTIVE_MOTION_FACTOR,
+            "max_dim": settings.ANALYSIS_INFERENCE_MAX_DIM,
+            "decoder": settings.ANALYSIS_DECODER,
+            "extractor": settings.ANALYSIS_EXTRACTOR,
+            "model_complexity": settings.ANALYSIS_MODEL_COMPLEXITY,
+        }
+        if tier == AnalysisTier.PREVIEW:
+            # Coarse skeleton: lite model, fewer and smaller frames
+            options.update({
+                "sampling_mode": "target_fps",
+                "target_fps": settings.ANALYSIS_PREVIEW_TARGET_FPS,
+                "max_dim": settings.ANALYSIS_PREVIEW_MAX_DIM,
+                "model_complexity": settings.ANALYSIS_PREVIEW_MODEL_COMPLEXITY,
+            })
+        return options
+
+    @staticmethod
+    def _smoothing_options() -> Dict[str, Any]:
+        """Post-processing parameters applied to the stitched sequence"""
+        return {
+            "method": settings.ANALYSIS_SMOOTHING_METHOD,
+            "max_gap_seconds": settings.ANALYSIS_GAP_FILL_SECONDS,
+            "savgol_window_seconds": settings.ANALYSIS_SAVGOL_WINDOW_SECONDS,
+            "savgol_polyorder": settings.ANALYSIS_SAVGOL_POLYORDER,
+            "one_euro_min_cutoff": settings.ANALYSIS_ONE_EURO_MIN_CUTOFF,
+            "one_euro_beta": settings.ANALYSIS_ONE_EURO_BETA,
+        }
+
+    def cache_key(self, content_hash: str, tier: AnalysisTier = AnalysisTier.FULL) -> str:
+        """Key under which a result for these video bytes and this pipeline is reusable"""
+        payload = json.dumps({
+            "content": content_hash,
+            "pipeline": PIPELINE_VERSION,
+            "mediapipe": mp.__version__,
+            "options": self._extraction_options(tier),
+            "smoothing": self._smoothing_options(),
+            "phases": PHASES_VERSION,
+            "embedding": EMBEDDING_VERSION,
+            "landmark_dtype": settings.ANALYSIS_LANDMARK_DTYPE,
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    @staticmethod
+    def _enabled_tiers() -> List[AnalysisTier]:
+        tiers = [AnalysisTier.FULL]
+        if settings.ANALYSIS_PREVIEW_ENABLED:
+            tiers.insert(0, AnalysisTier.PREVIEW)
+        return tiers
 
-    def process_video(self, storage_path: str) -> List[Dict[str, Any]]:
+    def warm_up(self):
         """
-        Process video and extract pose landmarks
-        
+        Build the pose graphs of every enabled tier in this process
+
+        Called once per worker process at start-up, so the first video does
+        not pay for model loading and graph initialisation. The segment pool
+        is started as well and warms the same graphs in its own processes.
+        """
+        for tier in self._enabled_tiers():
+            started = time.perf_counter()
+            try:
+                warm_extractor(self._extraction_options(tier))
+                logger.info(f"Pose extractor for {tier.value} ready in {time.perf_counter() - started:.2f}s")
+            except Exception as e:
+                # Not fatal: the extractor is built on first use instead
+                logger.warning(f"Could not warm up the {tier.value} pose extractor: {e}")
+        if self._worker_count() > 1:
+            self._segment_pool()
+
+    def _worker_count(self) -> int:
+        """Segment processes per video: set explicitly, or this task's share of the CPU cores"""
+        workers = settings.ANALYSIS_PARALLEL_WORKERS
+        if workers > 0:
+            return workers
+        return max(1, (os.cpu_count() or 1) // max(1, self.concurrency))
+
+    def _segment_pool(self) -> SegmentPool:
+        """
+        This process's pool of segment processes, created on first use and kept
+
+        Reused across videos so they are neither forked again nor load their
+        pose graphs cold for every one (see SegmentPool).
+        """
+        if self._pool is None or not self._pool.usable:
+            warm_options = (
+                [self._extraction_options(tier) for tier in self._enabled_tiers()]
+                if settings.ANALYSIS_WARM_WORKERS else []
+            )
+            self._pool = SegmentPool(
+                self._worker_count(),
+                warm_options,
+                initializer=_init_segment_process,
+                maxtasksperchild=settings.CELERY_MAX_TASKS_PER_CHILD or None
+            )
+        return self._pool
+
+    def close_pool(self):
+        """Stop the segment processes (a new pool is created on next use)"""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+
+    def process_video(
+        self,
+        storage_path: str,
+        tier: AnalysisTier = AnalysisTier.FULL,
+        video_id: Optional[str] = None
+    ) -> Tuple[PoseSequence, Dict[str, Any]]:
+        """
+        Process video and extract pose landmarks: extract_landmarks, then smooth
+
+        Returns:
+            Tuple of (smoothed landmark sequence, processing info)
+        """
+        sequence, processing_info = self.extract_landmarks(storage_path, tier, video_id)
+        sequence, processing_info = self.smooth(sequence, processing_info)
+        return sequence, processing_info
+
+    def smooth(self, sequence: PoseSequence, processing_info: Dict[str, Any]) -> Tuple[PoseSequence, Dict[str, Any]]:
+        """Gap filling and smoothing, run once over the whole stitched clip"""
+        sequence, smoothing = smooth_sequence(sequence, **self._smoothing_options())
+        return sequence, {**processing_info, "smoothing": smoothing}
+
+    def extract_landmarks(
+        self,
+        storage_path: str,
+        tier: AnalysisTier = AnalysisTier.FULL,
+        video_id: Optional[str] = None
+    ) -> Tuple[PoseSequence, Dict[str, Any]]:
+        """
+        Extract raw (unsmoothed) pose landmarks of a video
+
+        Long videos are split into overlapping segments processed in parallel
+        (see plan_segments); short ones run in-process.
+
+        With a video_id, landmarks are flushed to MinIO in chunks as they are
+        produced and progress is reported (see analysis_checkpoint). Frames
+        already covered by chunks of an earlier attempt are not processed again.
+
         Args:
             storage_path: Path to video in MinIO
-            
+            tier: PREVIEW for the fast coarse pass, FULL for the final pass
+            video_id: Enables checkpointing and progress reporting
+
         Returns:
-            List of frame data with landmarks
+            Tuple of (stitched landmark sequence, processing info)
+            Each frame keeps its source frame index and timestamp, so sampled
+            output still lines up with the original video.
         """
         tmp_path = None
         try:
             # Download video to temp file
             with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as tmp_file:
                 tmp_path = tmp_file.name
-            
+
             logger.info(f"Downloading video from {storage_path} to {tmp_path}")
             storage_service.client.fget_object(
                 storage_service.bucket_name,
                 storage_path,
                 tmp_path
             )
-            
+
             # Process video
-            cap = cv2.VideoCapture(tmp_path)
-            frames_data = []
-            frame_count = 0
-            
-            # Initialize Pose for this video
-            with self.mp_pose.Pose(
-                static_image_mode=False,
-                model_complexity=2,
-                enable_segmentation=False,
-                min_detection_confidence=0.5
-            ) as pose:
-                
-                while cap.isOpened():
-                    success, image = cap.read()
-                    if not success:
-                        break
-                    
-                    # Convert BGR to RGB
-                    image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-                    results = pose.process(image_rgb)
-                    
-                    frame_data = {
-                        "frame": frame_count,
-                        "timestamp": cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0,
-                        "landmarks": []
-                    }
-                    
-                    if results.pose_landmarks:
-                        landmarks = results.pose_landmarks.landmark
-                        
-                        # Extract key landmarks
-                        # Map: 11=left_shoulder, 12=right_shoulder, 13=left_elbow, 14=right_elbow
-                        # 15=left_wrist, 16=right_wrist, 23=left_hip, 24=right_hip
-                        # 25=left_knee, 26=right_knee, 27=left_ankle, 28=right_ankle
-                        
-                        def get_lm(idx):
-                            lm = landmarks[idx]
-                            return {"x": lm.x, "y": lm.y, "z": lm.z, "visibility": lm.visibility}
-
-                        def calculate_angle(a, b, c):
-                            """Calculate angle between three points (a-b-c) in 2D space"""
-                            a = np.array([a.x, a.y])
-                            b = np.array([b.x, b.y])
-                            c = np.array([c.x, c.y])
-                            
-                            ba = a - b
-                            bc = c - b
-                            
-                            cosine_angle = np.dot(ba, bc) / (np.linalg.norm(ba) * np.linalg.norm(bc))
-                            angle = np.arccos(cosine_angle)
-                            return np.degrees(angle)
-
-                        # Calculate angles if visibility is good enough
-                        metrics = {}
-                        
-                        # Right Knee Flexion (Hip-Knee-Ankle)
-                        if landmarks[24].visibility > 0.5 and landmarks[26].visibility > 0.5 and landmarks[28].visibility > 0.5:
-                            metrics["right_knee_angle"] = calculate_angle(landmarks[24], landmarks[26], landmarks[28])
-                            
-                        # Left Knee Flexion
-                        if landmarks[23].visibility > 0.5 and landmarks[25].visibility > 0.5 and landmarks[27].visibility > 0.5:
-                            metrics["left_knee_angle"] = calculate_angle(landmarks[23], landmarks[25], landmarks[27])
-
-                        # Right Elbow Flexion (Shoulder-Elbow-Wrist)
-                        if landmarks[12].visibility > 0.5 and landmarks[14].visibility > 0.5 and landmarks[16].visibility > 0.5:
-                            metrics["right_elbow_angle"] = calculate_angle(landmarks[12], landmarks[14], landmarks[16])
-
-                        # Left Elbow Flexion
-                        if landmarks[11].visibility > 0.5 and landmarks[13].visibility > 0.5 and landmarks[15].visibility > 0.5:
-                            metrics["left_elbow_angle"] = calculate_angle(landmarks[11], landmarks[13], landmarks[15])
-
-                        for landmark in landmarks:
-                            frame_data["landmarks"].append({
-                                "x": landmark.x,
-                                "y": landmark.y,
-                                "z": landmark.z,
-                                "visibility": landmark.visibility
-                            })
-                        
-                        frame_data["metrics"] = metrics
-                    
-                    frames_data.append(frame_data)
-                    frame_count += 1
-            
-            cap.release()
-            logger.info(f"Processed {frame_count} frames")
-            return frames_data
-            
+            options = self._extraction_options(tier)
+            fps, frame_count = probe_video(tmp_path)
+            checkpoint_frames = settings.ANALYSIS_CHECKPOINT_FRAMES if video_id else 0
+
+            flush = None
+            ranges = [(0, None)]
+            resumed_frames = 0
+            if checkpoint_frames:
+                prefix = analysis_checkpoint.prefix(video_id, tier.value, options)
+                flush = partial(flush_chunk, prefix, video_id)
+                done = analysis_checkpoint.list_chunks(prefix)
+                ranges = uncovered_ranges([(c.start, c.end) for c in done], any(c.eof for c in done))
+                resumed_frames = sum(c.end - c.start for c in done)
+                if done:
+                    logger.info(f"Resuming from {len(done)} chunk(s) covering {resumed_frames} frames")
+                analysis_progress.start(video_id, tier.value, frame_count, resumed_frames)
+
+            workers = self._worker_count()
+            segments = [
+                segment
+                for start, end in ranges
+                for segment in plan_segments(
+                    frame_count,
+                    fps,
+                    workers,
+                    settings.ANALYSIS_SEGMENT_MIN_SECONDS,
+                    settings.ANALYSIS_SEGMENT_OVERLAP_SECONDS,
+                    start,
+                    end
+                )
+            ]
+
+            jobs = [
+                (tmp_path, options, start, end, warmup, flush, checkpoint_frames, settings.ANALYSIS_DECODE_QUEUE_FRAMES)
+                for start, end, warmup in segments
+            ]
+            if len(jobs) == 1:
+                results = [extract_segment_star(jobs[0])]
+            elif jobs:
+                logger.info(f"Extracting {len(jobs)} segments in parallel")
+                results = self._segment_pool().map(jobs)
+            else:
+                results = []
+            segment_peak_kb = max((r["peak_rss_kb"] or 0 for r in results), default=0) if len(jobs) > 1 else None
+
+            if checkpoint_frames:
+                results = analysis_checkpoint.load_chunks(analysis_checkpoint.list_chunks(prefix))
+
+            sequence = stitch_segments(results)
+            source_frame_count = max((r["end_position"] for r in results), default=0)
+            described = describe_extraction(tmp_path, options)
+            logger.info(
+                f"Processed {len(sequence)} of {source_frame_count} frames "
+                f"in {len(segments)} segment(s) "
+                f"(sampling: {options['sampling_mode']}, stride {described['sampling']['stride']})"
+            )
+
+            processing_info = {
+                "tier": tier.value,
+                "extractor": options["extractor"],
+                "model_complexity": options["model_complexity"],
+                "sampling": described["sampling"],
+                **described["decode"],
+                "decode_queue": settings.ANALYSIS_DECODE_QUEUE_FRAMES,
+                "segments": len(segments),
+                "resumed_frames": resumed_frames,
+                "source_frame_count": source_frame_count,
+                "analyzed_frame_count": len(sequence),
+                # Peak resident memory of this process, and of the largest segment process
+                "peak_rss_mb": _rss_mb(peak_rss_kb()),
+                "segment_peak_rss_mb": _rss_mb(segment_peak_kb),
+            }
+            return sequence, processing_info
+
         except Exception as e:
             logger.error(f"Error processing video: {e}")
             raise
@@ -146,5 +311,29 @@ class AnalysisService:
             if tmp_path and os.path.exists(tmp_path):
                 os.remove(tmp_path)
 
+    def cut_stroke_clips(self, storage_path: str, video_id: str, strokes: List[Dict[str, Any]]) -> List[Optional[str]]:
+        """
+        Cut and upload one stream-copied clip per stroke
+
+        Returns:
+            MinIO path of each clip, None where cutting failed
+        """
+        clip_paths: List[Optional[str]] = []
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            source = os.path.join(tmp_dir, "source.mp4")
+            storage_service.client.fget_object(storage_service.bucket_name, storage_path, source)
+
+            for stroke in strokes:
+                local = os.path.join(tmp_dir, f"stroke-{stroke['index']:03d}.mp4")
+                duration = stroke["end_time"] - stroke["start_time"]
+                if not storage_service.cut_clip(source, local, stroke["start_time"], duration):
+                    clip_paths.append(None)
+                    continue
+                with open(local, "rb") as clip:
+                    clip_paths.append(storage_service.upload_bytes(
+                        f"analyses/{video_id}/strokes/{stroke['index']:03d}.mp4", clip.read(), "video/mp4"
+                    ))
+        return clip_paths
+
 # Create singleton instance
 analysis_service = AnalysisService()
@@ -0,0 +1,117 @@
+"""
+Biomechanics Service
+Vectorized joint-angle computation over whole landmark sequences
+"""
+import numpy as np
+from typing import List, Dict, Any, Optional, Sequence
+
+# MediaPipe Pose produces 33 landmarks, each stored as (x, y, z, visibility)
+NUM_LANDMARKS = 33
+LANDMARK_FIELDS = ("x", "y", "z", "visibility")
+VISIBILITY_THRESHOLD = 0.5
+
+# Joint angles measured at the middle landmark of each (a, b, c) triplet
+# Map: 11=left_shoulder, 12=right_shoulder, 13=left_elbow, 14=right_elbow
+# 15=left_wrist, 16=right_wrist, 23=left_hip, 24=right_hip
+# 25=left_knee, 26=right_knee, 27=left_ankle, 28=right_ankle
+JOINT_ANGLES = {
+    "right_knee_angle": (24, 26, 28),   # Hip-Knee-Ankle
+    "left_knee_angle": (23, 25, 27),
+    "right_elbow_angle": (12, 14, 16),  # Shoulder-Elbow-Wrist
+    "left_elbow_angle": (11, 13, 15),
+}
+
+
+def empty_landmarks(num_frames: int = 0) -> np.ndarray:
+    """Allocate a (frames, 33, 4) float32 array filled with NaN (no detection)"""
+    return np.full((num_frames, NUM_LANDMARKS, len(LANDMARK_FIELDS)), np.nan, dtype=np.float32)
+
+
+def detected_mask(landmarks: np.ndarray) -> np.ndarray:
+    """Boolean (frames,) mask of frames where a pose was detected"""
+    return ~np.isnan(landmarks[:, :, 0]).all(axis=1)
+
+
+def compute_joint_angles(landmarks: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Compute every joint angle for a whole clip in one pass
+
+    Angles are measured in 2D (x, y) like the coach overlay. A joint is only
+    reported when all three of its landmarks have visibility above
+    VISIBILITY_THRESHOLD; otherwise the value is NaN.
+
+    Args:
+        landmarks: (frames, 33, 4) array of x, y, z, visibility (NaN = no pose)
+
+    Returns:
+        Dict of metric name -> (frames,) float64 array of angles in degrees
+    """
+    triplets = np.array(list(JOINT_ANGLES.values()), dtype=np.intp)  # (J, 3)
+    points = landmarks[:, triplets, :].astype(np.float64)  # (F, J, 3, 4)
+
+    a = points[:, :, 0, :2]
+    b = points[:, :, 1, :2]
+    c = points[:, :, 2, :2]
+    ba = a - b
+    bc = c - b
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cosine = np.einsum("fjk,fjk->fj", ba, bc) / (
+            np.linalg.norm(ba, axis=-1) * np.linalg.norm(bc, axis=-1)
+        )
+        angles = np.degrees(np.arccos(np.clip(cosine, -1.0, 1.0)))
+
+        # NaN visibility (missing frame) compares False, so it is masked too
+        visible = (points[:, :, :, 3] > VISIBILITY_THRESHOLD).all(axis=-1)
+
+    angles = np.where(visible, angles, np.nan)
+    return {name: angles[:, j] for j, name in enumerate(JOINT_ANGLES)}
+
+
+def build_frame_records(
+    frame_indices: np.ndarray,
+    timestamps: np.ndarray,
+    landmarks: np.ndarray,
+    landmark_indices: Optional[Sequence[int]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Convert landmark arrays into the per-frame JSON structure stored in Analysis.data
+
+    Frames without a detected pose keep an empty `landmarks` list and no `metrics`.
+    With `landmark_indices`, only those landmarks are emitted (in that order);
+    metrics are still computed from the full skeleton.
+    """
+    angles = compute_joint_angles(landmarks)
+    detected = detected_mask(landmarks).tolist()
+
+    if landmark_indices is not None:
+        landmarks = landmarks[:, list(landmark_indices), :]
+
+    # Bulk conversion to Python floats is much cheaper than per-element access
+    landmark_rows = landmarks.tolist()
+    angle_rows = {name: values.tolist() for name, values in angles.items()}
+    frame_list = np.asarray(frame_indices).tolist()
+    time_list = np.asarray(timestamps, dtype=np.float64).tolist()
+
+    frames_data = []
+    for i, frame_idx in enumerate(frame_list):
+        frame_data = {
+            "frame": frame_idx,
+            "timestamp": time_list[i],
+            "landmarks": []
+        }
+
+        if detected[i]:
+            frame_data["landmarks"] = [
+                {"x": x, "y": y, "z": z, "visibility": v}
+                for x, y, z, v in landmark_rows[i]
+            ]
+            frame_data["metrics"] = {
+                name: values[i]
+                for name, values in angle_rows.items()
+                if values[i] == values[i]  # skip NaN
+            }
+
+        frames_data.append(frame_data)
+
+    return frames_data
@@ -0,0 +1,113 @@
+"""
+Feedback Service
+Assembles the LLM input of a video analysis and stores the generated feedback
+"""
+import logging
+from typing import Dict, Any, List, Tuple
+
+from sqlalchemy.orm import Session
+
+from models.video import Video
+from models.analysis import Analysis
+from models.analysis_metric import AnalysisMetric
+from models.drill import Drill
+from services.landmark_store import landmark_store
+from services.llm_service import llm_service
+from services.metric_summary import WHOLE_CLIP
+
+logger = logging.getLogger(__name__)
+
+
+def phase_summary_for_feedback(phases: dict) -> dict:
+    """Compact per-phase view of Analysis.phases for the LLM prompt"""
+    return {
+        "dominant_side": phases.get("dominant_side"),
+        "phases": [
+            {
+                "name": phase["name"],
+                "duration_s": round(phase["duration"], 3),
+                "peak_wrist_speed": round(phase["peak_wrist_speed"], 3),
+                "metrics": {
+                    name: {key: round(value, 1) for key, value in stats.items()}
+                    for name, stats in phase["metrics"].items()
+                },
+            }
+            for phase in phases.get("phases", [])
+        ],
+    }
+
+
+def extract_summary_metrics(data: list) -> dict:
+    """Helper to extract summary metrics from frame data"""
+    if not data:
+        return {}
+
+    # Simple aggregation: Average of non-null metrics
+    # This is a placeholder. Real implementation needs phase detection.
+    summary = {}
+    count = 0
+
+    for frame in data:
+        if frame.get("metrics"):
+            for key, value in frame["metrics"].items():
+                if value is not None:
+                    summary[key] = summary.get(key, 0) + value
+            count += 1
+
+    if count > 0:
+        for key in summary:
+            summary[key] /= count
+
+    return summary
+
+
+class FeedbackService:
+    """Builds the prompt input from stored summaries, never from frame data when avoidable"""
+
+    def feedback_input(self, db: Session, video: Video, analysis: Analysis) -> Tuple[Dict[str, Any], List[Dict[str, str]]]:
+        """
+        Analysis summary and available drills sent to the LLM
+
+        Returns:
+            Tuple of (analysis data, drills)
+        """
+        analysis_data = {
+            "stroke_type": video.extra_metadata.get("stroke_type", "Unknown") if video.extra_metadata else "Unknown",
+        }
+        # Precomputed at analysis time: no frame data is read here
+        summary = db.query(AnalysisMetric.metric, AnalysisMetric.mean).filter(
+            AnalysisMetric.video_id == video.id,
+            AnalysisMetric.phase == WHOLE_CLIP
+        ).all()
+        if summary:
+            analysis_data["metrics"] = {metric: mean for metric, mean in summary}
+        else:
+            # Analyses stored before the summary table existed
+            analysis_data["metrics"] = extract_summary_metrics(landmark_store.load_frames(analysis))
+        if analysis.phases:
+            analysis_data["phases"] = phase_summary_for_feedback(analysis.phases)
+
+        drills = db.query(Drill).filter(Drill.deleted_at.is_(None)).all()
+        available_drills = [
+            {"id": str(d.id), "title": d.title, "focus_area": d.focus_area}
+            for d in drills
+        ]
+        return analysis_data, available_drills
+
+    def generate(self, db: Session, video: Video, analysis: Analysis) -> Dict[str, Any]:
+        """
+        Request feedback and store it on the analysis
+
+        Raises on LLM errors (see llm_service.request_feedback), leaving the
+        stored feedback untouched.
+        """
+        analysis_data, available_drills = self.feedback_input(db, video, analysis)
+        feedback = llm_service.request_feedback(analysis_data, available_drills)
+        analysis.ai_feedback = feedback
+        db.commit()
+        logger.info(f"Feedback stored for video {video.id}")
+        return feedback
+
+
+# Create singleton instance
+feedback_service = FeedbackService()
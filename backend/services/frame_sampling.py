@@ -0,0 +1,134 @@
+"""
+Frame Sampling
+Decides which decoded frames are sent to pose inference
+"""
+import cv2
+import numpy as np
+from typing import List, Optional, Tuple
+
+SAMPLING_MODES = ("all", "target_fps", "stride", "adaptive")
+
+# Motion energy is measured on tiny grayscale thumbnails to stay cheap
+MOTION_THUMBNAIL_SIZE = (64, 64)
+# Motion energy floor (mean gray-level difference) so sensor noise on a still
+# shot never counts as a spike
+MIN_MOTION_ENERGY = 1.0
+# Seconds of full-density sampling kept after a motion peak
+ADAPTIVE_HOLD_SECONDS = 0.25
+
+
+class FrameSampler:
+    """
+    Frame selection policy for pose extraction
+
+    Modes:
+        all:        analyse every decoded frame
+        target_fps: analyse frames at roughly `target_fps` (240 fps clip -> 60 fps)
+        stride:     analyse one frame out of `stride`
+        adaptive:   sample at `target_fps`, but switch to full density while the
+                    frame-to-frame motion energy spikes (swing, contact)
+
+    In adaptive mode the frames skipped since the last grid point are held
+    until the next one. When a spike is detected they are handed back through
+    `take_lookbehind`, so the run-up to the peak is sampled densely as well:
+    at most `stride - 1` frames, i.e. one sampling interval before the spike.
+    """
+
+    def __init__(
+        self,
+        mode: str = "all",
+        source_fps: float = 0.0,
+        target_fps: float = 60.0,
+        stride: int = 1,
+        motion_factor: float = 2.0
+    ):
+        if mode not in SAMPLING_MODES:
+            raise ValueError(f"Unknown sampling mode '{mode}'. Allowed: {', '.join(SAMPLING_MODES)}")
+
+        self.mode = mode
+        self.target_fps = target_fps
+        self.requested_stride = stride
+        self.motion_factor = motion_factor
+        self.configure(source_fps)
+
+    def configure(self, source_fps: float):
+        """(Re)compute the sampling stride for a source frame rate and reset motion state"""
+        self.source_fps = source_fps or 0.0
+
+        if self.mode == "stride":
+            self.stride = max(1, int(self.requested_stride))
+        elif self.mode in ("target_fps", "adaptive") and self.source_fps > 0 and self.target_fps > 0:
+            self.stride = max(1, int(round(self.source_fps / self.target_fps)))
+        else:
+            self.stride = 1
+
+        # Adaptive state
+        self._previous_thumb: Optional[np.ndarray] = None
+        self._motion_average: Optional[float] = None
+        self._hold_frames = max(1, int(round(self.source_fps * ADAPTIVE_HOLD_SECONDS)))
+        self._dense_until = -1
+        self._skipped: List[Tuple[int, Optional[float], np.ndarray]] = []
+        self._lookbehind: List[Tuple[int, Optional[float], np.ndarray]] = []
+
+    @property
+    def needs_pixels(self) -> bool:
+        """Whether should_process() inspects frame pixels (otherwise frames can be skipped with grab())"""
+        return self.mode == "adaptive" and self.stride > 1
+
+    def should_process(self, frame_index: int, image: Optional[np.ndarray] = None, timestamp: Optional[float] = None) -> bool:
+        """
+        Return True when the frame at `frame_index` must go through pose inference
+
+        In adaptive mode, pass the frame's `timestamp` and call `take_lookbehind`
+        after every True: skipped frames held since the last grid point come
+        back from it when this frame is a motion spike.
+        """
+        if self.stride == 1:
+            return True
+
+        on_grid = frame_index % self.stride == 0
+        if not self.needs_pixels or image is None:
+            return on_grid
+
+        spike = False
+        motion = self._motion_energy(image)
+        if motion is not None:
+            average = self._motion_average
+            if average is not None and motion > self.motion_factor * max(average, MIN_MOTION_ENERGY):
+                spike = True
+                self._dense_until = frame_index + self._hold_frames
+            # Slow exponential average so a long swing does not raise its own baseline too fast
+            self._motion_average = motion if average is None else 0.95 * average + 0.05 * motion
+
+        if not (on_grid or frame_index <= self._dense_until):
+            self._skipped.append((frame_index, timestamp, image))
+            return False
+        if spike:
+            self._lookbehind = self._skipped
+        self._skipped = []
+        return True
+
+    def take_lookbehind(self) -> List[Tuple[int, Optional[float], np.ndarray]]:
+        """(frame_index, timestamp, image) of skipped frames preceding the last spike, oldest first"""
+        frames, self._lookbehind = self._lookbehind, []
+        return frames
+
+    def _motion_energy(self, image: np.ndarray) -> Optional[float]:
+        """Mean absolute difference between consecutive downscaled grayscale frames"""
+        # Channel order (BGR from OpenCV, RGB from ffmpeg) is irrelevant for a difference signal
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        thumb = cv2.resize(gray, MOTION_THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
+        previous = self._previous_thumb
+        self._previous_thumb = thumb
+        if previous is None:
+            return None
+        return float(cv2.absdiff(thumb, previous).mean())
+
+    def describe(self) -> dict:
+        """Sampling parameters recorded alongside the analysis"""
+        return {
+            "mode": self.mode,
+            "source_fps": self.source_fps,
+            "target_fps": self.target_fps if self.mode in ("target_fps", "adaptive") else None,
+            "stride": self.stride,
+        }
@@ -0,0 +1,146 @@
+"""
+Landmark Codec
+Compact columnar binary format for pose landmark sequences
+
+Layout (little endian):
+    header       16 bytes   magic "CLMK", version, dtype code, flags,
+                            frame count, landmark count, field count
+    frame index  int32   x frames
+    timestamp    float64 x frames
+    landmarks    dtype   x frames x landmarks x fields   (frame-major)
+
+Every section has a fixed size derived from the header, so any frame range
+can be fetched with a single byte-range read (see frame_range_span).
+
+For streaming, a sequence is sent as consecutive chunks, each one a complete
+blob prefixed with its byte length as a little-endian uint32 (see encode_chunk).
+"""
+import struct
+from typing import Iterator, NamedTuple, Tuple
+
+import numpy as np
+
+from services.pose_sequence import PoseSequence
+
+MAGIC = b"CLMK"
+VERSION = 1
+HEADER_STRUCT = struct.Struct("<4sHBBIHH")
+HEADER_SIZE = HEADER_STRUCT.size
+CHUNK_PREFIX = struct.Struct("<I")
+
+DTYPE_CODES = {1: np.dtype("<f2"), 2: np.dtype("<f4")}
+DTYPE_NAMES = {"float16": 1, "float32": 2}
+
+INDEX_DTYPE = np.dtype("<i4")
+TIMESTAMP_DTYPE = np.dtype("<f8")
+
+
+class LandmarkHeader(NamedTuple):
+    version: int
+    dtype: np.dtype
+    frame_count: int
+    landmark_count: int
+    field_count: int
+
+    @property
+    def frame_size(self) -> int:
+        """Bytes per frame in the landmark section"""
+        return self.landmark_count * self.field_count * self.dtype.itemsize
+
+    @property
+    def timestamps_offset(self) -> int:
+        return HEADER_SIZE + self.frame_count * INDEX_DTYPE.itemsize
+
+    @property
+    def landmarks_offset(self) -> int:
+        return self.timestamps_offset + self.frame_count * TIMESTAMP_DTYPE.itemsize
+
+    @property
+    def total_size(self) -> int:
+        return self.landmarks_offset + self.frame_count * self.frame_size
+
+
+def encode_landmarks(sequence: PoseSequence, dtype: str = "float16") -> bytes:
+    """Serialise a PoseSequence (NaN landmarks mark frames without a pose)"""
+    if dtype not in DTYPE_NAMES:
+        raise ValueError(f"Unsupported landmark dtype '{dtype}'. Allowed: {', '.join(DTYPE_NAMES)}")
+
+    code = DTYPE_NAMES[dtype]
+    frames, landmark_count, field_count = sequence.landmarks.shape
+    header = HEADER_STRUCT.pack(MAGIC, VERSION, code, 0, frames, landmark_count, field_count)
+
+    return b"".join((
+        header,
+        np.ascontiguousarray(sequence.frame_indices, dtype=INDEX_DTYPE).tobytes(),
+        np.ascontiguousarray(sequence.timestamps, dtype=TIMESTAMP_DTYPE).tobytes(),
+        np.ascontiguousarray(sequence.landmarks, dtype=DTYPE_CODES[code]).tobytes(),
+    ))
+
+
+def parse_header(data: bytes) -> LandmarkHeader:
+    """Parse the fixed-size header at the start of a blob"""
+    if len(data) < HEADER_SIZE:
+        raise ValueError("Landmark blob is truncated")
+
+    magic, version, code, _flags, frames, landmark_count, field_count = HEADER_STRUCT.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a landmark blob")
+    if version != VERSION:
+        raise ValueError(f"Unsupported landmark blob version {version}")
+    if code not in DTYPE_CODES:
+        raise ValueError(f"Unknown landmark dtype code {code}")
+
+    return LandmarkHeader(version, DTYPE_CODES[code], frames, landmark_count, field_count)
+
+
+def decode_index(header: LandmarkHeader, data: bytes) -> Tuple[np.ndarray, np.ndarray]:
+    """Decode frame indices and timestamps from the first header.landmarks_offset bytes"""
+    frames = header.frame_count
+    frame_indices = np.frombuffer(data, dtype=INDEX_DTYPE, count=frames, offset=HEADER_SIZE)
+    timestamps = np.frombuffer(data, dtype=TIMESTAMP_DTYPE, count=frames, offset=header.timestamps_offset)
+    return frame_indices.astype(np.int32), timestamps.astype(np.float64)
+
+
+def decode_landmark_rows(header: LandmarkHeader, data: bytes) -> np.ndarray:
+    """Decode a contiguous run of landmark rows into a (n, landmarks, fields) float32 array"""
+    rows = len(data) // header.frame_size
+    array = np.frombuffer(data, dtype=header.dtype, count=rows * header.landmark_count * header.field_count)
+    return array.reshape(rows, header.landmark_count, header.field_count).astype(np.float32)
+
+
+def decode_landmarks(data: bytes) -> PoseSequence:
+    """Deserialise a full blob produced by encode_landmarks"""
+    header = parse_header(data)
+    if len(data) < header.total_size:
+        raise ValueError("Landmark blob is truncated")
+
+    frame_indices, timestamps = decode_index(header, data)
+    landmarks = decode_landmark_rows(header, data[header.landmarks_offset:header.total_size])
+    return PoseSequence(frame_indices, timestamps, landmarks)
+
+
+def frame_range_span(header: LandmarkHeader, start: int, end: int) -> Tuple[int, int]:
+    """(offset, length) in bytes of the landmark rows for frames [start, end)"""
+    start = max(0, min(start, header.frame_count))
+    end = max(start, min(end, header.frame_count))
+    return header.landmarks_offset + start * header.frame_size, (end - start) * header.frame_size
+
+
+def encode_chunk(sequence: PoseSequence, dtype: str = "float16") -> bytes:
+    """Length-prefixed blob for one chunk of a streamed sequence"""
+    blob = encode_landmarks(sequence, dtype)
+    return CHUNK_PREFIX.pack(len(blob)) + blob
+
+
+def iter_chunks(data: bytes) -> Iterator[PoseSequence]:
+    """Decode a buffer of consecutive length-prefixed chunks"""
+    offset = 0
+    while offset < len(data):
+        if offset + CHUNK_PREFIX.size > len(data):
+            raise ValueError("Landmark chunk stream is truncated")
+        (length,) = CHUNK_PREFIX.unpack_from(data, offset)
+        offset += CHUNK_PREFIX.size
+        if offset + length > len(data):
+            raise ValueError("Landmark chunk stream is truncated")
+        yield decode_landmarks(data[offset:offset + length])
+        offset += length
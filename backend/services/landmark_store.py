@@ -0,0 +1,205 @@
+"""
+Landmark Store
+Persists pose landmark sequences as binary blobs in MinIO
+"""
+import hashlib
+import logging
+from functools import lru_cache
+from typing import List, Dict, Any, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import func, cast, literal, select
+from sqlalchemy.dialects.postgresql import JSONB, JSONPATH
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal
+from models.analysis import Analysis
+from services.storage_service import storage_service
+from services.pose_sequence import PoseSequence, select_window
+from services.biomechanics import empty_landmarks
+from services.landmark_codec import (
+    HEADER_SIZE,
+    LandmarkHeader,
+    encode_landmarks,
+    decode_landmarks,
+    parse_header,
+    decode_index,
+    decode_landmark_rows,
+    frame_range_span,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=256)
+def _read_index(storage_path: str, version: str) -> Tuple[LandmarkHeader, np.ndarray, np.ndarray]:
+    """
+    Header, frame indices and timestamps of a blob, via two small range reads
+
+    Final blobs are never rewritten in place (see LandmarkStore.storage_path).
+    Callers still pass the analysis `updated_at` as `version`: blobs stored
+    under the older unversioned paths were overwritten on re-analysis.
+    """
+    header = parse_header(storage_service.get_bytes(storage_path, 0, HEADER_SIZE))
+    frame_indices, timestamps = decode_index(
+        header, storage_service.get_bytes(storage_path, 0, header.landmarks_offset)
+    )
+    return header, frame_indices, timestamps
+
+
+class LandmarkStore:
+    """Reads and writes the binary landmark blob referenced by Analysis.landmarks_path"""
+
+    @staticmethod
+    def storage_path(video_id: str, tier: str, raw: bool = False, version: Optional[str] = None) -> str:
+        # One blob per tier, so the preview stays readable while the full pass is written.
+        # Raw blobs hold unsmoothed landmarks between pipeline stages.
+        # Final blobs carry a version: a new result never overwrites the blob
+        # readers may still be slicing, the analysis switches to it on commit.
+        suffix = "-raw" if raw else f"-{version}" if version else ""
+        return f"analyses/{video_id}/landmarks-{tier}{suffix}.bin"
+
+    def save(self, video_id: str, tier: str, sequence: PoseSequence, raw: bool = False) -> str:
+        """Encode and upload a sequence, returning its storage path (versioned by content unless raw)"""
+        blob = encode_landmarks(sequence, settings.ANALYSIS_LANDMARK_DTYPE)
+        version = None if raw else hashlib.sha256(blob).hexdigest()[:16]
+        return storage_service.upload_bytes(self.storage_path(video_id, tier, raw, version), blob)
+
+    def copy(self, source_path: str, video_id: str, tier: str) -> str:
+        """Server-side copy of another analysis's blob to a versioned path of this video"""
+        version = hashlib.sha256(source_path.encode()).hexdigest()[:16]
+        return storage_service.copy_object(source_path, self.storage_path(video_id, tier, version=version))
+
+    def load(self, storage_path: str) -> PoseSequence:
+        return decode_landmarks(storage_service.get_bytes(storage_path))
+
+    def load_sequence(self, analysis: Analysis) -> PoseSequence:
+        """Landmarks of an analysis, from the binary blob or legacy JSONB rows"""
+        if analysis.landmarks_path:
+            return self.load(analysis.landmarks_path)
+        return PoseSequence.from_frames(analysis.data or [])
+
+    def load_frames(self, analysis: Analysis) -> Optional[List[Dict[str, Any]]]:
+        """Per-frame JSON view of an analysis (None when nothing is stored yet)"""
+        if analysis.landmarks_path:
+            return self.load(analysis.landmarks_path).to_frames()
+        return analysis.data
+
+    def load_window(
+        self,
+        analysis: Analysis,
+        start_time: Optional[float] = None,
+        end_time: Optional[float] = None,
+        start_frame: Optional[int] = None,
+        end_frame: Optional[int] = None,
+        stride: int = 1
+    ) -> Tuple[PoseSequence, int]:
+        """
+        Slice of a blob-backed analysis without downloading the whole blob
+
+        Only the index section and the byte range of the selected rows are read.
+
+        Returns:
+            Tuple of (sliced sequence, total analysed frame count)
+        """
+        header, frame_indices, timestamps = _read_index(
+            analysis.landmarks_path, str(analysis.updated_at)
+        )
+        lo, hi = select_window(frame_indices, timestamps, start_time, end_time, start_frame, end_frame)
+
+        offset, length = frame_range_span(header, lo, hi)
+        if length:
+            rows = decode_landmark_rows(header, storage_service.get_bytes(analysis.landmarks_path, offset, length))
+        else:
+            rows = empty_landmarks(0)
+
+        step = slice(None, None, stride)
+        sequence = PoseSequence(frame_indices[lo:hi][step], timestamps[lo:hi][step], rows[step])
+        return sequence, header.frame_count
+
+    def iter_chunks(self, analysis: Analysis, chunk_frames: int = 256) -> Iterator[PoseSequence]:
+        """
+        Iterate over a blob-backed analysis in fixed-size frame chunks
+
+        Each chunk is one range read, so memory stays bounded by chunk_frames
+        regardless of clip length.
+        """
+        header, frame_indices, timestamps = _read_index(
+            analysis.landmarks_path, str(analysis.updated_at)
+        )
+        for lo in range(0, header.frame_count, chunk_frames):
+            hi = min(lo + chunk_frames, header.frame_count)
+            offset, length = frame_range_span(header, lo, hi)
+            rows = decode_landmark_rows(header, storage_service.get_bytes(analysis.landmarks_path, offset, length))
+            yield PoseSequence(frame_indices[lo:hi], timestamps[lo:hi], rows)
+
+    def iter_legacy_frames(self, analysis_id, batch_size: int = 256) -> Iterator[Dict[str, Any]]:
+        """
+        Stream frames of a legacy JSONB analysis with a server-side cursor
+
+        Uses its own session because the request session is closed before a
+        streaming response body is produced.
+        """
+        db = SessionLocal()
+        try:
+            rows = db.execute(
+                select(func.jsonb_array_elements(Analysis.data)).where(Analysis.id == analysis_id),
+                execution_options={"stream_results": True, "yield_per": batch_size}
+            ).scalars()
+            yield from rows
+        finally:
+            db.close()
+
+    def load_window_legacy(
+        self,
+        db: Session,
+        analysis_id,
+        start_time: Optional[float] = None,
+        end_time: Optional[float] = None,
+        start_frame: Optional[int] = None,
+        end_frame: Optional[int] = None,
+        stride: int = 1,
+        landmark_indices: Optional[Sequence[int]] = None
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Slice of a legacy JSONB analysis, filtered inside Postgres
+
+        A jsonpath filter selects the frames so only the window crosses the
+        wire and gets deserialised in Python.
+
+        Returns:
+            Tuple of (frames, total analysed frame count)
+        """
+        conditions = []
+        variables = {}
+        for name, value, predicate in (
+            ("start_time", start_time, "@.timestamp >= $start_time"),
+            ("end_time", end_time, "@.timestamp < $end_time"),
+            ("start_frame", start_frame, "@.frame >= $start_frame"),
+            ("end_frame", end_frame, "@.frame < $end_frame"),
+        ):
+            if value is not None:
+                conditions.append(predicate)
+                variables[name] = value
+
+        path = "$[*]"
+        if conditions:
+            path += f" ? ({' && '.join(conditions)})"
+
+        frames, total = db.query(
+            func.jsonb_path_query_array(Analysis.data, cast(path, JSONPATH), literal(variables, type_=JSONB)),
+            func.jsonb_array_length(Analysis.data)
+        ).filter(Analysis.id == analysis_id).one()
+
+        frames = (frames or [])[::stride]
+        if landmark_indices is not None:
+            for frame in frames:
+                points = frame.get("landmarks") or []
+                if points:
+                    frame["landmarks"] = [points[i] for i in landmark_indices]
+        return frames, total or 0
+
+
+# Create singleton instance
+landmark_store = LandmarkStore()
@@ -24,74 +24,72 @@ class LLMService:
         if self.api_base:
              logger.info(f"API Base: {self.api_base}")
 
-    async def generate_feedback(self, analysis_data: Dict[str, Any], available_drills: List[Dict[str, str]] = []) -> Dict[str, Any]:
+    def request_feedback(self, analysis_data: Dict[str, Any], available_drills: List[Dict[str, str]] = []) -> Dict[str, Any]:
         """
-        Generates feedback based on the analysis data using the configured LLM.
+        Feedback from the configured LLM
+
+        Raises when the call fails or the reply is not JSON, so background
+        callers can retry instead of storing a placeholder.
         """
-        try:
-            # Format available drills for the prompt
-            drills_text = "\n".join([f"- {d['title']} (ID: {d['id']}): {d.get('focus_area', '')}" for d in available_drills])
-            
-            # Construct a prompt based on the analysis data
-            system_prompt = f"""You are an expert tennis coach. 
-            Analyze the following biomechanical data from a tennis shot and provide constructive feedback.
-            Focus on key mechanics like body rotation, arm angles, and timing.
-            
-            Available Drills:
-            {drills_text}
-            
-            Provide specific drills to improve, selecting from the available drills list if relevant.
-            Format your response as a JSON object with the following keys:
-            - "focus_area": The main technical aspect to focus on (e.g. "Ball Toss", "Knee Bend").
-            - "strengths": A list of things done well.
-            - "weaknesses": A list of areas for improvement.
-            - "tips": A list of actionable advice or cues.
-            - "recommended_drills": A list of drill IDs (e.g. ["drill-id-1", "drill-id-2"]).
-            """
-            
-            user_message = f"Analysis Data: {json.dumps(analysis_data, indent=2)}"
+        # Format available drills for the prompt
+        drills_text = "\n".join([f"- {d['title']} (ID: {d['id']}): {d.get('focus_area', '')}" for d in available_drills])
+        
+        # Construct a prompt based on the analysis data
+        system_prompt = f"""You are an expert tennis coach. 
+        Analyze the following biomechanical data from a tennis shot and provide constructive feedback.
+        Focus on key mechanics like body rotation, arm angles, and timing.
+        
+        Available Drills:
+        {drills_text}
+        
+        Provide specific drills to improve, selecting from the available drills list if relevant.
+        Format your response as a JSON object with the following keys:
+        - "focus_area": The main technical aspect to focus on (e.g. "Ball Toss", "Knee Bend").
+        - "strengths": A list of things done well.
+        - "weaknesses": A list of areas for improvement.
+        - "tips": A list of actionable advice or cues.
+        - "recommended_drills": A list of drill IDs (e.g. ["drill-id-1", "drill-id-2"]).
+        """
+        
+        user_message = f"Analysis Data: {json.dumps(analysis_data, indent=2)}"
 
-            logger.info(f"Sending request to LLM ({self.model})...")
-            
-            response = completion(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_message}
-                ],
-                api_base=self.api_base,
-                api_key=self.api_key,
-                custom_llm_provider=self.provider,
-                response_format={ "type": "json_object" }
-            )
+        logger.info(f"Sending request to LLM ({self.model})...")
+        
+        response = completion(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_message}
+            ],
+            api_base=self.api_base,
+            api_key=self.api_key,
+            custom_llm_provider=self.provider,
+            response_format={ "type": "json_object" }
+        )
 
-            # Extract the JSON response
-            try:
-                content = response.choices[0].message.content
-                feedback = json.loads(content)
-                
-                # Unwrap 'data' key if present (some models wrap the response)
-                if "data" in feedback and isinstance(feedback["data"], dict):
-                    feedback = feedback["data"]
-                    
-                return feedback
-            except json.JSONDecodeError:
-                logger.error(f"Failed to parse LLM response as JSON: {content}")
-                return {
-                    "summary": "Error parsing AI feedback.",
-                    "strengths": [],
-                    "improvements": [],
-                    "drills": []
-                }
-            except Exception as e:
-                logger.error(f"Error processing LLM response: {e}")
-                return {
-                    "summary": "Error processing AI feedback.",
-                    "strengths": [],
-                    "improvements": [],
-                    "drills": []
-                }
+        # Extract the JSON response
+        feedback = json.loads(response.choices[0].message.content)
 
+        # Unwrap 'data' key if present (some models wrap the response)
+        if "data" in feedback and isinstance(feedback["data"], dict):
+            feedback = feedback["data"]
+
+        return feedback
+
+    async def generate_feedback(self, analysis_data: Dict[str, Any], available_drills: List[Dict[str, str]] = []) -> Dict[str, Any]:
+        """
+        Generates feedback based on the analysis data using the configured LLM.
+        """
+        try:
+            return self.request_feedback(analysis_data, available_drills)
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse LLM response as JSON: {e.doc}")
+            return {
+                "summary": "Error parsing AI feedback.",
+                "strengths": [],
+                "improvements": [],
+                "drills": []
+            }
         except Exception as e:
             logger.error(f"Error generating feedback: {e}")
             return {
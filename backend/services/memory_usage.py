@@ -0,0 +1,37 @@
+"""
+Memory Usage
+Peak resident memory of the current process, for per-task reporting
+"""
+import resource
+from typing import Optional
+
+
+def reset_peak_rss() -> bool:
+    """
+    Restart peak tracking from the current resident size
+
+    Writing 5 to clear_refs resets VmHWM (Linux 4.0+). Returns False where
+    that is unavailable: the peak then covers the whole process lifetime.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_kb() -> Optional[int]:
+    """Peak resident set size since the last reset (VmHWM), in KiB"""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        # Lifetime peak; KiB on Linux
+        return int(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+    except (OSError, ValueError):
+        return None
@@ -0,0 +1,61 @@
+"""
+Metric Summary
+Per-video aggregates of every biomechanical metric, overall and per phase
+"""
+import numpy as np
+from typing import Dict, Any, List, Optional
+
+from services.biomechanics import compute_joint_angles
+from services.pose_sequence import PoseSequence
+
+WHOLE_CLIP = "all"  # Phase name of the whole-clip aggregate
+PERCENTILES = (10, 50, 90)
+
+
+def summarize_metrics(sequence: PoseSequence, phases: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Aggregate rows (metric, phase, count, mean, min, max, p10, p50, p90)
+
+    One row per metric for the whole clip (phase "all") plus one per metric
+    and phase of `phases` (an Analysis.phases summary). Metrics without any
+    valid sample in a range are left out.
+    """
+    angles = compute_joint_angles(sequence.landmarks)
+    if not angles or len(sequence) == 0:
+        return []
+
+    names = list(angles)
+    values = np.stack([angles[name] for name in names])  # (metrics, frames)
+
+    ranges = [(WHOLE_CLIP, 0, len(sequence))]
+    for phase in (phases or {}).get("phases", []):
+        lo = int(np.searchsorted(sequence.frame_indices, phase["start_frame"], side="left"))
+        hi = int(np.searchsorted(sequence.frame_indices, phase["end_frame"], side="left"))
+        ranges.append((phase["name"], lo, hi))
+
+    rows = []
+    for phase_name, lo, hi in ranges:
+        window = values[:, lo:hi]
+        counts = np.isfinite(window).sum(axis=1)
+        if not counts.any():
+            continue
+        valid = counts > 0
+        window = window[valid]
+        with np.errstate(invalid="ignore"):
+            means = np.nanmean(window, axis=1)
+            mins = np.nanmin(window, axis=1)
+            maxs = np.nanmax(window, axis=1)
+            percentiles = np.nanpercentile(window, PERCENTILES, axis=1)  # (P, metrics)
+
+        for j, name in enumerate(np.asarray(names)[valid]):
+            row = {
+                "metric": str(name),
+                "phase": phase_name,
+                "count": int(counts[valid][j]),
+                "mean": float(means[j]),
+                "min": float(mins[j]),
+                "max": float(maxs[j]),
+            }
+            row.update({f"p{p}": float(percentiles[k, j]) for k, p in enumerate(PERCENTILES)})
+            rows.append(row)
+    return rows
@@ -0,0 +1,166 @@
+"""
+Phase Segmentation
+Splits a stroke into phases from wrist speed and summarises metrics per phase
+"""
+import numpy as np
+from typing import Dict, Any, List, Optional
+
+from services.biomechanics import compute_joint_angles
+from services.pose_sequence import PoseSequence
+
+PHASES = ("preparation", "backswing", "forward_swing", "contact", "follow_through", "recovery")
+
+# Bump when the segmentation output changes, so stored summaries can be told apart
+PHASES_VERSION = 1
+
+WRISTS = {"left": 15, "right": 16}
+
+SPEED_SMOOTHING_SECONDS = 0.1  # Moving average applied to wrist speed
+REST_SPEED_FRACTION = 0.2  # Below this fraction of the peak speed the arm is considered at rest
+CONTACT_HALF_WINDOW_SECONDS = 0.04  # Contact phase spans the speed peak +/- this
+MIN_DETECTED_FRAMES = 5
+
+
+def moving_average(values: np.ndarray, window: int) -> np.ndarray:
+    """Centred moving average via cumulative sums; NaN samples are ignored"""
+    if window <= 1 or len(values) == 0:
+        return values
+    present = ~np.isnan(values)
+    sums = np.concatenate(([0.0], np.cumsum(np.where(present, values, 0.0))))
+    counts = np.concatenate(([0], np.cumsum(present)))
+    half = window // 2
+    idx = np.arange(len(values))
+    lo = np.clip(idx - half, 0, len(values))
+    hi = np.clip(idx + half + 1, 0, len(values))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (sums[hi] - sums[lo]) / (counts[hi] - counts[lo])
+
+
+def wrist_speeds(timestamps: np.ndarray, landmarks: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Image-plane speed of each wrist in normalised units per second
+
+    Returns:
+        Dict of side -> (frames,) float64 speed, NaN where the wrist is missing
+    """
+    speeds = {}
+    if len(timestamps) < 2:
+        return {side: np.full(len(timestamps), np.nan) for side in WRISTS}
+
+    for side, index in WRISTS.items():
+        positions = landmarks[:, index, :2].astype(np.float64)
+        velocity = np.gradient(positions, timestamps, axis=0)
+        speeds[side] = np.linalg.norm(velocity, axis=1)
+    return speeds
+
+
+def detect_phases(timestamps: np.ndarray, landmarks: np.ndarray) -> Optional[Dict[str, Any]]:
+    """
+    Locate phase boundaries of a single stroke
+
+    The dominant wrist is the one reaching the highest speed; its speed peak
+    is contact. Going back from contact, the forward swing starts at the last
+    speed minimum, and the backswing at the last rest frame before the motion
+    that precedes it. The follow-through lasts until the wrist is back at rest.
+
+    Returns:
+        Dict with dominant side, contact row, smoothed speed and a list of
+        (phase, lo, hi) row ranges, or None when there is no usable motion
+    """
+    frames = len(timestamps)
+    if frames < MIN_DETECTED_FRAMES:
+        return None
+
+    spacing = float(np.median(np.diff(timestamps))) if frames > 1 else 0.0
+    window = max(1, int(round(SPEED_SMOOTHING_SECONDS / spacing))) if spacing > 0 else 1
+
+    speeds = {side: moving_average(raw, window) for side, raw in wrist_speeds(timestamps, landmarks).items()}
+    peaks = {side: np.nanmax(speed) if np.isfinite(speed).any() else 0.0 for side, speed in speeds.items()}
+    side = max(peaks, key=peaks.get)
+    if np.sum(np.isfinite(speeds[side])) < MIN_DETECTED_FRAMES or peaks[side] <= 0:
+        return None
+
+    speed = np.nan_to_num(speeds[side], nan=0.0)
+    contact = int(np.argmax(speed))
+    rest = speed < REST_SPEED_FRACTION * speed[contact]
+
+    # Forward swing: the uninterrupted rise that ends at contact
+    falling = np.nonzero(np.diff(speed[:contact + 1]) <= 0)[0]
+    forward_start = int(falling[-1]) + 1 if len(falling) else 0
+
+    # Backswing: motion between the last rest frame and the forward swing
+    backswing_start = forward_start
+    if forward_start > 0:
+        moving_after = np.maximum.accumulate(speed[:forward_start][::-1])[::-1] >= REST_SPEED_FRACTION * speed[contact]
+        candidates = np.nonzero(rest[:forward_start] & moving_after)[0]
+        backswing_start = int(candidates[-1]) + 1 if len(candidates) else 0
+
+    contact_lo = max(forward_start, int(np.searchsorted(timestamps, timestamps[contact] - CONTACT_HALF_WINDOW_SECONDS)))
+    contact_hi = max(contact + 1, int(np.searchsorted(timestamps, timestamps[contact] + CONTACT_HALF_WINDOW_SECONDS, side="right")))
+
+    settled = np.nonzero(rest[contact_hi:])[0]
+    follow_end = contact_hi + int(settled[0]) if len(settled) else frames
+
+    bounds = [0, backswing_start, forward_start, contact_lo, contact_hi, follow_end, frames]
+    ranges = [
+        (name, lo, hi)
+        for name, lo, hi in zip(PHASES, bounds[:-1], bounds[1:])
+        if hi > lo
+    ]
+    return {"side": side, "contact": contact, "speed": speed, "ranges": ranges}
+
+
+def _stats(values: np.ndarray) -> Optional[Dict[str, float]]:
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return None
+    return {"mean": float(values.mean()), "min": float(values.min()), "max": float(values.max())}
+
+
+def summarize_phases(sequence: PoseSequence) -> Optional[Dict[str, Any]]:
+    """
+    Phase boundaries and per-phase metric summaries, ready to store as JSON
+
+    Computed once at analysis time so feedback and UI never rescan frames.
+    """
+    detected = detect_phases(sequence.timestamps, sequence.landmarks)
+    if detected is None:
+        return None
+
+    frames = len(sequence)
+    frame_indices = sequence.frame_indices
+    timestamps = sequence.timestamps
+    angles = compute_joint_angles(sequence.landmarks)
+    speed = detected["speed"]
+
+    phases: List[Dict[str, Any]] = []
+    for name, lo, hi in detected["ranges"]:
+        end_time = float(timestamps[hi]) if hi < frames else float(timestamps[-1])
+        metrics = {}
+        for metric, values in angles.items():
+            stats = _stats(values[lo:hi])
+            if stats:
+                metrics[metric] = stats
+        phases.append({
+            "name": name,
+            "start_frame": int(frame_indices[lo]),
+            "end_frame": int(frame_indices[hi]) if hi < frames else int(frame_indices[-1]) + 1,
+            "start_time": float(timestamps[lo]),
+            "end_time": end_time,
+            "duration": end_time - float(timestamps[lo]),
+            "peak_wrist_speed": float(speed[lo:hi].max()),
+            "metrics": metrics,
+        })
+
+    contact = detected["contact"]
+    return {
+        "version": PHASES_VERSION,
+        "dominant_side": detected["side"],
+        "contact": {
+            "frame": int(frame_indices[contact]),
+            "timestamp": float(timestamps[contact]),
+            "wrist_speed": float(speed[contact]),
+        },
+        "phases": phases,
+    }
+
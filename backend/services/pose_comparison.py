@@ -0,0 +1,356 @@
+"""
+Pose Comparison
+Aligns a player's clip with a reference clip and compares joint angles phase by phase
+"""
+import numpy as np
+from typing import Dict, Any, List, Optional, Tuple
+
+from services.biomechanics import compute_joint_angles, detected_mask
+from services.metric_summary import WHOLE_CLIP
+from services.pose_sequence import PoseSequence
+
+# Bump when the comparison output changes, so cached results are recomputed
+COMPARISON_VERSION = 2
+
+# Joints used for alignment: shoulders, elbows, wrists, hips, knees, ankles
+ALIGNMENT_JOINTS = (11, 12, 13, 14, 15, 16, 23, 24, 25, 26, 27, 28)
+
+# Left/right landmark pairs swapped when mirroring a clip (left vs right-handed player)
+MIRROR_PAIRS = ((11, 12), (13, 14), (15, 16), (23, 24), (25, 26), (27, 28))
+
+# Diagonal, vertical and horizontal steps of the warping path
+STEP_DIAGONAL, STEP_UP, STEP_LEFT = 0, 1, 2
+
+
+def body_normalized_vectors(landmarks: np.ndarray, mirror: bool = False) -> np.ndarray:
+    """
+    Translation and scale invariant (x, y) joint vectors
+
+    Joints are expressed relative to the hip midpoint and divided by the
+    torso length (hip midpoint to shoulder midpoint), so camera distance and
+    player height do not affect the alignment. With `mirror`, x is flipped and
+    left/right joints are swapped.
+
+    Args:
+        landmarks: (frames, 33, 4) array, NaN where no pose was detected
+
+    Returns:
+        (frames, len(ALIGNMENT_JOINTS) * 2) float64 array
+    """
+    points = landmarks[:, :, :2].astype(np.float64)
+    if mirror:
+        points = points.copy()
+        points[:, :, 0] = -points[:, :, 0]
+        for left, right in MIRROR_PAIRS:
+            points[:, [left, right]] = points[:, [right, left]]
+
+    hips = points[:, [23, 24]].mean(axis=1)
+    shoulders = points[:, [11, 12]].mean(axis=1)
+    torso = np.linalg.norm(shoulders - hips, axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        scale = np.where(torso > 0, torso, np.nan)
+        vectors = (points[:, ALIGNMENT_JOINTS] - hips[:, None, :]) / scale[:, None, None]
+    return vectors.reshape(len(points), -1)
+
+
+def band_radius(n: int, m: int, band: float) -> int:
+    """Sakoe-Chiba half width in columns, wide enough for the slope between two lengths"""
+    slope = max(n, m) / max(min(n, m), 1)
+    return max(int(np.ceil(band * max(n, m))), int(np.ceil(slope)) + 1)
+
+
+def banded_dtw(a: np.ndarray, b: np.ndarray, band: float = 0.1) -> Tuple[np.ndarray, np.ndarray, float]:
+    """
+    Dynamic time warping restricted to a band around the diagonal
+
+    Only cells within `band_radius` columns of the line joining (0, 0) and
+    (n-1, m-1) are evaluated, so time and memory are O(n * radius) instead of
+    O(n * m). Each row is computed with whole-array operations: the
+    horizontal dependency D[i, j-1] is resolved with a running minimum over
+    cumulative costs.
+
+    Args:
+        a: (n, features) sequence
+        b: (m, features) sequence
+        band: Band half width as a fraction of the longer sequence (1.0 = unconstrained)
+
+    Returns:
+        Tuple of (row indices into a, row indices into b, total path cost)
+    """
+    n, m = len(a), len(b)
+    if n == 0 or m == 0:
+        raise ValueError("Cannot align an empty sequence")
+
+    radius = band_radius(n, m, band)
+    centre = np.rint(np.arange(n) * ((m - 1) / max(n - 1, 1))).astype(np.int64)
+    lo = np.clip(centre - radius, 0, m)
+    hi = np.clip(centre + radius + 1, 0, m)
+    width = int((hi - lo).max())
+
+    cost = np.full((n, width), np.inf)
+    steps = np.zeros((n, width), dtype=np.uint8)
+
+    previous = None
+    for i in range(n):
+        cols = np.arange(lo[i], hi[i])
+        local = np.linalg.norm(a[i] - b[cols], axis=1)
+
+        if previous is None:
+            row = np.cumsum(local)
+            step = np.full(len(cols), STEP_LEFT, dtype=np.uint8)
+            step[0] = STEP_DIAGONAL
+        else:
+            prev_row, prev_lo, prev_hi = previous
+            up = np.full(len(cols), np.inf)
+            diag = np.full(len(cols), np.inf)
+            inside = (cols >= prev_lo) & (cols < prev_hi)
+            up[inside] = prev_row[cols[inside] - prev_lo]
+            inside = (cols - 1 >= prev_lo) & (cols - 1 < prev_hi)
+            diag[inside] = prev_row[cols[inside] - 1 - prev_lo]
+
+            from_above = np.minimum(diag, up) + local
+            step = np.where(diag <= up, STEP_DIAGONAL, STEP_UP).astype(np.uint8)
+
+            # D[j] = min(from_above[j], local[j] + D[j-1])
+            #      = C[j] + min_{k <= j}(from_above[k] - C[k]), C = cumsum(local)
+            cumulative = np.cumsum(local)
+            relative = from_above - cumulative
+            best = np.minimum.accumulate(relative)
+            row = cumulative + best
+            # Compared before adding back, so rounding cannot flip ties
+            step[relative > best] = STEP_LEFT
+
+        cost[i, :len(cols)] = row
+        steps[i, :len(cols)] = step
+        previous = (row, lo[i], hi[i])
+
+    # Backtrack from the last cell
+    path_a, path_b = [], []
+    i, j = n - 1, m - 1
+    total = float(cost[i, j - lo[i]])
+    while True:
+        path_a.append(i)
+        path_b.append(j)
+        if i == 0 and j == 0:
+            break
+        step = steps[i, j - lo[i]]
+        if i == 0 or step == STEP_LEFT:
+            j -= 1
+        elif step == STEP_UP:
+            i -= 1
+        else:
+            i -= 1
+            j -= 1
+
+    return np.asarray(path_a[::-1]), np.asarray(path_b[::-1]), total
+
+
+def _mirror_angles(angles: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Swap left_/right_ metrics, matching a mirrored skeleton"""
+    swapped = {}
+    for name, values in angles.items():
+        if name.startswith("left_"):
+            swapped["right_" + name[5:]] = values
+        elif name.startswith("right_"):
+            swapped["left_" + name[6:]] = values
+        else:
+            swapped[name] = values
+    return swapped
+
+
+def _phase_rows(frame_indices: np.ndarray, phases: Optional[Dict[str, Any]]) -> List[Tuple[str, int, int]]:
+    """(phase, lo, hi) row ranges of a stored phase summary"""
+    ranges = []
+    for phase in (phases or {}).get("phases", []):
+        lo = int(np.searchsorted(frame_indices, phase["start_frame"], side="left"))
+        hi = int(np.searchsorted(frame_indices, phase["end_frame"], side="left"))
+        ranges.append((phase["name"], lo, hi))
+    return ranges
+
+
+def _angle_differences(user_angles, reference_angles, user_rows, reference_rows) -> Dict[str, Dict[str, float]]:
+    """Mean user/reference angle and signed/absolute difference over aligned pairs"""
+    metrics = {}
+    for name, user_values in user_angles.items():
+        if name not in reference_angles:
+            continue
+        user = user_values[user_rows]
+        reference = reference_angles[name][reference_rows]
+        valid = np.isfinite(user) & np.isfinite(reference)
+        if not valid.any():
+            continue
+        diff = user[valid] - reference[valid]
+        metrics[name] = {
+            "user_mean": float(user[valid].mean()),
+            "reference_mean": float(reference[valid].mean()),
+            "mean_diff": float(diff.mean()),
+            "mean_abs_diff": float(np.abs(diff).mean()),
+        }
+    return metrics
+
+
+def pair_strokes(
+    user_strokes: List[Dict[str, Any]],
+    reference_strokes: List[Dict[str, Any]]
+) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """
+    Reference stroke each user stroke is aligned with
+
+    Candidates are the reference strokes of the same type (all of them when
+    the reference has none); among those, the closest pose embedding wins,
+    or the first candidate when embeddings are missing.
+
+    Args:
+        user_strokes, reference_strokes: Dicts with stroke_index, start_frame,
+            end_frame, stroke_type and embedding (or None)
+
+    Returns:
+        (user stroke, reference stroke) pairs, in user stroke order
+    """
+    pairs = []
+    for stroke in user_strokes:
+        candidates = [r for r in reference_strokes if r["stroke_type"] == stroke["stroke_type"]] or reference_strokes
+        if stroke.get("embedding") is not None:
+            embedded = [r for r in candidates if r.get("embedding") is not None]
+            if embedded:
+                query = np.asarray(stroke["embedding"], dtype=np.float64)
+                candidates = [min(
+                    embedded, key=lambda r: float(np.linalg.norm(np.asarray(r["embedding"], dtype=np.float64) - query))
+                )]
+        pairs.append((stroke, candidates[0]))
+    return pairs
+
+
+def _window_rows(sequence: PoseSequence, stroke: Optional[Dict[str, Any]]) -> Tuple[int, int]:
+    """[lo, hi) rows of a stroke's frames, or of the whole clip"""
+    if stroke is None:
+        return 0, len(sequence)
+    lo = int(np.searchsorted(sequence.frame_indices, stroke["start_frame"], side="left"))
+    hi = int(np.searchsorted(sequence.frame_indices, stroke["end_frame"], side="left"))
+    return lo, hi
+
+
+def subsample_rows(rows: np.ndarray, max_frames: int) -> np.ndarray:
+    """At most `max_frames` rows, evenly spread and keeping both ends"""
+    if max_frames <= 0 or len(rows) <= max_frames:
+        return rows
+    return rows[np.unique(np.rint(np.linspace(0, len(rows) - 1, max_frames)).astype(np.int64))]
+
+
+def compare_sequences(
+    user: PoseSequence,
+    reference: PoseSequence,
+    user_phases: Optional[Dict[str, Any]] = None,
+    reference_phases: Optional[Dict[str, Any]] = None,
+    band: float = 0.1,
+    user_strokes: Optional[List[Dict[str, Any]]] = None,
+    reference_strokes: Optional[List[Dict[str, Any]]] = None,
+    max_frames: int = 300
+) -> Optional[Dict[str, Any]]:
+    """
+    Align two clips and compare their joint angles, ready to store as JSON
+
+    When both clips have detected strokes, each user stroke is aligned with
+    one reference stroke (see pair_strokes) rather than aligning the whole
+    sessions; otherwise the whole clips are aligned. Either way a window is
+    evenly subsampled to `max_frames` usable frames first, which bounds the
+    DTW to O(max_frames * radius) time and memory whatever the video length.
+
+    Frames without a usable pose are skipped before alignment. When the two
+    players hit with different arms (dominant_side of the phase summaries),
+    the reference is mirrored so that forehands line up with forehands.
+
+    Returns:
+        Dict with the alignment cost, the frame mapping (one entry per aligned
+        user frame, as parallel lists), the stroke pairs and angle differences
+        for the whole clip and each user phase, or None when no window has a
+        usable pose on both sides
+    """
+    user_vectors = body_normalized_vectors(user.landmarks)
+    user_valid = detected_mask(user.landmarks) & np.isfinite(user_vectors).all(axis=1)
+
+    user_side = (user_phases or {}).get("dominant_side")
+    reference_side = (reference_phases or {}).get("dominant_side")
+    mirrored = bool(user_side and reference_side and user_side != reference_side)
+
+    reference_vectors = body_normalized_vectors(reference.landmarks, mirror=mirrored)
+    reference_valid = detected_mask(reference.landmarks) & np.isfinite(reference_vectors).all(axis=1)
+
+    if user_strokes and reference_strokes:
+        pairs = pair_strokes(user_strokes, reference_strokes)
+    else:
+        pairs = [(None, None)]
+
+    user_parts, reference_parts, mapped_user_parts, mapped_parts, strokes = [], [], [], [], []
+    total = 0.0
+    for user_stroke, reference_stroke in pairs:
+        lo, hi = _window_rows(user, user_stroke)
+        user_keep = subsample_rows(lo + np.nonzero(user_valid[lo:hi])[0], max_frames)
+        lo, hi = _window_rows(reference, reference_stroke)
+        reference_keep = subsample_rows(lo + np.nonzero(reference_valid[lo:hi])[0], max_frames)
+        if len(user_keep) == 0 or len(reference_keep) == 0:
+            continue
+
+        path_user, path_reference, cost = banded_dtw(
+            user_vectors[user_keep], reference_vectors[reference_keep], band
+        )
+        user_rows = user_keep[path_user]
+        reference_rows = reference_keep[path_reference]
+
+        # One reference frame per user frame: the middle of its matched run
+        first = np.concatenate(([True], np.diff(user_rows) > 0))
+        starts = np.nonzero(first)[0]
+        ends = np.append(starts[1:], len(user_rows))
+        mapped_parts.append(reference_rows[(starts + ends - 1) // 2])
+        mapped_user_parts.append(user_rows[starts])
+
+        user_parts.append(user_rows)
+        reference_parts.append(reference_rows)
+        total += cost
+        if user_stroke is not None:
+            strokes.append({
+                "stroke_index": user_stroke["stroke_index"],
+                "reference_stroke_index": reference_stroke["stroke_index"],
+                "distance": cost / len(user_rows),
+            })
+
+    if not user_parts:
+        return None
+    user_rows = np.concatenate(user_parts)
+    reference_rows = np.concatenate(reference_parts)
+    mapped_user = np.concatenate(mapped_user_parts)
+    mapped = np.concatenate(mapped_parts)
+
+    user_angles = compute_joint_angles(user.landmarks)
+    reference_angles = compute_joint_angles(reference.landmarks)
+    if mirrored:
+        reference_angles = _mirror_angles(reference_angles)
+
+    phases = [{
+        "name": WHOLE_CLIP,
+        "metrics": _angle_differences(user_angles, reference_angles, user_rows, reference_rows),
+    }]
+    for name, lo, hi in _phase_rows(user.frame_indices, user_phases):
+        in_phase = (user_rows >= lo) & (user_rows < hi)
+        if not in_phase.any():
+            continue
+        phases.append({
+            "name": name,
+            "metrics": _angle_differences(
+                user_angles, reference_angles, user_rows[in_phase], reference_rows[in_phase]
+            ),
+        })
+
+    return {
+        "version": COMPARISON_VERSION,
+        "mirrored": mirrored,
+        "distance": total / len(user_rows),
+        "mapping": {
+            "user_frames": user.frame_indices[mapped_user].tolist(),
+            "user_times": user.timestamps[mapped_user].tolist(),
+            "reference_frames": reference.frame_indices[mapped].tolist(),
+            "reference_times": reference.timestamps[mapped].tolist(),
+        },
+        "strokes": strokes,
+        "phases": phases,
+    }
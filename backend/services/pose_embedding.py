@@ -0,0 +1,114 @@
+"""
+Pose Embedding
+Fixed-length vector describing one stroke, for nearest-reference search
+"""
+import numpy as np
+from typing import Dict, Any, List, Optional
+
+from services.biomechanics import compute_joint_angles
+from services.pose_comparison import body_normalized_vectors, ALIGNMENT_JOINTS
+from services.pose_sequence import PoseSequence
+
+# Bump when the embedding layout changes; stored vectors of another version are ignored
+EMBEDDING_VERSION = 1
+
+EMBEDDING_SAMPLES = 32  # Samples per feature; the first half covers start -> contact, the second contact -> end
+
+# Angles expressed for the hitting arm ("hit") and the other one ("free")
+EMBEDDING_ANGLES = (
+    ("right_elbow_angle", "left_elbow_angle"),
+    ("left_elbow_angle", "right_elbow_angle"),
+    ("right_knee_angle", "left_knee_angle"),
+    ("left_knee_angle", "right_knee_angle"),
+)
+HIT_WRIST = 16  # Right wrist; left-handed strokes are mirrored onto it
+
+EMBEDDING_FEATURES = len(EMBEDDING_ANGLES) + 2  # Angles plus wrist x, y
+EMBEDDING_DIM = EMBEDDING_FEATURES * EMBEDDING_SAMPLES
+
+
+def _sample_times(start: float, contact: float, end: float) -> np.ndarray:
+    """Sample times with the contact always falling on the same sample"""
+    half = EMBEDDING_SAMPLES // 2
+    before = np.linspace(start, contact, half, endpoint=False)
+    after = np.linspace(contact, end, EMBEDDING_SAMPLES - half)
+    return np.concatenate((before, after))
+
+
+def stroke_embedding(sequence: PoseSequence, side: str, contact_time: float) -> Optional[np.ndarray]:
+    """
+    Embedding of a stroke: resampled joint-angle and wrist trajectories
+
+    Every stroke is expressed as if hit with the right arm (left-handed
+    strokes are mirrored), in body-normalised units, and resampled so that
+    start, contact and end land on fixed samples. Strokes of different
+    durations and players therefore compare directly with Euclidean distance.
+
+    Args:
+        sequence: Rows of the stroke only
+        side: Hitting arm, "left" or "right"
+        contact_time: Timestamp of the contact
+
+    Returns:
+        (EMBEDDING_DIM,) float32 vector, or None when a feature is never visible
+    """
+    if len(sequence) < 2:
+        return None
+
+    mirror = side == "left"
+    angles = compute_joint_angles(sequence.landmarks)
+    features = [np.radians(angles[left if mirror else right]) for right, left in EMBEDDING_ANGLES]
+
+    wrist = ALIGNMENT_JOINTS.index(HIT_WRIST)
+    vectors = body_normalized_vectors(sequence.landmarks, mirror=mirror)
+    features.append(vectors[:, 2 * wrist])
+    features.append(vectors[:, 2 * wrist + 1])
+
+    timestamps = sequence.timestamps
+    times = _sample_times(float(timestamps[0]), contact_time, float(timestamps[-1]))
+    samples = []
+    for values in features:
+        valid = np.isfinite(values)
+        if not valid.any():
+            return None
+        samples.append(np.interp(times, timestamps[valid], values[valid]))
+    return np.concatenate(samples).astype(np.float32)
+
+
+def embed_strokes(sequence: PoseSequence, strokes: List[Dict[str, Any]]) -> List[Optional[np.ndarray]]:
+    """Embedding of each detected stroke (see stroke_detection.detect_strokes)"""
+    embeddings = []
+    for stroke in strokes:
+        lo = int(np.searchsorted(sequence.frame_indices, stroke["start_frame"], side="left"))
+        hi = int(np.searchsorted(sequence.frame_indices, stroke["end_frame"], side="left"))
+        embeddings.append(stroke_embedding(sequence[lo:hi], stroke["side"], stroke["contact_time"]))
+    return embeddings
+
+
+def nearest(matrix: np.ndarray, queries: np.ndarray, k: int):
+    """
+    Exact k nearest rows of `matrix` for each query (Euclidean)
+
+    Brute force with one matrix product: a few thousand reference strokes
+    take well under a millisecond per query.
+
+    Returns:
+        Tuple of (indices, distances), each (queries, min(k, rows)), closest first
+    """
+    k = min(k, len(matrix))
+    if k == 0:
+        return np.zeros((len(queries), 0), dtype=np.intp), np.zeros((len(queries), 0))
+
+    squared = (
+        np.einsum("ij,ij->i", queries, queries)[:, None]
+        + np.einsum("ij,ij->i", matrix, matrix)[None, :]
+        - 2.0 * queries @ matrix.T
+    )
+    squared = np.maximum(squared, 0.0)
+    if k < len(matrix):
+        candidates = np.argpartition(squared, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.tile(np.arange(len(matrix)), (len(queries), 1))
+    order = np.take_along_axis(squared, candidates, axis=1).argsort(axis=1)
+    indices = np.take_along_axis(candidates, order, axis=1)
+    return indices, np.sqrt(np.take_along_axis(squared, indices, axis=1))
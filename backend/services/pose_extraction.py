@@ -0,0 +1,284 @@
+"""
+Pose Extraction
+Runs a pose extractor over local video files, optionally split into segments
+"""
+import logging
+import os
+import numpy as np
+from typing import List, Dict, Any, Callable, Iterable, Optional, Tuple
+
+# Celery's fork of multiprocessing: unlike the stdlib Pool it may be used from
+# inside daemonic prefork worker processes
+from billiard import Pool
+from billiard.exceptions import WorkerLostError
+
+from services.frame_sampling import FrameSampler
+from services.video_decoder import VideoFrameReader, FramePrefetcher
+from services.pose_extractors import cached_extractor, warm_extractor
+from services.pose_sequence import PoseSequence, PoseSequenceBuffer
+from services.memory_usage import peak_rss_kb, reset_peak_rss
+
+logger = logging.getLogger(__name__)
+
+
+def plan_segments(
+    frame_count: int,
+    fps: float,
+    workers: int,
+    min_segment_seconds: float,
+    overlap_seconds: float,
+    start_frame: int = 0,
+    end_frame: Optional[int] = None
+) -> List[Tuple[int, Optional[int], int]]:
+    """
+    Split a [start_frame, end_frame) range of a video into segments for parallel pose extraction
+
+    Returns:
+        List of (start_frame, end_frame, warmup_start). end_frame is None for the
+        last segment of an open range so it always runs to the real end of the
+        file (container frame counts are not always exact). Frames in
+        [warmup_start, start_frame) overlap the previous segment and are only
+        used to re-establish tracking.
+    """
+    overlap = int(round(overlap_seconds * fps)) if fps > 0 else 0
+    range_end = frame_count if end_frame is None else end_frame
+    single = [(start_frame, end_frame, max(0, start_frame - overlap))]
+    if workers <= 1 or range_end <= start_frame or fps <= 0:
+        return single
+
+    min_frames = max(1, int(min_segment_seconds * fps))
+    count = min(workers, (range_end - start_frame) // min_frames)
+    if count <= 1:
+        return single
+
+    bounds = np.linspace(start_frame, range_end, count + 1).astype(int)
+    segments = []
+    for i in range(count):
+        start = int(bounds[i])
+        end = int(bounds[i + 1]) if i < count - 1 else end_frame
+        segments.append((start, end, max(0, start - overlap)))
+    return segments
+
+
+def uncovered_ranges(spans: List[Tuple[int, int]], reached_end: bool) -> List[Tuple[int, Optional[int]]]:
+    """
+    Source frame ranges not yet covered by already extracted [start, end) spans
+
+    The trailing range is open (end None) unless a span is known to have
+    reached the end of the file.
+    """
+    gaps = []
+    cursor = 0
+    for start, end in sorted(spans):
+        if start > cursor:
+            gaps.append((cursor, start))
+        cursor = max(cursor, end)
+    if not reached_end:
+        gaps.append((cursor, None))
+    return gaps
+
+
+def extract_segment(
+    path: str,
+    options: Dict[str, Any],
+    start_frame: int = 0,
+    end_frame: Optional[int] = None,
+    warmup_start: Optional[int] = None,
+    flush: Optional[Callable[[Dict[str, Any]], None]] = None,
+    flush_frames: int = 0,
+    prefetch: int = 0
+) -> Dict[str, Any]:
+    """
+    Run pose detection over one [start_frame, end_frame) segment of a local video file
+
+    Module-level (rather than a method) so it can be shipped to pool processes.
+    Frames decoded in [warmup_start, start_frame) feed the tracker but are dropped.
+
+    With `flush`, every `flush_frames` analysed frames (and the remainder at the
+    end) are handed over as a chunk covering source frames [start, end) and
+    dropped from memory; the returned arrays then only hold unflushed frames
+    (none on success). The last chunk of an open-ended segment has eof=True.
+
+    With `prefetch`, frames are decoded on a background thread up to that
+    many frames ahead of inference (see FramePrefetcher).
+    """
+    warmup_start = start_frame if warmup_start is None else warmup_start
+
+    sampler = FrameSampler(
+        mode=options["sampling_mode"],
+        target_fps=options["target_fps"],
+        stride=options["stride"],
+        motion_factor=options["motion_factor"]
+    )
+    reader = VideoFrameReader(
+        path,
+        sampler=sampler,
+        max_dim=options["max_dim"],
+        backend=options["decoder"],
+        start_frame=warmup_start,
+        end_frame=end_frame
+    )
+    if prefetch > 0:
+        reader = FramePrefetcher(reader, prefetch)
+
+    # Chunks reuse one buffer sized for them; otherwise it grows with the segment
+    buffer = PoseSequenceBuffer(flush_frames if flush and flush_frames else 256)
+    chunk_start = start_frame
+
+    def flush_chunk(eof: bool):
+        nonlocal chunk_start
+        end = reader.position if end_frame is None else min(reader.position, end_frame)
+        flush({
+            "start": chunk_start,
+            "end": end,
+            "eof": eof,
+            **_segment_arrays(buffer.take()),
+        })
+        chunk_start = end
+
+    # Warm per-process graph, with fresh tracking state for this segment
+    extractor = cached_extractor(options)
+    with reader:
+
+        for frame_index, timestamp, image_rgb in reader:
+            landmarks = extractor.detect(image_rgb, int(round(timestamp * 1000)))
+
+            if frame_index < start_frame:
+                # Overlap with the previous segment: tracking warm-up only
+                continue
+
+            # Angles are computed for the whole clip once decoding is done
+            buffer.append(frame_index, timestamp, landmarks)
+
+            if flush and flush_frames and len(buffer) >= flush_frames:
+                flush_chunk(eof=False)
+
+        # Always record the end of the file, even with nothing left to flush
+        if flush and (len(buffer) or reader.position > chunk_start or end_frame is None):
+            flush_chunk(eof=end_frame is None)
+
+    return {
+        **_segment_arrays(buffer.take()),
+        "end_position": reader.position,
+        "sampling": sampler.describe(),
+        "decode": reader.describe(),
+        "extractor": extractor.describe(),
+        "peak_rss_kb": peak_rss_kb(),
+    }
+
+
+def _segment_arrays(sequence: PoseSequence) -> Dict[str, np.ndarray]:
+    return {
+        "frame_indices": sequence.frame_indices,
+        "timestamps": sequence.timestamps,
+        "landmarks": sequence.landmarks,
+    }
+
+
+def describe_extraction(path: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Sampling and decode parameters for a file, without decoding any frame"""
+    sampler = FrameSampler(
+        mode=options["sampling_mode"],
+        target_fps=options["target_fps"],
+        stride=options["stride"],
+        motion_factor=options["motion_factor"]
+    )
+    with VideoFrameReader(path, sampler=sampler, max_dim=options["max_dim"], backend=options["decoder"]) as reader:
+        return {"sampling": sampler.describe(), "decode": reader.describe()}
+
+
+def stitch_segments(segments: List[Dict[str, Any]]) -> PoseSequence:
+    """
+    Concatenate per-segment landmark streams in frame order
+
+    Any frame at or before the previous segment's last frame (possible when a
+    seek lands slightly early) is dropped so indices stay strictly increasing.
+    """
+    frame_parts, time_parts, landmark_parts = [], [], []
+    last_index = -1
+    for segment in segments:
+        keep = segment["frame_indices"] > last_index
+        if not keep.any():
+            continue
+        frame_parts.append(segment["frame_indices"][keep])
+        time_parts.append(segment["timestamps"][keep])
+        landmark_parts.append(segment["landmarks"][keep])
+        last_index = int(frame_parts[-1][-1])
+
+    if not frame_parts:
+        return PoseSequence.empty()
+    return PoseSequence(np.concatenate(frame_parts), np.concatenate(time_parts), np.concatenate(landmark_parts))
+
+
+def extract_segment_star(args: tuple) -> Dict[str, Any]:
+    """Pool.map adapter for extract_segment"""
+    return extract_segment(*args)
+
+
+def _init_pool_process(initializer: Optional[Callable[[], None]], warm_options: List[Dict[str, Any]]):
+    """Pool initializer: the owner's set-up, then the pose graphs of every tier"""
+    if initializer is not None:
+        initializer()
+    for options in warm_options:
+        try:
+            warm_extractor(options)
+        except Exception as e:
+            # Not fatal: the extractor is built by the first segment instead
+            logger.warning(f"Could not warm up a segment pose extractor: {e}")
+
+
+def _extract_pooled_segment(job: tuple) -> Dict[str, Any]:
+    """extract_segment_star in a pool process, with the segment's own peak memory"""
+    reset_peak_rss()
+    return extract_segment_star(job)
+
+
+class SegmentPool:
+    """
+    Long-lived processes extracting the segments of successive videos
+
+    Each process warms the pose graphs of `warm_options` (one entry per
+    tier) when it starts and keeps them in its extractor cache, so segments
+    of later videos only pay for a tracking reset. The pool belongs to the
+    process that created it: a copy inherited through fork is not usable.
+    """
+
+    def __init__(
+        self,
+        processes: int,
+        warm_options: Iterable[Dict[str, Any]] = (),
+        initializer: Optional[Callable[[], None]] = None,
+        maxtasksperchild: Optional[int] = None
+    ):
+        self.processes = processes
+        self.owner_pid = os.getpid()
+        self._pool = Pool(
+            processes=processes,
+            initializer=_init_pool_process,
+            initargs=(initializer, list(warm_options)),
+            maxtasksperchild=maxtasksperchild
+        )
+
+    @property
+    def usable(self) -> bool:
+        return self._pool is not None and self.owner_pid == os.getpid()
+
+    def map(self, jobs: List[tuple]) -> List[Dict[str, Any]]:
+        """extract_segment results of `jobs`, in order"""
+        try:
+            # One job per segment rather than Pool.map: billiard credits a whole
+            # map to a single process, so the others stall on exit waiting for
+            # their results to be acknowledged
+            pending = [self._pool.apply_async(_extract_pooled_segment, (job,)) for job in jobs]
+            return [result.get() for result in pending]
+        except WorkerLostError:
+            # A segment process died (e.g. out of memory): the owner starts a fresh pool
+            self.close()
+            raise
+
+    def close(self):
+        """Stop the processes (owner only; an inherited copy is just dropped)"""
+        if self.usable:
+            self._pool.terminate()
+            self._pool.join()
+        self._pool = None
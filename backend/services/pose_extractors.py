@@ -0,0 +1,223 @@
+"""
+Pose Extractors
+Interchangeable MediaPipe backends producing one (33, 4) landmark array per frame
+"""
+import logging
+import os
+import tempfile
+import urllib.request
+from typing import Dict, Any, Optional, Tuple
+
+import mediapipe as mp
+import numpy as np
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+EXTRACTORS = ("solutions", "tasks")
+
+# PoseLandmarker bundles, selected by model complexity like the legacy graph
+TASKS_MODELS = {0: "lite", 1: "full", 2: "heavy"}
+TASKS_MODEL_URL = (
+    "https://storage.googleapis.com/mediapipe-models/pose_landmarker/"
+    "pose_landmarker_{variant}/float16/latest/pose_landmarker_{variant}.task"
+)
+
+MIN_DETECTION_CONFIDENCE = 0.5
+
+
+def model_path(variant: str, model_dir: str) -> str:
+    """
+    Local path of a PoseLandmarker bundle, downloaded once into model_dir
+
+    The download goes to a temporary file renamed into place, so concurrent
+    workers never load a partial model.
+    """
+    if variant not in TASKS_MODELS.values():
+        raise ValueError(f"Unknown pose model '{variant}'. Allowed: {', '.join(TASKS_MODELS.values())}")
+
+    path = os.path.join(model_dir, f"pose_landmarker_{variant}.task")
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(model_dir, exist_ok=True)
+    url = TASKS_MODEL_URL.format(variant=variant)
+    logger.info(f"Downloading pose model {variant} from {url}")
+    fd, tmp_path = tempfile.mkstemp(dir=model_dir, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out, urllib.request.urlopen(url, timeout=60) as response:
+            while True:
+                block = response.read(1 << 20)
+                if not block:
+                    break
+                out.write(block)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return path
+
+
+class PoseExtractor:
+    """
+    Common interface of the pose backends
+
+    `detect` is called with strictly increasing timestamps within one video;
+    `reset` must be called before feeding frames of another video or segment.
+    """
+    name = "base"
+
+    def detect(self, image_rgb: np.ndarray, timestamp_ms: int) -> Optional[np.ndarray]:
+        """(33, 4) float32 x, y, z, visibility of the detected pose, None without one"""
+        raise NotImplementedError
+
+    def reset(self):
+        """Drop tracking state"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def describe(self) -> Dict[str, Any]:
+        return {"extractor": self.name}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class SolutionsPoseExtractor(PoseExtractor):
+    """Legacy mp.solutions.pose graph"""
+    name = "solutions"
+
+    def __init__(self, model_complexity: int = 1):
+        self.model_complexity = model_complexity
+        self._pose = mp.solutions.pose.Pose(
+            static_image_mode=False,
+            model_complexity=model_complexity,
+            enable_segmentation=False,
+            min_detection_confidence=MIN_DETECTION_CONFIDENCE
+        )
+
+    def detect(self, image_rgb: np.ndarray, timestamp_ms: int) -> Optional[np.ndarray]:
+        results = self._pose.process(image_rgb)
+        if not results.pose_landmarks:
+            return None
+        return np.array(
+            [(lm.x, lm.y, lm.z, lm.visibility) for lm in results.pose_landmarks.landmark],
+            dtype=np.float32
+        )
+
+    def reset(self):
+        # Restarts the graph run: tracking and smoothing state are dropped,
+        # the loaded model is kept
+        self._pose.reset()
+
+    def close(self):
+        if self._pose is not None:
+            self._pose.close()
+            self._pose = None
+
+    def describe(self) -> Dict[str, Any]:
+        return {"extractor": self.name, "model_complexity": self.model_complexity}
+
+
+class TasksPoseExtractor(PoseExtractor):
+    """
+    MediaPipe Tasks PoseLandmarker in VIDEO mode
+
+    Frames carry explicit timestamps, which the landmarker uses for tracking
+    and temporal filtering instead of assuming a constant frame rate.
+    """
+    name = "tasks"
+
+    def __init__(self, model_complexity: int = 1, model_dir: Optional[str] = None):
+        self.model_complexity = model_complexity
+        self.variant = TASKS_MODELS[model_complexity]
+        self.model_path = model_path(self.variant, model_dir or settings.ANALYSIS_MODEL_DIR)
+        self._landmarker = None
+        self._last_timestamp = -1
+        self.reset()
+
+    def _open(self):
+        vision = mp.tasks.vision
+        options = vision.PoseLandmarkerOptions(
+            base_options=mp.tasks.BaseOptions(model_asset_path=self.model_path),
+            running_mode=vision.RunningMode.VIDEO,
+            num_poses=1,
+            min_pose_detection_confidence=MIN_DETECTION_CONFIDENCE,
+            output_segmentation_masks=False
+        )
+        return vision.PoseLandmarker.create_from_options(options)
+
+    def detect(self, image_rgb: np.ndarray, timestamp_ms: int) -> Optional[np.ndarray]:
+        # VIDEO mode rejects non-increasing timestamps (e.g. duplicated container pts)
+        timestamp_ms = max(int(timestamp_ms), self._last_timestamp + 1)
+        self._last_timestamp = timestamp_ms
+
+        image = mp.Image(image_format=mp.ImageFormat.SRGB, data=np.ascontiguousarray(image_rgb))
+        result = self._landmarker.detect_for_video(image, timestamp_ms)
+        if not result.pose_landmarks:
+            return None
+        return np.array(
+            [(lm.x, lm.y, lm.z, lm.visibility) for lm in result.pose_landmarks[0]],
+            dtype=np.float32
+        )
+
+    def reset(self):
+        # A VIDEO-mode landmarker cannot go back in time: start a new one
+        self.close()
+        self._landmarker = self._open()
+        self._last_timestamp = -1
+
+    def close(self):
+        if self._landmarker is not None:
+            self._landmarker.close()
+            self._landmarker = None
+
+    def describe(self) -> Dict[str, Any]:
+        return {"extractor": self.name, "model": self.variant}
+
+
+def create_extractor(options: Dict[str, Any]) -> PoseExtractor:
+    """Extractor selected by extraction options ("extractor" and "model_complexity")"""
+    name = options.get("extractor", "solutions")
+    if name == "solutions":
+        return SolutionsPoseExtractor(options["model_complexity"])
+    if name == "tasks":
+        return TasksPoseExtractor(options["model_complexity"])
+    raise ValueError(f"Unknown pose extractor '{name}'. Allowed: {', '.join(EXTRACTORS)}")
+
+
+# Extractors kept alive per process, by (extractor, model_complexity).
+# Keyed by pid as well: graphs inherited through fork cannot be used (their
+# threads are gone) and are left untouched rather than closed.
+_cache: Dict[int, Dict[Tuple[str, int], PoseExtractor]] = {}
+
+
+def cached_extractor(options: Dict[str, Any]) -> PoseExtractor:
+    """
+    This process's extractor for the options, reset for a new video
+
+    The graph and model are built once per process; later videos only pay
+    for the tracking reset.
+    """
+    extractors = _cache.setdefault(os.getpid(), {})
+    key = (options.get("extractor", "solutions"), options["model_complexity"])
+    extractor = extractors.get(key)
+    if extractor is None:
+        extractor = extractors[key] = create_extractor(options)
+    else:
+        extractor.reset()
+    return extractor
+
+
+def warm_extractor(options: Dict[str, Any], size: int = 256):
+    """Build the cached extractor and run one blank frame through it (graph start-up)"""
+    extractor = cached_extractor(options)
+    extractor.detect(np.zeros((size, size, 3), dtype=np.uint8), 0)
+    extractor.reset()
@@ -0,0 +1,142 @@
+"""
+Pose Sequence
+Array representation of a clip's landmarks, shared by extraction, storage and metrics
+"""
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.biomechanics import (
+    NUM_LANDMARKS,
+    LANDMARK_FIELDS,
+    empty_landmarks,
+    build_frame_records,
+)
+
+
+@dataclass
+class PoseSequence:
+    """
+    Landmarks for the analysed frames of one video
+
+    Attributes:
+        frame_indices: (frames,) int32 source frame index of each analysed frame
+        timestamps: (frames,) float64 source timestamp in seconds
+        landmarks: (frames, 33, 4) float32 x, y, z, visibility (NaN = no pose)
+    """
+    frame_indices: np.ndarray
+    timestamps: np.ndarray
+    landmarks: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.frame_indices)
+
+    def __getitem__(self, rows: slice) -> "PoseSequence":
+        """Sub-sequence of a row range (views, no copy)"""
+        return PoseSequence(self.frame_indices[rows], self.timestamps[rows], self.landmarks[rows])
+
+    @classmethod
+    def empty(cls) -> "PoseSequence":
+        return cls(np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float64), empty_landmarks(0))
+
+    @classmethod
+    def from_frames(cls, frames: List[Dict[str, Any]]) -> "PoseSequence":
+        """Build from the legacy per-frame JSON structure (Analysis.data)"""
+        if not frames:
+            return cls.empty()
+
+        landmarks = empty_landmarks(len(frames))
+        for i, frame in enumerate(frames):
+            points = frame.get("landmarks") or []
+            if len(points) == NUM_LANDMARKS:
+                landmarks[i] = [[lm[field] for field in LANDMARK_FIELDS] for lm in points]
+
+        return cls(
+            np.asarray([f.get("frame", i) for i, f in enumerate(frames)], dtype=np.int32),
+            np.asarray([f.get("timestamp", 0.0) for f in frames], dtype=np.float64),
+            landmarks,
+        )
+
+    def to_frames(self, landmark_indices: Optional[Sequence[int]] = None) -> List[Dict[str, Any]]:
+        """Per-frame JSON view (same structure as the legacy Analysis.data)"""
+        return build_frame_records(self.frame_indices, self.timestamps, self.landmarks, landmark_indices)
+
+
+class PoseSequenceBuffer:
+    """
+    Preallocated landmark storage filled one analysed frame at a time
+
+    Rows are written in place into (capacity, 33, 4) arrays, so extraction
+    keeps no per-frame Python objects and needs no final stack. Capacity
+    doubles when exceeded; `take` hands the rows out and keeps the arrays
+    for the next chunk.
+    """
+
+    def __init__(self, capacity: int = 256):
+        capacity = max(1, capacity)
+        self.frame_indices = np.empty(capacity, dtype=np.int32)
+        self.timestamps = np.empty(capacity, dtype=np.float64)
+        self.landmarks = empty_landmarks(capacity)
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def capacity(self) -> int:
+        return len(self.frame_indices)
+
+    def _grow(self, capacity: int):
+        frame_indices = np.empty(capacity, dtype=np.int32)
+        timestamps = np.empty(capacity, dtype=np.float64)
+        landmarks = empty_landmarks(capacity)
+        frame_indices[:self.size] = self.frame_indices[:self.size]
+        timestamps[:self.size] = self.timestamps[:self.size]
+        landmarks[:self.size] = self.landmarks[:self.size]
+        self.frame_indices, self.timestamps, self.landmarks = frame_indices, timestamps, landmarks
+
+    def append(self, frame_index: int, timestamp: float, landmarks: Optional[np.ndarray]):
+        """Add one analysed frame; None landmarks = no pose (NaN row)"""
+        if self.size == self.capacity:
+            self._grow(2 * self.capacity)
+        row = self.size
+        self.frame_indices[row] = frame_index
+        self.timestamps[row] = timestamp
+        self.landmarks[row] = np.nan if landmarks is None else landmarks
+        self.size += 1
+
+    def take(self) -> PoseSequence:
+        """Filled rows as a compact sequence (copied), emptying the buffer"""
+        rows = slice(0, self.size)
+        sequence = PoseSequence(
+            self.frame_indices[rows].copy(), self.timestamps[rows].copy(), self.landmarks[rows].copy()
+        )
+        self.size = 0
+        return sequence
+
+
+def select_window(
+    frame_indices: np.ndarray,
+    timestamps: np.ndarray,
+    start_time: Optional[float] = None,
+    end_time: Optional[float] = None,
+    start_frame: Optional[int] = None,
+    end_frame: Optional[int] = None
+) -> Tuple[int, int]:
+    """
+    Row range [lo, hi) of the analysed frames inside a time and/or source-frame window
+
+    Bounds are half-open: start inclusive, end exclusive. Both arrays must be
+    sorted ascending, which extraction guarantees.
+    """
+    lo, hi = 0, len(frame_indices)
+    if start_time is not None:
+        lo = max(lo, int(np.searchsorted(timestamps, start_time, side="left")))
+    if end_time is not None:
+        hi = min(hi, int(np.searchsorted(timestamps, end_time, side="left")))
+    if start_frame is not None:
+        lo = max(lo, int(np.searchsorted(frame_indices, start_frame, side="left")))
+    if end_frame is not None:
+        hi = min(hi, int(np.searchsorted(frame_indices, end_frame, side="left")))
+    return lo, max(lo, hi)
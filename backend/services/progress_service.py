@@ -0,0 +1,162 @@
+"""
+Progress Service
+Maintains and serves per-user metric time series across analysed videos
+"""
+import logging
+from datetime import datetime
+from typing import Dict, Any, Iterable, Optional, Sequence
+
+from sqlalchemy import func, select, delete, literal
+from sqlalchemy.dialects.postgresql import aggregate_order_by, insert
+from sqlalchemy.orm import Session
+
+from models.video import Video
+from models.analysis_metric import AnalysisMetric
+from models.user_metric_progress import UserMetricProgress
+from services.metric_summary import WHOLE_CLIP
+
+logger = logging.getLogger(__name__)
+
+# Columns filled by refresh, in the order of its aggregate query; the first
+# three identify a row, the rest are overwritten on conflict
+PROGRESS_COLUMNS = [
+    "id", "user_id", "metric", "session_count", "mean", "min", "max",
+    "first_at", "last_at", "last_value", "updated_at",
+]
+
+
+class ProgressService:
+    """Per-user aggregates over the whole-clip rows of analysis_metrics"""
+
+    @staticmethod
+    def _series_filter(user_id):
+        return (
+            AnalysisMetric.user_id == user_id,
+            AnalysisMetric.phase == WHOLE_CLIP,
+            Video.deleted_at.is_(None),
+            Video.is_reference.is_(False),
+        )
+
+    def refresh(self, db: Session, user_id, metrics: Optional[Iterable[str]] = None):
+        """
+        Recompute the user's aggregates of `metrics` (not committed, pending rows must be flushed)
+
+        Only the given metrics are touched (all of the user's when None): one
+        indexed GROUP BY over their rows, upserted on (user_id, metric), and
+        rows of metrics left without any value are removed. Refreshes of the
+        same user are serialised with a transaction-level advisory lock, so
+        analyses finishing together cannot interleave their writes.
+        """
+        if user_id is None:
+            return
+        metrics = None if metrics is None else sorted(set(metrics))
+        if metrics == []:
+            return
+
+        db.execute(select(func.pg_advisory_xact_lock(func.hashtext(str(user_id)))))
+
+        series = self._series_filter(user_id)
+        if metrics is not None:
+            series += (AnalysisMetric.metric.in_(metrics),)
+
+        aggregated = (
+            select(
+                func.gen_random_uuid(),
+                AnalysisMetric.user_id,
+                AnalysisMetric.metric,
+                func.count(),
+                func.avg(AnalysisMetric.mean),
+                func.min(AnalysisMetric.mean),
+                func.max(AnalysisMetric.mean),
+                func.min(AnalysisMetric.recorded_at),
+                func.max(AnalysisMetric.recorded_at),
+                func.array_agg(aggregate_order_by(AnalysisMetric.mean, AnalysisMetric.recorded_at.desc()))[1],
+                literal(datetime.utcnow()),
+            )
+            .join(Video, Video.id == AnalysisMetric.video_id)
+            .where(*series)
+            .group_by(AnalysisMetric.user_id, AnalysisMetric.metric)
+        )
+        upsert = insert(UserMetricProgress).from_select(PROGRESS_COLUMNS, aggregated)
+        db.execute(upsert.on_conflict_do_update(
+            index_elements=[UserMetricProgress.user_id, UserMetricProgress.metric],
+            set_={column: upsert.excluded[column] for column in PROGRESS_COLUMNS[3:]}
+        ))
+
+        stale = delete(UserMetricProgress).where(
+            UserMetricProgress.user_id == user_id,
+            UserMetricProgress.metric.not_in(
+                select(AnalysisMetric.metric).join(Video, Video.id == AnalysisMetric.video_id).where(*series)
+            )
+        )
+        if metrics is not None:
+            stale = stale.where(UserMetricProgress.metric.in_(metrics))
+        db.execute(stale)
+
+    def get_progress(
+        self,
+        db: Session,
+        user_id,
+        metrics: Optional[Sequence[str]] = None,
+        limit: int = 50
+    ) -> Dict[str, Any]:
+        """
+        Summary and the most recent `limit` points of each metric, oldest first
+
+        Two indexed queries regardless of how many videos the user has.
+        """
+        summary_query = db.query(UserMetricProgress).filter(UserMetricProgress.user_id == user_id)
+        if metrics:
+            summary_query = summary_query.filter(UserMetricProgress.metric.in_(metrics))
+
+        result: Dict[str, Any] = {}
+        for row in summary_query.order_by(UserMetricProgress.metric):
+            result[row.metric] = {
+                "summary": {
+                    "session_count": row.session_count,
+                    "mean": row.mean,
+                    "min": row.min,
+                    "max": row.max,
+                    "first_at": row.first_at,
+                    "last_at": row.last_at,
+                    "last_value": row.last_value,
+                },
+                "series": [],
+            }
+        if not result:
+            return result
+
+        rank = func.row_number().over(
+            partition_by=AnalysisMetric.metric,
+            order_by=AnalysisMetric.recorded_at.desc()
+        ).label("rank")
+        recent = (
+            select(
+                AnalysisMetric.metric,
+                AnalysisMetric.video_id,
+                AnalysisMetric.recorded_at,
+                AnalysisMetric.mean,
+                AnalysisMetric.p10,
+                AnalysisMetric.p90,
+                rank,
+            )
+            .join(Video, Video.id == AnalysisMetric.video_id)
+            .where(*self._series_filter(user_id), AnalysisMetric.metric.in_(list(result)))
+            .subquery()
+        )
+        points = db.execute(
+            select(recent).where(recent.c.rank <= limit).order_by(recent.c.metric, recent.c.recorded_at)
+        )
+        for point in points:
+            result[point.metric]["series"].append({
+                "video_id": point.video_id,
+                "recorded_at": point.recorded_at,
+                "mean": point.mean,
+                "p10": point.p10,
+                "p90": point.p90,
+            })
+        return result
+
+
+# Create singleton instance
+progress_service = ProgressService()
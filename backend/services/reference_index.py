@@ -0,0 +1,126 @@
+"""
+Reference Index
+In-process nearest-neighbour index over the pose embeddings of reference strokes
+"""
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, cast, String
+from sqlalchemy.orm import Session
+
+from models.video import Video
+from models.stroke import Stroke
+from services.pose_embedding import EMBEDDING_VERSION, EMBEDDING_DIM, nearest
+
+logger = logging.getLogger(__name__)
+
+
+class ReferenceIndex:
+    """
+    Embedding matrix of every stroke of every reference video
+
+    Loaded lazily and kept in memory; each search first checks a cheap
+    fingerprint of the catalogue (row count, newest row and a checksum of the
+    stroke ids) and reloads only when it changed. Search is exact brute force,
+    which stays in the millisecond range up to tens of thousands of strokes;
+    an ANN structure can replace `nearest` beyond that without changing callers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fingerprint = None
+        self._matrix = np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+        self._rows: List[Dict[str, Any]] = []
+
+    @staticmethod
+    def _catalogue(query):
+        return query.join(Video, Video.id == Stroke.video_id).filter(
+            Video.is_reference == True,
+            Video.deleted_at.is_(None),
+            Stroke.embedding_version == EMBEDDING_VERSION,
+            Stroke.embedding.isnot(None)
+        )
+
+    def _current_fingerprint(self, db: Session) -> Tuple:
+        return tuple(self._catalogue(db.query(
+            func.count(Stroke.id),
+            func.max(Stroke.created_at),
+            func.sum(func.hashtext(cast(Stroke.id, String)))
+        )).one())
+
+    def _load(self, db: Session, fingerprint: Tuple):
+        strokes = self._catalogue(db.query(Stroke, Video.filename)).order_by(
+            Stroke.video_id, Stroke.stroke_index
+        ).all()
+        matrix = np.asarray([stroke.embedding for stroke, _ in strokes], dtype=np.float32).reshape(-1, EMBEDDING_DIM)
+        rows = [
+            {
+                "video_id": str(stroke.video_id),
+                "filename": filename,
+                "stroke_index": stroke.stroke_index,
+                "stroke_type": stroke.stroke_type,
+                "side": stroke.side,
+                "start_time": stroke.start_time,
+                "end_time": stroke.end_time,
+                "contact_time": stroke.contact_time,
+            }
+            for stroke, filename in strokes
+        ]
+        self._matrix, self._rows, self._fingerprint = matrix, rows, fingerprint
+        logger.info(f"Reference index loaded: {len(rows)} strokes")
+
+    def refresh(self, db: Session):
+        fingerprint = self._current_fingerprint(db)
+        if fingerprint != self._fingerprint:
+            with self._lock:
+                if fingerprint != self._fingerprint:
+                    self._load(db, fingerprint)
+
+    def search(
+        self,
+        db: Session,
+        queries: np.ndarray,
+        k: int = 5,
+        stroke_types: Optional[List[str]] = None,
+        exclude_video_id: Optional[str] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        k closest reference strokes for each query embedding
+
+        Args:
+            queries: (n, EMBEDDING_DIM) embeddings
+            stroke_types: Optional stroke type per query; when known (not
+                "unknown"), only references of the same type are considered
+            exclude_video_id: Video whose own strokes are skipped, so a
+                reference queried against the catalogue does not match itself
+
+        Returns:
+            One list of matches (reference stroke fields + distance) per query
+        """
+        self.refresh(db)
+        matrix, rows = self._matrix, self._rows
+        if len(rows) == 0 or len(queries) == 0:
+            return [[] for _ in range(len(queries))]
+
+        types = np.asarray([row["stroke_type"] for row in rows])
+        allowed = np.asarray([row["video_id"] != exclude_video_id for row in rows])
+        if not allowed.any():
+            return [[] for _ in range(len(queries))]
+        results = []
+        for i, query in enumerate(np.asarray(queries, dtype=np.float32).reshape(-1, EMBEDDING_DIM)):
+            candidates = np.nonzero(allowed)[0]
+            wanted = stroke_types[i] if stroke_types else None
+            if wanted and wanted != "unknown" and (allowed & (types == wanted)).any():
+                candidates = np.nonzero(allowed & (types == wanted))[0]
+            indices, distances = nearest(matrix[candidates], query[None, :], k)
+            results.append([
+                {**rows[candidates[index]], "distance": float(distance)}
+                for index, distance in zip(indices[0], distances[0])
+            ])
+        return results
+
+
+# Create singleton instance
+reference_index = ReferenceIndex()
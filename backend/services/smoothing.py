@@ -0,0 +1,252 @@
+"""
+Landmark Smoothing
+Gap filling and temporal filters applied to whole landmark sequences
+"""
+import numpy as np
+from typing import Dict, Any, Tuple
+
+from services.pose_sequence import PoseSequence
+
+SMOOTHING_METHODS = ("none", "savgol", "one_euro")
+
+# Only positions are filtered; visibility is a confidence, not a trajectory
+POSITION_FIELDS = slice(0, 3)
+# Upper bound on frames taken on each side of a Savitzky-Golay window
+MAX_SAVGOL_HALF_FRAMES = 32
+
+
+def fill_gaps(
+    landmarks: np.ndarray,
+    timestamps: np.ndarray,
+    max_gap_seconds: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Linearly interpolate short runs of missing values over time
+
+    A run of NaN is filled when it has a valid value on both sides at most
+    `max_gap_seconds` apart; longer gaps and leading/trailing runs stay NaN.
+    Columns are interpolated one at a time with np.interp, so temporaries
+    scale with the missing frames of one column, not with the whole array.
+
+    Returns:
+        Tuple of (filled (frames, 33, 4) array, (frames,) mask of frames that
+        had no pose and now have one)
+    """
+    frames = len(landmarks)
+    if frames == 0 or max_gap_seconds <= 0:
+        return landmarks, np.zeros(frames, dtype=bool)
+
+    values = landmarks.reshape(frames, -1)
+    filled = values.copy()
+    for column in range(values.shape[1]):
+        series = values[:, column]
+        valid = ~np.isnan(series)
+        valid_rows = np.flatnonzero(valid)
+        if len(valid_rows) < 2 or len(valid_rows) == frames:
+            continue
+
+        missing_rows = np.flatnonzero(~valid)
+        # Valid neighbours on either side of each missing frame
+        after = np.searchsorted(valid_rows, missing_rows)
+        bounded = (after > 0) & (after < len(valid_rows))
+        missing_rows, after = missing_rows[bounded], after[bounded]
+        span = timestamps[valid_rows[after]] - timestamps[valid_rows[after - 1]]
+        missing_rows = missing_rows[span <= max_gap_seconds]
+        if len(missing_rows):
+            filled[missing_rows, column] = np.interp(
+                timestamps[missing_rows], timestamps[valid_rows], series[valid_rows]
+            )
+
+    was_missing = np.isnan(values).all(axis=1)
+    now_present = ~np.isnan(filled).all(axis=1)
+    return filled.reshape(landmarks.shape), was_missing & now_present
+
+
+def savgol_coefficients(window: int, polyorder: int) -> np.ndarray:
+    """Savitzky-Golay smoothing kernel (value at the window centre) via least squares"""
+    if window % 2 == 0 or window < 3:
+        raise ValueError("Savitzky-Golay window must be an odd number >= 3")
+    if polyorder >= window:
+        raise ValueError("Savitzky-Golay polyorder must be smaller than the window")
+
+    half = window // 2
+    offsets = np.arange(-half, half + 1, dtype=np.float64)
+    vandermonde = offsets[:, None] ** np.arange(polyorder + 1)[None, :]
+    # Row 0 of the pseudo-inverse evaluates the fitted polynomial at offset 0
+    return np.linalg.pinv(vandermonde)[0]
+
+
+def savgol_windows(timestamps: np.ndarray, window_seconds: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    [start, end) frame range of each frame's time window
+
+    The window spans `window_seconds / 2` on either side of the frame, by
+    timestamp, and at most MAX_SAVGOL_HALF_FRAMES frames on each side.
+    """
+    reach = window_seconds / 2
+    rows = np.arange(len(timestamps))
+    start = np.maximum(np.searchsorted(timestamps, timestamps - reach - 1e-9, side="left"), rows - MAX_SAVGOL_HALF_FRAMES)
+    end = np.minimum(np.searchsorted(timestamps, timestamps + reach + 1e-9, side="right"), rows + MAX_SAVGOL_HALF_FRAMES + 1)
+    return start, end
+
+
+def savgol_kernels(timestamps: np.ndarray, window_seconds: float, polyorder: int) -> Tuple[np.ndarray, int]:
+    """
+    Per-frame Savitzky-Golay kernels over a time window
+
+    Each frame fits a polynomial of `polyorder` in time to the frames of its
+    window (see savgol_windows), using their real timestamps, so the amount
+    of smoothing does not depend on how densely the clip was sampled. On a
+    regular frame grid this is the classic filter (savgol_coefficients).
+
+    Returns:
+        Tuple of ((frames, 2 * half + 1) kernels, half) where kernel column
+        j weighs frame i + j - half; frames outside the window weigh 0
+    """
+    frames = len(timestamps)
+    start, end = savgol_windows(timestamps, window_seconds)
+    rows = np.arange(frames)
+    half = int(max((rows - start).max(), (end - 1 - rows).max()))
+
+    positions = rows[:, None] + np.arange(-half, half + 1)[None, :]
+    inside = (positions >= start[:, None]) & (positions < end[:, None])
+    offsets = timestamps[np.clip(positions, 0, frames - 1)] - timestamps[:, None]
+    # Scaled to the window so the least-squares fit stays well conditioned
+    scaled = np.where(inside, offsets / max(window_seconds / 2, 1e-9), 0.0)
+    vandermonde = (scaled[:, :, None] ** np.arange(polyorder + 1)) * inside[:, :, None]
+    # Least-squares fit evaluated at the frame itself (offset 0): row 0 of
+    # (V^T V)^+ V^T, through the small (polyorder + 1)^2 normal matrices
+    normal = np.einsum("fwi,fwj->fij", vandermonde, vandermonde)
+    kernels = np.einsum("fi,fwi->fw", np.linalg.pinv(normal)[:, 0, :], vandermonde)
+    return kernels, half
+
+
+def savgol_smooth(
+    landmarks: np.ndarray,
+    timestamps: np.ndarray,
+    window_seconds: float = 0.12,
+    polyorder: int = 2
+) -> np.ndarray:
+    """
+    Savitzky-Golay filter along the time axis for every landmark position
+
+    The window is in seconds (see savgol_kernels). Frames whose window
+    touches a missing value keep their raw value, so gaps never bleed into
+    neighbours; so do frames with too few neighbours to fit the polynomial.
+    """
+    frames = len(landmarks)
+    if frames <= polyorder or window_seconds <= 0:
+        return landmarks
+
+    kernels, half = savgol_kernels(timestamps, window_seconds, polyorder)
+    positions = landmarks[:, :, POSITION_FIELDS].astype(np.float64)
+    missing = np.isnan(positions)
+    padded = np.zeros((frames + 2 * half,) + positions.shape[1:])
+    padded[half:half + frames] = positions
+    padded[half:half + frames][missing] = 0.0
+
+    # One pass per window offset: each frame applies its own kernel weight
+    smoothed = np.zeros_like(positions)
+    for offset in range(2 * half + 1):
+        smoothed += kernels[:, offset, None, None] * padded[offset:offset + frames]
+
+    # Missing values inside each window, from running counts
+    start, end = savgol_windows(timestamps, window_seconds)
+    counts = np.concatenate([np.zeros((1,) + missing.shape[1:], dtype=np.int32), np.cumsum(missing, axis=0, dtype=np.int32)])
+    touched = counts[end] - counts[start] > 0
+    too_few = (end - start <= polyorder)[:, None, None]
+
+    keep_raw = touched | too_few
+    smoothed[keep_raw] = positions[keep_raw]
+    result = landmarks.copy()
+    result[:, :, POSITION_FIELDS] = smoothed
+    return result
+
+
+def one_euro_smooth(
+    landmarks: np.ndarray,
+    timestamps: np.ndarray,
+    min_cutoff: float = 1.0,
+    beta: float = 5.0,
+    d_cutoff: float = 1.0
+) -> np.ndarray:
+    """
+    One-Euro filter (Casiez et al.) along the time axis
+
+    The filter is recursive, so frames are visited in order, but each step
+    updates every landmark coordinate at once. Missing values pass through as
+    NaN without disturbing the filter state.
+    """
+    frames = len(landmarks)
+    if frames < 2:
+        return landmarks
+
+    positions = landmarks[:, :, POSITION_FIELDS].astype(np.float64)
+    output = positions.copy()
+
+    def alpha(cutoff, dt):
+        tau = 1.0 / (2 * np.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    state = positions[0].copy()
+    derivative = np.zeros_like(state)
+    last_time = np.full(state.shape, timestamps[0])
+
+    for i in range(1, frames):
+        x = positions[i]
+        present = ~np.isnan(x)
+        dt = np.maximum(timestamps[i] - last_time, 1e-6)
+
+        # Coordinates seen for the first time start from their raw value
+        fresh = present & np.isnan(state)
+        state = np.where(fresh, x, state)
+
+        raw_derivative = np.where(present & ~fresh, (x - state) / dt, 0.0)
+        a_d = alpha(d_cutoff, dt)
+        derivative = np.where(present, a_d * raw_derivative + (1 - a_d) * derivative, derivative)
+
+        a = alpha(min_cutoff + beta * np.abs(derivative), dt)
+        state = np.where(present & ~fresh, a * x + (1 - a) * state, state)
+        last_time = np.where(present, timestamps[i], last_time)
+        output[i] = np.where(present, state, np.nan)
+
+    result = landmarks.copy()
+    result[:, :, POSITION_FIELDS] = output
+    return result
+
+
+def smooth_sequence(
+    sequence: PoseSequence,
+    method: str = "savgol",
+    max_gap_seconds: float = 0.0,
+    savgol_window_seconds: float = 0.12,
+    savgol_polyorder: int = 2,
+    one_euro_min_cutoff: float = 1.0,
+    one_euro_beta: float = 5.0
+) -> Tuple[PoseSequence, Dict[str, Any]]:
+    """
+    Post-processing stage: fill short gaps, then smooth positions
+
+    Returns:
+        Tuple of (cleaned sequence, description recorded in processing info)
+    """
+    if method not in SMOOTHING_METHODS:
+        raise ValueError(f"Unknown smoothing method '{method}'. Allowed: {', '.join(SMOOTHING_METHODS)}")
+
+    landmarks, filled = fill_gaps(sequence.landmarks, sequence.timestamps, max_gap_seconds)
+    if method == "savgol":
+        landmarks = savgol_smooth(landmarks, sequence.timestamps, savgol_window_seconds, savgol_polyorder)
+    elif method == "one_euro":
+        landmarks = one_euro_smooth(landmarks, sequence.timestamps, one_euro_min_cutoff, one_euro_beta)
+
+    description = {
+        "method": method,
+        "max_gap_seconds": max_gap_seconds,
+        "filled_frames": int(filled.sum()),
+    }
+    if method == "savgol":
+        description.update({"window_seconds": savgol_window_seconds, "polyorder": savgol_polyorder})
+    elif method == "one_euro":
+        description.update({"min_cutoff": one_euro_min_cutoff, "beta": one_euro_beta})
+
+    return PoseSequence(sequence.frame_indices, sequence.timestamps, landmarks), description
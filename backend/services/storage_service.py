@@ -4,11 +4,13 @@ Handles video upload, retrieval, and deletion from MinIO object storage
 """
 import io
 import os
+import hashlib
 import uuid
 import subprocess
 from datetime import timedelta
 from typing import Optional, BinaryIO
 from minio import Minio
+from minio.commonconfig import CopySource
 from minio.error import S3Error
 from PIL import Image
 import magic
@@ -25,12 +27,7 @@ class StorageService:
     def __init__(self):
         """Initialize MinIO client"""
         # Internal client for backend operations (upload/delete)
-        self.client = Minio(
-            settings.MINIO_ENDPOINT,
-            access_key=settings.MINIO_ACCESS_KEY,
-            secret_key=settings.MINIO_SECRET_KEY,
-            secure=settings.MINIO_SECURE
-        )
+        self.client = self._internal_client()
         
         # External client for generating browser-accessible URLs (signing)
         # This ensures the signature matches the Host header sent by the browser
@@ -47,6 +44,24 @@ class StorageService:
         self.bucket_name = settings.MINIO_BUCKET_NAME
         self._ensure_bucket_exists()
 
+    @staticmethod
+    def _internal_client() -> Minio:
+        return Minio(
+            settings.MINIO_ENDPOINT,
+            access_key=settings.MINIO_ACCESS_KEY,
+            secret_key=settings.MINIO_SECRET_KEY,
+            secure=settings.MINIO_SECURE
+        )
+
+    def reset_client(self):
+        """
+        Replace the internal client with a new one and its own connection pool
+
+        For forked processes: kept-alive sockets inherited from the parent
+        would interleave the requests of both processes.
+        """
+        self.client = self._internal_client()
+
     def _ensure_bucket_exists(self):
         """Create bucket if it doesn't exist"""
         try:
@@ -194,6 +209,59 @@ class StorageService:
             logger.error(f"Error generating thumbnail: {e}")
             return None
 
+    def cut_clip(
+        self,
+        video_path: str,
+        output_path: str,
+        start_time: float,
+        duration: float
+    ) -> Optional[str]:
+        """
+        Cut a clip from a video using FFmpeg stream copy (no re-encoding)
+        
+        The cut starts at the keyframe at or before start_time, so clips may
+        begin slightly early.
+        
+        Args:
+            video_path: Local path to video file
+            output_path: Local path for clip output
+            start_time: Clip start in seconds
+            duration: Clip length in seconds
+            
+        Returns:
+            Path to generated clip or None if failed
+        """
+        try:
+            cmd = [
+                "ffmpeg",
+                "-v", "error",
+                "-ss", f"{max(0.0, start_time):.3f}",
+                "-i", video_path,
+                "-t", f"{duration:.3f}",
+                "-c", "copy",
+                "-avoid_negative_ts", "make_zero",
+                "-y",  # Overwrite output file
+                output_path
+            ]
+
+            result = subprocess.run(
+                cmd,
+                capture_output=True,
+                text=True,
+                timeout=60
+            )
+
+            if result.returncode == 0:
+                logger.info(f"Cut clip: {output_path}")
+                return output_path
+            else:
+                logger.error(f"FFmpeg error: {result.stderr}")
+                return None
+
+        except Exception as e:
+            logger.error(f"Error cutting clip: {e}")
+            return None
+
     def upload_thumbnail(
         self,
         thumbnail_path: str,
@@ -229,6 +297,153 @@ class StorageService:
             logger.error(f"Error uploading thumbnail: {e}")
             raise
 
+    def upload_bytes(
+        self,
+        storage_path: str,
+        data: bytes,
+        content_type: str = "application/octet-stream"
+    ) -> str:
+        """
+        Upload an in-memory object (e.g. analysis artifacts) to MinIO
+        
+        Args:
+            storage_path: Path in MinIO bucket
+            data: Object content
+            content_type: MIME type
+            
+        Returns:
+            Storage path of uploaded object
+        """
+        try:
+            self.client.put_object(
+                self.bucket_name,
+                storage_path,
+                io.BytesIO(data),
+                len(data),
+                content_type=content_type
+            )
+            logger.info(f"Uploaded object: {storage_path} ({len(data)} bytes)")
+            return storage_path
+        except S3Error as e:
+            logger.error(f"Error uploading object: {e}")
+            raise
+
+    def get_bytes(
+        self,
+        storage_path: str,
+        offset: int = 0,
+        length: int = 0
+    ) -> bytes:
+        """
+        Read an object, or a byte range of it, from MinIO
+        
+        Args:
+            storage_path: Path in MinIO bucket
+            offset: Start of the byte range
+            length: Number of bytes to read (0 = up to the end of the object)
+            
+        Returns:
+            Object content
+        """
+        response = None
+        try:
+            response = self.client.get_object(
+                self.bucket_name,
+                storage_path,
+                offset=offset,
+                length=length
+            )
+            return response.read()
+        except S3Error as e:
+            logger.error(f"Error reading object: {e}")
+            raise
+        finally:
+            if response is not None:
+                response.close()
+                response.release_conn()
+
+    def copy_object(self, source_path: str, storage_path: str) -> str:
+        """
+        Server-side copy of an object within the bucket
+        
+        Args:
+            source_path: Existing object path
+            storage_path: Destination path
+            
+        Returns:
+            Destination storage path
+        """
+        try:
+            self.client.copy_object(
+                self.bucket_name,
+                storage_path,
+                CopySource(self.bucket_name, source_path)
+            )
+            logger.info(f"Copied object: {source_path} -> {storage_path}")
+            return storage_path
+        except S3Error as e:
+            logger.error(f"Error copying object: {e}")
+            raise
+
+    def hash_object(self, storage_path: str) -> str:
+        """
+        SHA-256 of an object, streamed so the object is never held in memory
+        
+        Args:
+            storage_path: Path in MinIO bucket
+            
+        Returns:
+            Hex digest
+        """
+        digest = hashlib.sha256()
+        response = None
+        try:
+            response = self.client.get_object(self.bucket_name, storage_path)
+            for chunk in response.stream(1024 * 1024):
+                digest.update(chunk)
+            return digest.hexdigest()
+        except S3Error as e:
+            logger.error(f"Error reading object: {e}")
+            raise
+        finally:
+            if response is not None:
+                response.close()
+                response.release_conn()
+
+    def list_paths(self, prefix: str) -> list[str]:
+        """
+        List object paths under a prefix
+        
+        Args:
+            prefix: Path prefix in MinIO bucket
+            
+        Returns:
+            Object paths, recursively
+        """
+        try:
+            return [
+                obj.object_name
+                for obj in self.client.list_objects(self.bucket_name, prefix=prefix, recursive=True)
+            ]
+        except S3Error as e:
+            logger.error(f"Error listing objects: {e}")
+            raise
+
+    def delete_prefix(self, prefix: str):
+        """
+        Delete every object under a prefix
+        
+        Args:
+            prefix: Path prefix in MinIO bucket
+        """
+        try:
+            for path in self.list_paths(prefix):
+                self.client.remove_object(self.bucket_name, path)
+            logger.info(f"Deleted objects under: {prefix}")
+        except S3Error as e:
+            logger.error(f"Error deleting objects: {e}")
+            raise
+
     @staticmethod
     def validate_video_format(file: BinaryIO) -> tuple[bool, str]:
         """
@@ -0,0 +1,152 @@
+"""
+Stroke Detection
+Finds individual strokes in a practice session from wrist speed peaks
+"""
+import numpy as np
+from typing import Dict, Any, List, Tuple
+
+from services.pose_sequence import PoseSequence
+from services.phase_segmentation import (
+    WRISTS,
+    REST_SPEED_FRACTION,
+    SPEED_SMOOTHING_SECONDS,
+    moving_average,
+    wrist_speeds,
+    summarize_phases,
+)
+
+STROKE_TYPES = ("forehand", "backhand", "serve", "unknown")
+
+MIN_PEAK_SPEED = 1.5  # Wrist speed (normalised image units per second) that counts as a swing
+MIN_STROKE_SEPARATION_SECONDS = 1.0  # Peaks closer than this belong to the same stroke
+MAX_STROKE_HALF_SECONDS = 1.5  # Longest span kept on each side of the contact
+STROKE_PADDING_SECONDS = 0.3  # Rest kept before and after the swing for preparation/recovery
+MIN_REST_SECONDS = 0.2  # Shorter pauses (e.g. the backswing reversal) do not end a stroke
+
+NOSE = 0
+SHOULDERS = {"left": 11, "right": 12}
+
+
+def find_speed_peaks(
+    speed: np.ndarray,
+    timestamps: np.ndarray,
+    min_speed: float = MIN_PEAK_SPEED,
+    min_separation: float = MIN_STROKE_SEPARATION_SECONDS
+) -> np.ndarray:
+    """
+    Rows of local speed maxima above min_speed, at least min_separation apart
+
+    When two peaks are too close the higher one wins. Returned in time order.
+    """
+    if len(speed) < 3:
+        return np.zeros(0, dtype=np.intp)
+
+    interior = (speed[1:-1] >= speed[:-2]) & (speed[1:-1] > speed[2:]) & (speed[1:-1] >= min_speed)
+    candidates = np.nonzero(interior)[0] + 1
+
+    kept: List[int] = []
+    for row in candidates[np.argsort(-speed[candidates], kind="stable")]:
+        if all(abs(timestamps[row] - timestamps[other]) >= min_separation for other in kept):
+            kept.append(int(row))
+    return np.sort(np.asarray(kept, dtype=np.intp))
+
+
+def stroke_windows(speed: np.ndarray, timestamps: np.ndarray, peaks: np.ndarray) -> List[Tuple[int, int, int]]:
+    """
+    (lo, hi, peak) row range of each stroke
+
+    A stroke spans from the last sustained rest before its peak to the first
+    one after it, padded, and never crosses the midpoint to a neighbouring peak.
+    """
+    frames = len(speed)
+    spacing = float(np.median(np.diff(timestamps))) if frames > 1 else 0.0
+    rest_window = max(1, int(round(MIN_REST_SECONDS / spacing))) if spacing > 0 else 1
+    windows = []
+    for i, peak in enumerate(peaks):
+        t_peak = timestamps[peak]
+        t_lo = t_peak - MAX_STROKE_HALF_SECONDS
+        t_hi = t_peak + MAX_STROKE_HALF_SECONDS
+        if i > 0:
+            t_lo = max(t_lo, (timestamps[peaks[i - 1]] + t_peak) / 2)
+        if i < len(peaks) - 1:
+            t_hi = min(t_hi, (timestamps[peaks[i + 1]] + t_peak) / 2)
+        bound_lo = int(np.searchsorted(timestamps, t_lo, side="left"))
+        bound_hi = int(np.searchsorted(timestamps, t_hi, side="right"))
+
+        # Rows in the middle of a long enough run of rest frames
+        rest = moving_average((speed < REST_SPEED_FRACTION * speed[peak]).astype(np.float64), rest_window) >= 1.0
+        before = np.nonzero(rest[bound_lo:peak])[0]
+        after = np.nonzero(rest[peak:bound_hi])[0]
+        start = bound_lo + int(before[-1]) if len(before) else bound_lo
+        end = peak + int(after[0]) + 1 if len(after) else bound_hi
+
+        start = max(bound_lo, int(np.searchsorted(timestamps, timestamps[start] - STROKE_PADDING_SECONDS)))
+        end = min(bound_hi, int(np.searchsorted(timestamps, timestamps[min(end, frames - 1)] + STROKE_PADDING_SECONDS, side="right")))
+        windows.append((start, max(end, peak + 1), int(peak)))
+    return windows
+
+
+def guess_stroke_type(landmarks: np.ndarray, side: str) -> str:
+    """
+    Rough stroke type from the pose at contact
+
+    Serve: hitting wrist above the nose. Otherwise forehand when the wrist is
+    on the same side of the torso as its own shoulder, backhand when it has
+    crossed over. Only a hint for grouping and labelling.
+    """
+    wrist = landmarks[WRISTS[side], :2]
+    nose = landmarks[NOSE, :2]
+    shoulder = landmarks[SHOULDERS[side], :2]
+    other = landmarks[SHOULDERS["left" if side == "right" else "right"], :2]
+    if np.isnan(np.concatenate((wrist, nose, shoulder, other))).any():
+        return "unknown"
+
+    # Image y grows downwards
+    if wrist[1] < nose[1]:
+        return "serve"
+
+    centre = (shoulder[0] + other[0]) / 2
+    wrist_side = np.sign(wrist[0] - centre)
+    shoulder_side = np.sign(shoulder[0] - centre)
+    if wrist_side == 0 or shoulder_side == 0:
+        return "unknown"
+    return "forehand" if wrist_side == shoulder_side else "backhand"
+
+
+def detect_strokes(sequence: PoseSequence) -> List[Dict[str, Any]]:
+    """
+    Split a session into strokes
+
+    The hitting arm is the wrist with the highest speed over the session.
+    Each stroke gets its bounds, contact, a type guess and its own phase
+    summary (see summarize_phases).
+    """
+    if len(sequence) < 3:
+        return []
+
+    timestamps = sequence.timestamps
+    spacing = float(np.median(np.diff(timestamps)))
+    window = max(1, int(round(SPEED_SMOOTHING_SECONDS / spacing))) if spacing > 0 else 1
+    speeds = {side: moving_average(raw, window) for side, raw in wrist_speeds(timestamps, sequence.landmarks).items()}
+    peaks = {side: np.nanmax(speed) if np.isfinite(speed).any() else 0.0 for side, speed in speeds.items()}
+    side = max(peaks, key=peaks.get)
+    speed = np.nan_to_num(speeds[side], nan=0.0)
+
+    strokes = []
+    for lo, hi, peak in stroke_windows(speed, timestamps, find_speed_peaks(speed, timestamps)):
+        end_frame = int(sequence.frame_indices[hi]) if hi < len(sequence) else int(sequence.frame_indices[-1]) + 1
+        end_time = float(timestamps[hi]) if hi < len(sequence) else float(timestamps[-1])
+        strokes.append({
+            "index": len(strokes),
+            "start_frame": int(sequence.frame_indices[lo]),
+            "end_frame": end_frame,
+            "start_time": float(timestamps[lo]),
+            "end_time": end_time,
+            "contact_frame": int(sequence.frame_indices[peak]),
+            "contact_time": float(timestamps[peak]),
+            "side": side,
+            "stroke_type": guess_stroke_type(sequence.landmarks[peak], side),
+            "peak_wrist_speed": float(speed[peak]),
+            "phases": summarize_phases(sequence[lo:hi]),
+        })
+    return strokes
@@ -0,0 +1,44 @@
+"""
+Task Manifest
+Keeps Celery task results small: bulky manifests are parked in MinIO
+"""
+import json
+import logging
+from typing import Dict, Any
+
+from config import settings
+from services.storage_service import storage_service
+
+logger = logging.getLogger(__name__)
+
+
+def manifest_prefix(video_id: str) -> str:
+    return f"analyses/{video_id}/manifests/"
+
+
+def store_manifest(video_id: str, stage: str, manifest: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Manifest to return from a task (and hand to the next stage)
+
+    Small manifests travel inline. Larger ones are uploaded and replaced by a
+    reference, so neither broker messages nor the result backend ever carry
+    more than CELERY_INLINE_RESULT_BYTES per task.
+    """
+    payload = json.dumps(manifest, separators=(",", ":")).encode()
+    if len(payload) <= settings.CELERY_INLINE_RESULT_BYTES:
+        return manifest
+
+    # One object per stage, overwritten by the next run: a redelivered stage
+    # can always read its input again
+    path = f"{manifest_prefix(video_id)}{stage}.json"
+    storage_service.upload_bytes(path, payload, "application/json")
+    logger.info(f"Manifest of {stage} for video {video_id} offloaded ({len(payload)} bytes)")
+    return {"video_id": video_id, "manifest_path": path}
+
+
+def load_manifest(manifest: Dict[str, Any]) -> Dict[str, Any]:
+    """Full manifest received from the previous stage"""
+    path = manifest.get("manifest_path")
+    if not path:
+        return manifest
+    return json.loads(storage_service.get_bytes(path))
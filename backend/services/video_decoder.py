@@ -0,0 +1,295 @@
+"""
+Video Decoder
+Decodes video frames at inference resolution for pose extraction
+"""
+import queue
+import subprocess
+import threading
+import logging
+from typing import Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from services.frame_sampling import FrameSampler
+
+logger = logging.getLogger(__name__)
+
+DECODER_BACKENDS = ("opencv", "ffmpeg")
+
+
+def compute_inference_size(width: int, height: int, max_dim: int) -> Tuple[int, int]:
+    """
+    Scale (width, height) so the longest side is at most `max_dim`
+
+    The aspect ratio is preserved, so MediaPipe's normalised landmark
+    coordinates (0-1 relative to the input image) stay valid for the
+    original full-resolution frame. Dimensions are kept even for codecs
+    and ffmpeg filters that require it. `max_dim <= 0` disables scaling.
+    """
+    if max_dim <= 0 or max(width, height) <= max_dim:
+        return width, height
+
+    scale = max_dim / float(max(width, height))
+    new_width = max(2, int(round(width * scale / 2)) * 2)
+    new_height = max(2, int(round(height * scale / 2)) * 2)
+    return new_width, new_height
+
+
+def probe_video(path: str) -> Tuple[float, int]:
+    """Return (fps, frame_count) from the container metadata"""
+    cap = cv2.VideoCapture(path)
+    try:
+        return cap.get(cv2.CAP_PROP_FPS) or 0.0, int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+    finally:
+        cap.release()
+
+
+class VideoFrameReader:
+    """
+    Iterates over sampled video frames as RGB images at inference resolution
+
+    Frames are resized *before* colour conversion so the expensive per-pixel
+    work runs on the small image. Two backends are available:
+        opencv: cv2.VideoCapture + cv2.resize (INTER_AREA)
+        ffmpeg: ffmpeg subprocess with a scale filter, writing raw RGB frames
+                to a pipe (no colour conversion left in Python)
+
+    Yields (source_frame_index, timestamp_seconds, rgb_image). A
+    [start_frame, end_frame) range restricts decoding to one segment of the
+    video; frame indices stay absolute.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        sampler: Optional[FrameSampler] = None,
+        max_dim: int = 0,
+        backend: str = "opencv",
+        start_frame: int = 0,
+        end_frame: Optional[int] = None
+    ):
+        if backend not in DECODER_BACKENDS:
+            raise ValueError(f"Unknown decoder backend '{backend}'. Allowed: {', '.join(DECODER_BACKENDS)}")
+
+        self.path = path
+        self.backend = backend
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise ValueError(f"Could not open video: {path}")
+
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 0.0
+        self.frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        self.source_size = (
+            int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        )
+        self.inference_size = compute_inference_size(*self.source_size, max_dim)
+        self.sampler = sampler or FrameSampler(mode="all")
+        self.sampler.configure(self.fps)
+        self.start_frame = start_frame
+        self.end_frame = end_frame
+        # Absolute index of the next frame to be decoded
+        self.position = start_frame
+
+        if start_frame > 0 and backend == "opencv":
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+
+        if backend == "ffmpeg":
+            # Metadata probing is done, the ffmpeg pipe does the decoding
+            self.cap.release()
+            self.cap = None
+
+    @property
+    def needs_resize(self) -> bool:
+        return self.inference_size != self.source_size
+
+    def _at_end(self) -> bool:
+        return self.end_frame is not None and self.position >= self.end_frame
+
+    def __iter__(self) -> Iterator[Tuple[int, float, np.ndarray]]:
+        if self.backend == "ffmpeg":
+            return self._iter_ffmpeg()
+        return self._iter_opencv()
+
+    def _to_inference(self, image: np.ndarray) -> np.ndarray:
+        """Downscale first, then convert colour on the small image"""
+        if self.needs_resize:
+            image = cv2.resize(image, self.inference_size, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+    def _iter_opencv(self) -> Iterator[Tuple[int, float, np.ndarray]]:
+        cap = self.cap
+        sampler = self.sampler
+        while cap.isOpened() and not self._at_end():
+            frame_index = self.position
+
+            if sampler.needs_pixels:
+                # Every frame is decoded anyway: prepare it up front so frames
+                # the sampler holds for look-behind are ready to yield
+                success, image = cap.read()
+                if not success:
+                    break
+                self.position += 1
+                timestamp = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+                image = self._to_inference(image)
+                if not sampler.should_process(frame_index, image, timestamp):
+                    continue
+                yield from sampler.take_lookbehind()
+                yield frame_index, timestamp, image
+                continue
+
+            # grab() skips the decode-to-BGR copy for frames we don't analyse
+            if not cap.grab():
+                break
+            self.position += 1
+            if not sampler.should_process(frame_index):
+                continue
+            success, image = cap.retrieve()
+            if not success:
+                break
+
+            timestamp = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+            yield frame_index, timestamp, self._to_inference(image)
+
+    def _iter_ffmpeg(self) -> Iterator[Tuple[int, float, np.ndarray]]:
+        width, height = self.inference_size
+        frame_bytes = width * height * 3
+        cmd = ["ffmpeg", "-v", "error"]
+        if self.start_frame > 0 and self.fps > 0:
+            # Input seeking decodes from the previous keyframe and drops frames up to the target
+            cmd += ["-ss", f"{self.start_frame / self.fps:.6f}"]
+        cmd += ["-i", self.path, "-vf", f"scale={width}:{height}:flags=area", "-vsync", "passthrough"]
+        if self.end_frame is not None:
+            cmd += ["-frames:v", str(max(0, self.end_frame - self.start_frame))]
+        cmd += ["-f", "rawvideo", "-pix_fmt", "rgb24", "-"]
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=frame_bytes)
+        try:
+            while True:
+                buffer = process.stdout.read(frame_bytes)
+                if len(buffer) < frame_bytes:
+                    break
+
+                frame_index = self.position
+                self.position += 1
+                image = np.frombuffer(buffer, dtype=np.uint8).reshape(height, width, 3)
+                # Raw pipes carry no timestamps; assume constant frame rate
+                timestamp = frame_index / self.fps if self.fps > 0 else 0.0
+                if not self.sampler.should_process(frame_index, image, timestamp):
+                    continue
+                yield from self.sampler.take_lookbehind()
+                yield frame_index, timestamp, image
+        finally:
+            process.stdout.close()
+            process.kill()
+            process.wait()
+            if process.returncode not in (0, -9) and process.stderr:
+                logger.warning(f"ffmpeg decoder exited with {process.returncode}: {process.stderr.read().decode(errors='ignore')}")
+            if process.stderr:
+                process.stderr.close()
+
+    def describe(self) -> dict:
+        """Decode parameters recorded alongside the analysis"""
+        return {
+            "decoder": self.backend,
+            "source_resolution": {"width": self.source_size[0], "height": self.source_size[1]},
+            "inference_resolution": {"width": self.inference_size[0], "height": self.inference_size[1]},
+        }
+
+    def close(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class FramePrefetcher:
+    """
+    Decodes frames of a VideoFrameReader on a background thread
+
+    Decoding (OpenCV and ffmpeg pipe reads release the GIL) overlaps with
+    inference on the consuming thread, so throughput approaches the slower
+    of the two stages instead of their sum. Frames are copied into a fixed
+    pool of `depth + 2` buffers (queued, being filled, held by the consumer),
+    which bounds memory regardless of how far decoding could run ahead.
+
+    Yields the same (frame_index, timestamp, rgb_image) tuples as the reader;
+    an image is only valid until the next one is requested. `position` follows
+    the consumer, not the decode thread.
+    """
+
+    def __init__(self, reader: VideoFrameReader, depth: int = 8):
+        self.reader = reader
+        self.depth = max(1, depth)
+        self._buffers: List[Optional[np.ndarray]] = [None] * (self.depth + 2)
+        self._free: "queue.Queue[int]" = queue.Queue()
+        for slot in range(len(self._buffers)):
+            self._free.put(slot)
+        self._ready: "queue.Queue[tuple]" = queue.Queue()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.position = reader.position
+
+    def _decode(self):
+        try:
+            for frame_index, timestamp, image in self.reader:
+                slot = self._free.get()
+                if self._stop.is_set():
+                    return
+                buffer = self._buffers[slot]
+                if buffer is None or buffer.shape != image.shape:
+                    buffer = self._buffers[slot] = np.empty_like(image)
+                np.copyto(buffer, image)
+                self._ready.put(("frame", frame_index, timestamp, slot, self.reader.position))
+            self._ready.put(("end", self.reader.position))
+        except Exception as e:
+            self._ready.put(("error", e))
+
+    def __iter__(self) -> Iterator[Tuple[int, float, np.ndarray]]:
+        self._thread = threading.Thread(target=self._decode, name="frame-decoder", daemon=True)
+        self._thread.start()
+        held = None
+        try:
+            while True:
+                item = self._ready.get()
+                if held is not None:
+                    self._free.put(held)
+                    held = None
+
+                kind = item[0]
+                if kind == "error":
+                    raise item[1]
+                if kind == "end":
+                    self.position = item[1]
+                    return
+                _, frame_index, timestamp, slot, position = item
+                held = slot
+                self.position = position
+                yield frame_index, timestamp, self._buffers[slot]
+        finally:
+            if held is not None:
+                self._free.put(held)
+
+    def describe(self) -> dict:
+        return {**self.reader.describe(), "decode_queue": self.depth}
+
+    def close(self):
+        """Stop the decode thread (also when the consumer stops early) and release the reader"""
+        self._stop.set()
+        if self._thread is not None:
+            # Unblock a producer waiting for a free buffer
+            self._free.put(0)
+            self._thread.join()
+            self._thread = None
+        self.reader.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
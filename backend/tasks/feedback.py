@@ -0,0 +1,39 @@
+from celery_app import celery_app
+from database import SessionLocal
+from models.video import Video
+from models.analysis import Analysis, AnalysisStatus
+from services.feedback_service import feedback_service
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(bind=True, max_retries=5)
+def generate_feedback_task(self, manifest: dict):
+    """
+    Last analysis stage: AI feedback, ready before the player opens the video
+
+    Routed to the feedback queue (network bound). LLM errors are retried with
+    backoff; after the last retry the feedback stays empty and can still be
+    requested through POST /videos/{id}/feedback.
+    """
+    video_id = manifest["video_id"]
+    db = SessionLocal()
+    try:
+        video = db.query(Video).filter(Video.id == video_id, Video.deleted_at.is_(None)).first()
+        analysis = db.query(Analysis).filter(Analysis.video_id == video_id).first()
+        if not video or not analysis or analysis.status != AnalysisStatus.COMPLETED:
+            return {"status": "skipped", "video_id": video_id}
+        if analysis.ai_feedback:
+            # Already generated on request while this task was queued
+            return {"status": "exists", "video_id": video_id}
+
+        feedback_service.generate(db, video, analysis)
+        return {"status": "completed", "video_id": video_id}
+
+    except Exception as e:
+        logger.warning(f"Feedback generation failed for video {video_id}: {e}")
+        db.rollback()
+        raise self.retry(exc=e, countdown=30 * 2 ** self.request.retries)
+    finally:
+        db.close()
@@ -0,0 +1,18 @@
+from celery_app import celery_app
+from services.analysis_scheduler import analysis_scheduler
+from tasks.video_analysis import dispatch_scheduled_analyses, reclaim_lost_analyses
+
+
+@celery_app.task(ignore_result=True)
+def sweep_analysis_scheduler():
+    """
+    Periodic (beat): reclaim jobs of dead workers and hand out the freed slots
+
+    A worker process killed mid-stage never releases its job; its stage
+    heartbeat goes stale and the job is failed and released here (see
+    reclaim_lost_analyses). Dispatch otherwise only runs when an analysis is
+    submitted or ends, so freed slots would wait for the next upload.
+    """
+    reclaim_lost_analyses()
+    if analysis_scheduler.enabled:
+        dispatch_scheduled_analyses()
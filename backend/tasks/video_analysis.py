@@ -1,25 +1,450 @@
-from celery_app import celery_app
+from contextlib import contextmanager
+
+from celery import chain
+from celery.exceptions import Retry
+from celery.signals import worker_init, worker_process_init, worker_process_shutdown, task_prerun, task_postrun
+
+from celery_app import celery_app, QUEUE_INTERACTIVE
+from config import settings
 from database import SessionLocal
 from models.video import Video
-from models.analysis import Analysis, AnalysisStatus
+from models.analysis import Analysis, AnalysisStatus, AnalysisTier
+from models.stroke import Stroke
+from models.analysis_metric import AnalysisMetric
 from services.analysis_service import analysis_service
+from services.analysis_lock import analysis_lock
+from services.analysis_scheduler import analysis_scheduler
+from services.phase_segmentation import summarize_phases
+from services.stroke_detection import detect_strokes
+from services.pose_embedding import EMBEDDING_VERSION, embed_strokes
+from services.metric_summary import WHOLE_CLIP, summarize_metrics
+from services.storage_service import storage_service
+from services.landmark_store import landmark_store
+from services.analysis_checkpoint import analysis_checkpoint
+from services.analysis_progress import analysis_progress
+from services.progress_service import progress_service
+from services.task_manifest import store_manifest, load_manifest
+from services.memory_usage import peak_rss_kb, reset_peak_rss
+from tasks.feedback import generate_feedback_task
 import logging
+import threading
 import traceback
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+
+@worker_init.connect
+def share_cpu_between_tasks(sender=None, **kwargs):
+    """Sent before the pool forks: every worker process learns how many analyses run side by side"""
+    analysis_service.concurrency = sender.concurrency
+
+
+@worker_process_init.connect
+def warm_up_worker(**kwargs):
+    """Load pose models once per worker process instead of on the first task"""
+    if settings.ANALYSIS_WARM_WORKERS:
+        analysis_service.warm_up()
+
+
+@worker_process_shutdown.connect
+def stop_segment_pool(**kwargs):
+    analysis_service.close_pool()
+
+
+@task_prerun.connect
+def track_task_memory(**kwargs):
+    """Measure each task's peak resident memory on its own"""
+    reset_peak_rss()
+
+
+@task_postrun.connect
+def report_task_memory(task=None, task_id=None, **kwargs):
+    peak = peak_rss_kb()
+    if peak:
+        logger.info(f"Task {task.name}[{task_id}] peak RSS {peak / 1024:.0f} MiB")
+
+
+def _mark_pending(video_id: str):
+    """Queued again: PENDING, without the error of an earlier run (record created if missing)"""
+    db = SessionLocal()
+    try:
+        if not db.query(Analysis).filter(Analysis.video_id == video_id).first():
+            db.add(Analysis(video_id=video_id))
+            db.flush()
+        _set_status(db, video_id, AnalysisStatus.PENDING)
+    finally:
+        db.close()
+
+
+def start_video_analysis(
+    video_id: str,
+    user_id: Optional[str] = None,
+    queue: str = QUEUE_INTERACTIVE,
+    force: bool = False,
+    mark_pending: bool = False
+) -> bool:
+    """
+    Enqueue analysis for a video
+
+    With previews enabled, a fast coarse pass runs first and chains the
+    full-quality pass once its skeleton is stored. Jobs on other queues than
+    the interactive one (batch re-analysis) have nobody waiting on a preview
+    and go straight to the full pass.
+
+    Interactive jobs of a known user go through the fair-share scheduler,
+    which hands them to Celery as slots free up.
+
+    With `force`, an up-to-date cached result is not reused: the video is
+    analysed again (e.g. after a model change the cache key does not cover).
+
+    With `mark_pending`, the analysis is set to PENDING once the lock is
+    held and before the job is enqueued, so a request that loses the race
+    for the lock never overwrites the status of the job that won it.
+
+    Returns:
+        False when a job for this video is already in flight (nothing enqueued)
+    """
+    if not analysis_lock.acquire(video_id):
+        logger.info(f"Analysis already in flight for video {video_id}")
+        return False
+
+    preview = settings.ANALYSIS_PREVIEW_ENABLED and queue == QUEUE_INTERACTIVE
+    tier = AnalysisTier.PREVIEW if preview else AnalysisTier.FULL
+    try:
+        if mark_pending:
+            _mark_pending(video_id)
+        scheduled = (
+            queue == QUEUE_INTERACTIVE and user_id and analysis_scheduler.enabled
+            and analysis_scheduler.submit(user_id, video_id, {"tier": tier.value, "queue": queue, "force": force})
+        )
+        if scheduled:
+            dispatch_scheduled_analyses()
+        else:
+            analyze_video_task.apply_async((video_id, tier.value, force), queue=queue)
+    except Exception:
+        analysis_lock.release(video_id)
+        raise
+    return True
+
+
+def dispatch_scheduled_analyses():
+    """Hand scheduled jobs to Celery while slots are free"""
+    for video_id, job in analysis_scheduler.dispatch():
+        try:
+            analyze_video_task.apply_async((video_id, job["tier"], job.get("force", False)), queue=job["queue"])
+        except Exception as e:
+            logger.error(f"Could not enqueue scheduled analysis of video {video_id}: {e}")
+            analysis_scheduler.finish(video_id)
+            analysis_lock.release(video_id)
+
+
+def _end_analysis(video_id: str):
+    """The video's job is over: accept new requests and give its slot to the next user"""
+    analysis_lock.release(video_id)
+    analysis_scheduler.finish(video_id)
+    dispatch_scheduled_analyses()
+
+
+def _content_cache_key(db, video: Video):
+    """Cache key of the video's FULL result, hashing legacy uploads on first use"""
+    if not video.content_hash:
+        try:
+            video.content_hash = storage_service.hash_object(video.storage_path)
+            db.commit()
+        except Exception as e:
+            logger.warning(f"Could not hash video {video.id}, analysis cache disabled: {e}")
+            db.rollback()
+            return None
+    return analysis_service.cache_key(video.content_hash)
+
+
+def _reuse_cached_result(db, analysis: Analysis, video_id: str, cache_key) -> bool:
+    """
+    Complete the analysis from an existing FULL result with the same cache key
+
+    Covers re-analysis of an unchanged video and re-uploads of identical bytes.
+    """
+    if not cache_key:
+        return False
+
+    if analysis.cache_key == cache_key and analysis.landmarks_path and analysis.quality_tier == AnalysisTier.FULL:
+        analysis.status = AnalysisStatus.COMPLETED
+        analysis.error_message = None
+        db.commit()
+        logger.info(f"Analysis of video {video_id} is already up to date")
+        return True
+
+    source = db.query(Analysis).filter(
+        Analysis.cache_key == cache_key,
+        Analysis.status == AnalysisStatus.COMPLETED,
+        Analysis.landmarks_path.isnot(None),
+        Analysis.id != analysis.id
+    ).first()
+    if not source:
+        return False
+
+    # Own copy of the blob, so the source video can be re-analysed or purged independently
+    previous_path = analysis.landmarks_path
+    analysis.landmarks_path = landmark_store.copy(source.landmarks_path, video_id, AnalysisTier.FULL.value)
+    analysis.data = None
+    analysis.processing_info = {**(source.processing_info or {}), "reused_from": str(source.video_id)}
+    analysis.phases = source.phases
+    _replace_strokes(analysis, [
+        {**_stroke_fields(stroke), "clip_path": _copy_clip(stroke.clip_path, video_id, stroke.stroke_index)}
+        for stroke in source.strokes
+    ])
+    changed_metrics = _replace_metrics(db, analysis, analysis.video, [
+        {field: getattr(metric, field) for field in METRIC_FIELDS}
+        for metric in source.metrics
+    ])
+    analysis.quality_tier = AnalysisTier.FULL
+    analysis.cache_key = cache_key
+    analysis.status = AnalysisStatus.COMPLETED
+    analysis.error_message = None
+    db.flush()
+    progress_service.refresh(db, analysis.video.uploaded_by, changed_metrics)
+    db.commit()
+    _discard_replaced_blob(previous_path, analysis.landmarks_path)
+    logger.info(f"Reused analysis of video {source.video_id} for video {video_id}")
+    return True
+
+
+STROKE_FIELDS = (
+    "stroke_index", "start_frame", "end_frame", "start_time", "end_time", "contact_frame",
+    "contact_time", "stroke_type", "side", "peak_wrist_speed", "phases", "embedding", "embedding_version",
+)
+
+
+def _stroke_fields(stroke: Stroke) -> dict:
+    return {field: getattr(stroke, field) for field in STROKE_FIELDS}
+
+
+def _copy_clip(clip_path, video_id: str, index: int):
+    if not clip_path:
+        return None
+    return storage_service.copy_object(clip_path, f"analyses/{video_id}/strokes/{index:03d}.mp4")
+
+
+def _replace_strokes(analysis: Analysis, strokes: list):
+    """Swap the stroke index of an analysis (not committed)"""
+    analysis.strokes = [
+        Stroke(video_id=analysis.video_id, **stroke)
+        for stroke in strokes
+    ]
+
+
+METRIC_FIELDS = ("metric", "phase", "count", "mean", "min", "max", "p10", "p50", "p90")
+
+
+def _replace_metrics(db, analysis: Analysis, video: Video, rows: list) -> set:
+    """
+    Swap the metric summary rows of an analysis (not committed)
+
+    Returns:
+        Whole-clip metrics before or after the swap, whose progress aggregates
+        need a refresh
+    """
+    changed = {
+        metric for (metric,) in db.query(AnalysisMetric.metric).filter(
+            AnalysisMetric.analysis_id == analysis.id, AnalysisMetric.phase == WHOLE_CLIP
+        )
+    }
+    changed.update(row["metric"] for row in rows if row["phase"] == WHOLE_CLIP)
+    # Delete first: the ORM would insert the new rows before removing orphans,
+    # which trips the (video, metric, phase) unique constraint
+    db.query(AnalysisMetric).filter(AnalysisMetric.analysis_id == analysis.id).delete(synchronize_session=False)
+    db.expire(analysis, ["metrics"])
+    analysis.metrics = [
+        AnalysisMetric(
+            video_id=analysis.video_id,
+            user_id=video.uploaded_by,
+            recorded_at=video.created_at,
+            **{field: row[field] for field in METRIC_FIELDS}
+        )
+        for row in rows
+    ]
+    return changed
+
+
+def _detected_stroke_rows(sequence, strokes: list) -> list:
+    """Detector output -> Stroke column values, with each stroke's pose embedding"""
+    return [
+        {
+            "stroke_index": stroke["index"],
+            **{key: stroke[key] for key in STROKE_FIELDS if key in stroke},
+            "embedding": embedding.tolist() if embedding is not None else None,
+            "embedding_version": EMBEDDING_VERSION if embedding is not None else None,
+        }
+        for stroke, embedding in zip(strokes, embed_strokes(sequence, strokes))
+    ]
+
+
+def _cut_clips(db, analysis: Analysis, video: Video, strokes: list):
+    """Best effort: a stroke without a clip is still fully usable"""
+    try:
+        clip_paths = analysis_service.cut_stroke_clips(video.storage_path, str(video.id), strokes)
+        for row, clip_path in zip(analysis.strokes, clip_paths):
+            row.clip_path = clip_path
+        db.commit()
+    except Exception as e:
+        logger.warning(f"Could not cut stroke clips for video {video.id}: {e}")
+        db.rollback()
+
+
+def _discard_raw(raw_path: str):
+    """Drop the unsmoothed blob once the final result is committed"""
+    try:
+        storage_service.delete_prefix(raw_path)
+    except Exception as e:
+        logger.warning(f"Could not remove raw landmarks {raw_path}: {e}")
+
+
+def _discard_replaced_blob(previous_path: Optional[str], landmarks_path: str):
+    """
+    Drop the blob an analysis pointed to before a commit switched it to a new version
+
+    A request that read the old path just before the commit fails its range
+    reads instead of slicing a blob with a different layout.
+    """
+    if not previous_path or previous_path == landmarks_path:
+        return
+    try:
+        storage_service.delete_prefix(previous_path)
+    except Exception as e:
+        logger.warning(f"Could not remove replaced landmarks {previous_path}: {e}")
+
+
+def _discard_checkpoints(video_id: str, tier: AnalysisTier):
+    """Drop chunks and progress once the final blob is committed"""
+    try:
+        analysis_checkpoint.clear(video_id, tier.value)
+    except Exception as e:
+        # Leftover chunks only cost storage; the result is already saved
+        logger.warning(f"Could not remove checkpoints for video {video_id}: {e}")
+    analysis_progress.clear(video_id)
+
+
+def _current_queue(task) -> str:
+    """Queue the running task was delivered from, so follow-up stages stay on it"""
+    return (task.request.delivery_info or {}).get("routing_key") or QUEUE_INTERACTIVE
+
+
+def full_pass_pipeline(manifest: dict, queue: str):
+    """
+    Stages of the full-quality pass: extract -> smooth -> summarize -> feedback
+
+    Each stage is its own task, retried on its own. Stages hand each other a
+    small manifest (ids, MinIO paths, processing info), never landmark data;
+    a manifest that outgrows the inline limit is itself parked in MinIO.
+    Feedback runs on the feedback queue.
+    """
+    stages = [
+        extract_landmarks_task.s(manifest).set(queue=queue),
+        smooth_landmarks_task.s().set(queue=queue),
+        summarize_analysis_task.s().set(queue=queue),
+    ]
+    if settings.ANALYSIS_AUTO_FEEDBACK:
+        stages.append(generate_feedback_task.s())
+    return chain(*stages)
+
+
+def _set_status(db, video_id: str, status: AnalysisStatus, error_message: Optional[str] = None):
+    try:
+        db.query(Analysis).filter(Analysis.video_id == video_id).update(
+            {"status": status, "error_message": error_message}, synchronize_session=False
+        )
+        db.commit()
+    except Exception as e:
+        logger.warning(f"Could not set analysis status of video {video_id}: {e}")
+        db.rollback()
+
+
+@contextmanager
+def _heartbeat(video_id: str):
+    """Report the running stage alive every ANALYSIS_HEARTBEAT_SECONDS until it returns"""
+    stop = threading.Event()
+
+    def beat():
+        analysis_lock.heartbeat(video_id)
+        while not stop.wait(settings.ANALYSIS_HEARTBEAT_SECONDS):
+            analysis_lock.heartbeat(video_id)
+
+    thread = threading.Thread(target=beat, name="analysis-heartbeat", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+        analysis_lock.end_heartbeat(video_id)
+
+
+def reclaim_lost_analyses():
+    """
+    Fail and release the jobs whose running stage stopped reporting
+
+    A worker process killed mid-stage (OOM kill, memory recycling) never
+    reaches the failure handling of _analysis_stage: without this, its lock,
+    scheduler slot and PROCESSING status would stay until the lock TTL.
+    """
+    for video_id in analysis_lock.lost(settings.ANALYSIS_HEARTBEAT_TIMEOUT_SECONDS):
+        logger.error(f"Analysis of video {video_id} stopped reporting, its worker was lost")
+        db = SessionLocal()
+        try:
+            _set_status(db, video_id, AnalysisStatus.FAILED, "Analysis worker lost")
+        finally:
+            db.close()
+        _end_analysis(video_id)
+
+
+@contextmanager
+def _analysis_stage(task, video_id: str):
+    """
+    Session of one full-pass stage, with the stage's failure handling
+
+    A failure retries this stage only, with the analysis still PROCESSING;
+    once it is out of retries the analysis is marked FAILED and the video is
+    released for new requests.
+    """
+    db = SessionLocal()
+    try:
+        with _heartbeat(video_id):
+            yield db
+    except Exception as e:
+        logger.error(f"Analysis stage {task.name} failed for video {video_id}: {e}")
+        db.rollback()
+        try:
+            raise task.retry(exc=e, countdown=60)
+        except Retry:
+            # Still in flight: the lock and scheduler slot are kept for the retry
+            raise
+        except Exception:
+            traceback.print_exc()
+            _set_status(db, video_id, AnalysisStatus.FAILED, str(e))
+            _end_analysis(video_id)
+            raise
+    finally:
+        db.close()
+
+
 @celery_app.task(bind=True, max_retries=3)
-def analyze_video_task(self, video_id: str):
+def analyze_video_task(self, video_id: str, tier: str = AnalysisTier.FULL.value, force: bool = False):
     """
     Analyze video to extract pose landmarks
+
+    Reuses a cached result when possible (unless `force`), runs the preview
+    pass in place and starts the full-pass pipeline (see full_pass_pipeline).
     """
-    logger.info(f"Starting analysis for video {video_id}")
+    tier = AnalysisTier(tier)
+    logger.info(f"Starting {tier.value} analysis for video {video_id}")
     db = SessionLocal()
     try:
         # Get video
         video = db.query(Video).filter(Video.id == video_id).first()
         if not video:
             logger.error(f"Video {video_id} not found")
+            _end_analysis(video_id)
             return {"status": "failed", "error": "Video not found"}
 
         # Get or create analysis record
@@ -30,32 +455,123 @@ def analyze_video_task(self, video_id: str):
             db.commit()
             db.refresh(analysis)
 
+        # Identical bytes already analysed by the same pipeline: nothing to compute
+        cache_key = _content_cache_key(db, video)
+        if not force and _reuse_cached_result(db, analysis, video_id, cache_key):
+            _end_analysis(video_id)
+            if settings.ANALYSIS_AUTO_FEEDBACK and not analysis.ai_feedback:
+                generate_feedback_task.delay({"video_id": video_id})
+            return {"status": "cached", "video_id": video_id}
+
         # Update status to PROCESSING
         analysis.status = AnalysisStatus.PROCESSING
         db.commit()
 
-        # Process video
-        try:
-            frames_data = analysis_service.process_video(video.storage_path)
-            
-            # Update analysis with results
-            analysis.data = frames_data
-            analysis.status = AnalysisStatus.COMPLETED
-            db.commit()
-            logger.info(f"Analysis completed for video {video_id}")
-            return {"status": "completed", "video_id": video_id}
-            
-        except Exception as e:
-            logger.error(f"Analysis failed: {e}")
-            analysis.status = AnalysisStatus.FAILED
-            analysis.error_message = str(e)
-            db.commit()
-            # Retry if appropriate
-            raise self.retry(exc=e, countdown=60)
+        if tier == AnalysisTier.PREVIEW:
+            # The preview is best effort: whatever happens, the full pass follows
+            try:
+                with _heartbeat(video_id):
+                    sequence, processing_info = analysis_service.process_video(video.storage_path, tier, video_id)
+                previous_path = analysis.landmarks_path
+                analysis.landmarks_path = landmark_store.save(video_id, tier.value, sequence)
+                analysis.data = None
+                analysis.processing_info = processing_info
+                analysis.phases = summarize_phases(sequence)
+                # Strokes, metrics and cache key of an earlier run describe other
+                # landmarks: dropped until the full pass replaces them
+                _replace_strokes(analysis, [])
+                changed_metrics = _replace_metrics(db, analysis, video, [])
+                analysis.cache_key = None
+                analysis.quality_tier = AnalysisTier.PREVIEW
+                db.flush()
+                progress_service.refresh(db, video.uploaded_by, changed_metrics)
+                db.commit()
+                _discard_replaced_blob(previous_path, analysis.landmarks_path)
+                _discard_checkpoints(video_id, tier)
+                logger.info(f"Preview analysis stored for video {video_id}")
+            except Exception as e:
+                logger.error(f"Preview analysis failed, continuing with full pass: {e}")
+                db.rollback()
+
+            analyze_video_task.delay(video_id, AnalysisTier.FULL.value, force)
+            return {"status": "preview", "video_id": video_id}
+
+        manifest = {"video_id": video_id, "tier": tier.value, "cache_key": cache_key}
+        full_pass_pipeline(manifest, _current_queue(self)).apply_async()
+        return {"status": "started", "video_id": video_id}
 
     except Exception as e:
         logger.error(f"Task error: {e}")
         traceback.print_exc()
+        _end_analysis(video_id)
         raise
     finally:
         db.close()
+
+
+@celery_app.task(bind=True, max_retries=3)
+def extract_landmarks_task(self, manifest: dict) -> dict:
+    """Full pass, stage 1: raw landmarks, stored as a MinIO blob"""
+    manifest = load_manifest(manifest)
+    video_id, tier = manifest["video_id"], AnalysisTier(manifest["tier"])
+    with _analysis_stage(self, video_id) as db:
+        storage_path = db.query(Video.storage_path).filter(Video.id == video_id).scalar()
+        # Flushed chunks of an earlier attempt are kept: a retry resumes from the last one
+        sequence, processing_info = analysis_service.extract_landmarks(storage_path, tier, video_id)
+        raw_path = landmark_store.save(video_id, tier.value, sequence, raw=True)
+        _discard_checkpoints(video_id, tier)
+        return store_manifest(video_id, "extract", {**manifest, "raw_path": raw_path, "processing_info": processing_info})
+
+
+@celery_app.task(bind=True, max_retries=3)
+def smooth_landmarks_task(self, manifest: dict) -> dict:
+    """Full pass, stage 2: gap filling and smoothing into a new version of the landmark blob"""
+    manifest = load_manifest(manifest)
+    video_id = manifest["video_id"]
+    with _analysis_stage(self, video_id):
+        sequence, processing_info = analysis_service.smooth(
+            landmark_store.load(manifest["raw_path"]), manifest["processing_info"]
+        )
+        landmarks_path = landmark_store.save(video_id, manifest["tier"], sequence)
+        return store_manifest(
+            video_id, "smooth", {**manifest, "landmarks_path": landmarks_path, "processing_info": processing_info}
+        )
+
+
+@celery_app.task(bind=True, max_retries=3)
+def summarize_analysis_task(self, manifest: dict) -> dict:
+    """Full pass, stage 3: phases, strokes and metrics; completes the analysis"""
+    manifest = load_manifest(manifest)
+    video_id = manifest["video_id"]
+    with _analysis_stage(self, video_id) as db:
+        video = db.query(Video).filter(Video.id == video_id).first()
+        analysis = db.query(Analysis).filter(Analysis.video_id == video_id).first()
+        sequence = landmark_store.load(manifest["landmarks_path"])
+
+        # Update analysis with results (landmarks live in MinIO, not in JSONB)
+        previous_path = analysis.landmarks_path
+        analysis.landmarks_path = manifest["landmarks_path"]
+        analysis.data = None
+        analysis.processing_info = manifest["processing_info"]
+        analysis.phases = summarize_phases(sequence)
+        strokes = detect_strokes(sequence)
+        _replace_strokes(analysis, _detected_stroke_rows(sequence, strokes))
+        changed_metrics = _replace_metrics(db, analysis, video, summarize_metrics(sequence, analysis.phases))
+        if settings.ANALYSIS_AUTO_FEEDBACK:
+            # Written for the previous result; the next stage regenerates it
+            analysis.ai_feedback = None
+        analysis.quality_tier = AnalysisTier.FULL
+        analysis.cache_key = manifest["cache_key"]
+        analysis.status = AnalysisStatus.COMPLETED
+        analysis.error_message = None
+        db.flush()
+        progress_service.refresh(db, video.uploaded_by, changed_metrics)
+        db.commit()
+
+        _discard_raw(manifest["raw_path"])
+        _discard_replaced_blob(previous_path, analysis.landmarks_path)
+        if settings.ANALYSIS_STROKE_CLIPS and strokes:
+            _cut_clips(db, analysis, video, strokes)
+        _end_analysis(video_id)
+        logger.info(f"Analysis completed for video {video_id} ({len(strokes)} strokes)")
+        return store_manifest(video_id, "summarize", {"video_id": video_id, "tier": manifest["tier"]})
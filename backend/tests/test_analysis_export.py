@@ -0,0 +1,70 @@
+import pytest
+import sys
+from pathlib import Path
+
+# Add parent directory to path to allow importing app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import json
+import numpy as np
+from services.pose_sequence import PoseSequence
+from services.landmark_codec import iter_chunks
+from services.analysis_export import (
+    negotiate_export_format,
+    iter_json_array,
+    iter_ndjson,
+    iter_binary,
+    frames_to_sequences,
+)
+
+
+@pytest.fixture
+def sequence():
+    rng = np.random.default_rng(3)
+    landmarks = rng.uniform(0.0, 1.0, size=(50, 33, 4)).astype(np.float32)
+    landmarks[4] = np.nan
+    return PoseSequence(np.arange(50, dtype=np.int32), np.arange(50) / 30.0, landmarks)
+
+
+@pytest.mark.parametrize("accept, expected", [
+    (None, "json"),
+    ("*/*", "json"),
+    ("application/x-ndjson", "ndjson"),
+    ("application/octet-stream", "binary"),
+    ("application/json;q=0.5, application/x-ndjson", "ndjson"),
+    ("application/octet-stream;q=0.9, */*;q=0.1", "binary"),
+    ("text/html", None),
+    ("application/json;q=0", None),
+])
+def test_negotiate_export_format(accept, expected):
+    assert negotiate_export_format(accept) == expected
+
+
+def test_json_array_streams_valid_document(sequence):
+    frames = sequence.to_frames()
+    body = b"".join(iter_json_array(iter(frames), batch_size=7))
+    assert json.loads(body) == json.loads(json.dumps(frames))
+    assert b"".join(iter_json_array(iter([]))) == b"[]"
+
+
+def test_ndjson_one_frame_per_line(sequence):
+    frames = sequence.to_frames()
+    lines = b"".join(iter_ndjson(iter(frames), batch_size=16)).decode().splitlines()
+    assert len(lines) == len(frames)
+    assert json.loads(lines[4]) == {"frame": 4, "timestamp": 4 / 30.0, "landmarks": []}
+
+
+def test_binary_chunks_round_trip_legacy_frames(sequence):
+    frames = sequence.to_frames()
+    body = b"".join(iter_binary(frames_to_sequences(iter(frames), batch_size=16), "float32"))
+    chunks = list(iter_chunks(body))
+
+    assert [len(chunk) for chunk in chunks] == [16, 16, 16, 2]
+    landmarks = np.concatenate([chunk.landmarks for chunk in chunks])
+    np.testing.assert_allclose(landmarks, sequence.landmarks, atol=1e-6)
+    np.testing.assert_array_equal(
+        np.concatenate([chunk.frame_indices for chunk in chunks]), sequence.frame_indices
+    )
+
+    with pytest.raises(ValueError):
+        list(iter_chunks(body[:-3]))
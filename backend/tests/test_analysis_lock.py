@@ -0,0 +1,55 @@
+import sys
+from pathlib import Path
+
+# Add parent directory to path to allow importing app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from unittest.mock import MagicMock
+import redis
+from services.analysis_lock import AnalysisLockService
+
+
+def test_second_acquire_collapses_into_first():
+    service = AnalysisLockService()
+    service._client = MagicMock()
+    service._client.set.side_effect = [True, None]
+
+    assert service.acquire("abc") is True
+    assert service.acquire("abc") is False
+    key = service._client.set.call_args.args[0]
+    assert key == "analysis:lock:abc"
+    assert service._client.set.call_args.kwargs["nx"] is True
+
+
+def test_lock_fails_open_without_redis():
+    service = AnalysisLockService()
+    service._client = MagicMock()
+    service._client.set.side_effect = redis.ConnectionError("down")
+    service._client.exists.side_effect = redis.ConnectionError("down")
+
+    assert service.acquire("abc") is True
+    assert service.is_held("abc") is False
+
+
+def test_stale_heartbeat_reports_the_job_lost(monkeypatch):
+    service = AnalysisLockService()
+    service._client = MagicMock()
+    monkeypatch.setattr("services.analysis_lock.time.time", lambda: 1000.0)
+
+    service.heartbeat("abc")
+    service.lost(300)
+
+    assert service._client.zadd.call_args.args == ("analysis:heartbeat", {"abc": 1000.0})
+    assert service._client.zrangebyscore.call_args.args == ("analysis:heartbeat", "-inf", 700.0)
+
+
+def test_release_drops_the_heartbeat():
+    service = AnalysisLockService()
+    service._client = MagicMock()
+
+    service.release("abc")
+
+    pipe = service._client.pipeline.return_value
+    pipe.delete.assert_called_once_with("analysis:lock:abc")
+    pipe.zrem.assert_called_once_with("analysis:heartbeat", "abc")
+    pipe.execute.assert_called_once()
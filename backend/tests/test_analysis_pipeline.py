@@ -0,0 +1,240 @@
+import pytest
+import sys
+from pathlib import Path
+
+# Add parent directory to path to allow importing app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import minio
+import numpy as np
+from celery_app import QUEUE_BULK
+from models.video import Video
+from models.analysis import Analysis, AnalysisStatus, AnalysisTier
+from services.biomechanics import empty_landmarks
+from services.pose_sequence import PoseSequence
+
+# The storage service checks its bucket on import: there is no MinIO here
+with patch.object(minio.Minio, "bucket_exists", return_value=True):
+    from tasks import feedback, video_analysis
+
+
+def _session(video, analysis):
+    """Stands in for SessionLocal(): queries return the test's rows"""
+    rows = {Video: video, Analysis: analysis, Video.storage_path: video.storage_path}
+
+    def query(entity):
+        result = MagicMock()
+        result.filter.return_value.first.return_value = rows[entity]
+        result.filter.return_value.scalar.return_value = rows[entity]
+        return result
+
+    db = MagicMock()
+    db.query.side_effect = query
+    return db
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    """Full pass run eagerly, with storage, database and LLM replaced by fakes"""
+    monkeypatch.setattr(video_analysis.settings, "ANALYSIS_AUTO_FEEDBACK", True)
+    monkeypatch.setattr(video_analysis.settings, "ANALYSIS_STROKE_CLIPS", False)
+
+    video = SimpleNamespace(id="v", storage_path="videos/v.mp4", uploaded_by="u")
+    analysis = SimpleNamespace(
+        status=AnalysisStatus.PROCESSING, landmarks_path=None, ai_feedback=None, quality_tier=None, cache_key=None
+    )
+    sequence = PoseSequence(np.arange(10, dtype=np.int32), np.arange(10) / 30.0, empty_landmarks(10))
+    state = SimpleNamespace(
+        video=video, analysis=analysis, ended=[], statuses=[],
+        extract=MagicMock(return_value=(sequence, {"segments": 1})),
+        smooth=MagicMock(return_value=(sequence, {"segments": 1, "smoothing": {"method": "savgol"}})),
+        generate=MagicMock(),
+    )
+
+    session = lambda: _session(video, analysis)
+    monkeypatch.setattr(video_analysis, "SessionLocal", session)
+    monkeypatch.setattr(feedback, "SessionLocal", session)
+    monkeypatch.setattr(video_analysis.analysis_service, "extract_landmarks", state.extract)
+    monkeypatch.setattr(video_analysis.analysis_service, "smooth", state.smooth)
+    monkeypatch.setattr(
+        video_analysis.landmark_store, "save",
+        lambda video_id, tier, sequence, raw=False: f"{video_id}/{'raw' if raw else 'landmarks'}-{tier}"
+    )
+    monkeypatch.setattr(video_analysis.landmark_store, "load", lambda path: sequence)
+    for helper in ("_discard_checkpoints", "_discard_raw", "_discard_replaced_blob", "_replace_strokes"):
+        monkeypatch.setattr(video_analysis, helper, lambda *args: None)
+    monkeypatch.setattr(video_analysis, "_replace_metrics", lambda *args: set())
+    monkeypatch.setattr(video_analysis.progress_service, "refresh", lambda *args: None)
+    monkeypatch.setattr(video_analysis, "_end_analysis", state.ended.append)
+    state.heartbeats = []
+    monkeypatch.setattr(video_analysis.analysis_lock, "heartbeat", state.heartbeats.append)
+    monkeypatch.setattr(video_analysis.analysis_lock, "end_heartbeat", lambda video_id: state.heartbeats.append("end"))
+    monkeypatch.setattr(
+        video_analysis, "_set_status", lambda db, video_id, status, error_message=None: state.statuses.append(status)
+    )
+    monkeypatch.setattr(feedback.feedback_service, "generate", state.generate)
+    return state
+
+
+def _manifest():
+    return {"video_id": "v", "tier": AnalysisTier.FULL.value, "cache_key": "k"}
+
+
+def test_full_pass_runs_every_stage(pipeline):
+    chain = video_analysis.full_pass_pipeline(_manifest(), QUEUE_BULK)
+
+    assert [stage.options.get("queue") for stage in chain.tasks[:3]] == [QUEUE_BULK] * 3
+    result = chain.apply()
+
+    assert result.get() == {"status": "completed", "video_id": "v"}
+    # Summarize hands feedback a manifest, like every other stage
+    assert result.parent.get() == {"video_id": "v", "tier": "full"}
+    assert pipeline.analysis.status == AnalysisStatus.COMPLETED
+    assert pipeline.analysis.quality_tier == AnalysisTier.FULL
+    assert pipeline.analysis.landmarks_path == "v/landmarks-full"
+    assert pipeline.analysis.cache_key == "k"
+    assert pipeline.ended == ["v"]
+    assert pipeline.statuses == []
+    pipeline.generate.assert_called_once()
+
+
+def test_running_stage_reports_its_heartbeat(pipeline):
+    manifest = {**_manifest(), "raw_path": "v/raw-full", "processing_info": {"segments": 1}}
+
+    video_analysis.smooth_landmarks_task.apply((manifest,)).get()
+
+    # Reported while running, dropped once the stage returns
+    assert pipeline.heartbeats == ["v", "end"]
+
+
+def test_lost_worker_fails_and_releases_its_job(pipeline, monkeypatch):
+    monkeypatch.setattr(video_analysis.analysis_lock, "lost", lambda timeout_seconds: ["v"])
+
+    video_analysis.reclaim_lost_analyses()
+
+    assert pipeline.statuses == [AnalysisStatus.FAILED]
+    assert pipeline.ended == ["v"]
+
+
+def test_failed_stage_is_retried_alone_while_processing(pipeline):
+    pipeline.smooth.side_effect = [RuntimeError("minio down"), pipeline.smooth.return_value]
+
+    result = video_analysis.full_pass_pipeline(_manifest(), QUEUE_BULK).apply()
+
+    assert result.get()["status"] == "completed"
+    assert pipeline.extract.call_count == 1
+    assert pipeline.smooth.call_count == 2
+    # Never reported FAILED while a retry was pending
+    assert pipeline.statuses == []
+    assert pipeline.analysis.status == AnalysisStatus.COMPLETED
+    assert pipeline.ended == ["v"]
+
+
+def test_stage_out_of_retries_fails_the_analysis(pipeline):
+    pipeline.smooth.side_effect = RuntimeError("minio down")
+    manifest = {**_manifest(), "raw_path": "v/raw-full", "processing_info": {"segments": 1}}
+
+    result = video_analysis.smooth_landmarks_task.apply((manifest,))
+
+    with pytest.raises(RuntimeError):
+        result.get()
+
+    assert pipeline.smooth.call_count == video_analysis.smooth_landmarks_task.max_retries + 1
+    assert pipeline.statuses == [AnalysisStatus.FAILED]
+    assert pipeline.ended == ["v"]
+
+
+def test_preview_drops_results_of_the_previous_run(pipeline, monkeypatch):
+    analysis = pipeline.analysis
+    analysis.status, analysis.quality_tier, analysis.cache_key = AnalysisStatus.COMPLETED, AnalysisTier.FULL, "old"
+    analysis.landmarks_path, analysis.strokes = "v/landmarks-full", ["stale stroke"]
+    replaced_metrics = []
+    monkeypatch.setattr(video_analysis, "_replace_strokes", lambda analysis, rows: setattr(analysis, "strokes", rows))
+    monkeypatch.setattr(
+        video_analysis, "_replace_metrics", lambda db, analysis, video, rows: replaced_metrics.append(rows) or {"speed"}
+    )
+    monkeypatch.setattr(video_analysis, "_content_cache_key", lambda db, video: "new")
+    monkeypatch.setattr(video_analysis, "_reuse_cached_result", lambda *args: False)
+    monkeypatch.setattr(
+        video_analysis.analysis_service, "process_video", lambda *args: (pipeline.extract.return_value[0], {})
+    )
+    full_pass = MagicMock()
+    monkeypatch.setattr(video_analysis.analyze_video_task, "delay", full_pass)
+
+    result = video_analysis.analyze_video_task.apply(("v", AnalysisTier.PREVIEW.value))
+
+    assert result.get() == {"status": "preview", "video_id": "v"}
+    assert analysis.quality_tier == AnalysisTier.PREVIEW
+    assert analysis.landmarks_path == "v/landmarks-preview"
+    # Nothing served until the full pass describes the new landmarks
+    assert analysis.strokes == [] and replaced_metrics == [[]]
+    assert analysis.cache_key is None
+    full_pass.assert_called_once_with("v", AnalysisTier.FULL.value, False)
+
+
+def test_pending_is_written_only_by_the_lock_holder(pipeline, monkeypatch):
+    held = set()
+    monkeypatch.setattr(video_analysis.analysis_lock, "acquire", lambda video_id: not (video_id in held or held.add(video_id)))
+    enqueued = []
+    monkeypatch.setattr(
+        video_analysis.analyze_video_task, "apply_async",
+        lambda args, queue: enqueued.append(list(pipeline.statuses))
+    )
+
+    assert video_analysis.start_video_analysis("v", queue=QUEUE_BULK, mark_pending=True) is True
+    # The losing request leaves the winner's status alone
+    assert video_analysis.start_video_analysis("v", queue=QUEUE_BULK, mark_pending=True) is False
+
+    assert pipeline.statuses == [AnalysisStatus.PENDING]
+    # PENDING is written before the job can start and report PROCESSING
+    assert enqueued == [[AnalysisStatus.PENDING]]
+
+
+def _record_countdowns(monkeypatch, task):
+    countdowns = []
+    retry = task.retry
+
+    def recording_retry(*args, **kwargs):
+        countdowns.append(kwargs["countdown"])
+        return retry(*args, **kwargs)
+
+    monkeypatch.setattr(task, "retry", recording_retry)
+    return countdowns
+
+
+def test_feedback_retries_with_backoff(pipeline, monkeypatch):
+    pipeline.analysis.status = AnalysisStatus.COMPLETED
+    pipeline.generate.side_effect = [RuntimeError("rate limited"), RuntimeError("rate limited"), None]
+    countdowns = _record_countdowns(monkeypatch, feedback.generate_feedback_task)
+
+    result = feedback.generate_feedback_task.apply(({"video_id": "v"},))
+
+    assert result.get() == {"status": "completed", "video_id": "v"}
+    assert countdowns == [30, 60]
+    assert pipeline.generate.call_count == 3
+
+
+def test_feedback_gives_up_after_last_retry(pipeline, monkeypatch):
+    pipeline.analysis.status = AnalysisStatus.COMPLETED
+    pipeline.generate.side_effect = RuntimeError("rate limited")
+    countdowns = _record_countdowns(monkeypatch, feedback.generate_feedback_task)
+    max_retries = feedback.generate_feedback_task.max_retries
+
+    result = feedback.generate_feedback_task.apply(({"video_id": "v"},))
+
+    with pytest.raises(RuntimeError):
+        result.get()
+
+    assert countdowns[:max_retries] == [30 * 2 ** i for i in range(max_retries)]
+    assert pipeline.generate.call_count == max_retries + 1
+    assert pipeline.analysis.ai_feedback is None
+
+
+def test_feedback_skips_incomplete_analysis(pipeline):
+    result = feedback.generate_feedback_task.apply(({"video_id": "v"},))
+
+    assert result.get() == {"status": "skipped", "video_id": "v"}
+    pipeline.generate.assert_not_called()
@@ -0,0 +1,49 @@
+import pytest
+import sys
+from pathlib import Path
+
+# Add parent directory to path to allow importing app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from unittest.mock import MagicMock
+import redis
+from services.analysis_progress import AnalysisProgressService, estimate_eta
+
+
+def test_eta_uses_rate_of_current_run():
+    # 300 new frames in 10 s, 600 left
+    assert estimate_eta(1200, 600, 300, 100.0, 110.0) == pytest.approx(20.0)
+
+
+def test_eta_unknown_before_first_frame():
+    assert estimate_eta(1200, 300, 300, 100.0, 110.0) is None
+    assert estimate_eta(0, 0, 0, 100.0, 110.0) is None
+
+
+def test_get_reports_progress():
+    service = AnalysisProgressService()
+    service._client = MagicMock()
+    service._client.hgetall.return_value = {
+        "tier": "full",
+        "total_frames": "1000",
+        "frames_processed": "1010",
+        "resumed_frames": "0",
+        "started_at": "0",
+    }
+
+    progress = service.get("abc")
+
+    service._client.hgetall.assert_called_once_with("analysis:progress:abc")
+    assert progress["frames_processed"] == 1000
+    assert progress["total_frames"] == 1000
+    assert progress["eta_seconds"] == 0.0
+
+
+def test_redis_errors_do_not_propagate():
+    service = AnalysisProgressService()
+    service._client = MagicMock()
+    service._client.hincrby.side_effect = redis.ConnectionError("down")
+    service._client.hgetall.side_effect = redis.ConnectionError("down")
+
+    service.advance("abc", 10)
+    assert service.get("abc") is None
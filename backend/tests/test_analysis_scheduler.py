@@ -0,0 +1,79 @@
+import pytest
+import sys
+from pathlib import Path
+
+# Add parent directory to path to allow importing app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import json
+from unittest.mock import MagicMock
+import redis
+from services.analysis_scheduler import AnalysisSchedulerService, jobs_ahead, estimate_start
+
+
+def _simulate_round_robin(ring, pending):
+    """Dispatch order of (user, index) pairs with unlimited slots and caps"""
+    order = []
+    counts = dict(pending)
+    ring = list(ring)
+    taken = {uid: 0 for uid in ring}
+    while ring:
+        uid = ring.pop(0)
+        order.append((uid, taken[uid]))
+        taken[uid] += 1
+        if taken[uid] < counts[uid]:
+            ring.append(uid)
+    return order
+
+
+def test_jobs_ahead_matches_round_robin_order():
+    ring = ["burst", "b", "c"]
+    pending = {"burst": 40, "b": 1, "c": 3}
+    order = _simulate_round_robin(ring, pending)
+
+    for uid in ring:
+        for index in range(pending[uid]):
+            assert jobs_ahead(ring, pending, uid, index) == order.index((uid, index))
+
+
+def test_burst_does_not_delay_other_users():
+    ring = ["burst", "late"]
+
+    assert jobs_ahead(ring, {"burst": 40, "late": 1}, "late", 0) == 1
+
+
+def test_estimate_start():
+    # Free slot: starts right away
+    assert estimate_start(0, 0, running=1, slots=2, user_cap=1, job_seconds=60) == 0.0
+    # Full: one slot must free up first (two slots -> every 30 s on average)
+    assert estimate_start(0, 0, running=2, slots=2, user_cap=1, job_seconds=60) == pytest.approx(30.0)
+    # A user's own earlier jobs run one at a time
+    assert estimate_start(2, 2, running=0, slots=4, user_cap=1, job_seconds=60) == pytest.approx(120.0)
+
+
+def test_submit_fails_open_without_redis():
+    service = AnalysisSchedulerService()
+    service._client = MagicMock()
+    service._client.register_script.return_value.side_effect = redis.ConnectionError("down")
+
+    assert service.submit("user", "video", {"tier": "preview", "queue": "interactive"}) is False
+    assert list(service.dispatch()) == []
+
+
+def test_dispatch_yields_jobs_until_slots_run_out():
+    service = AnalysisSchedulerService()
+    service._client = MagicMock()
+    job = {"tier": "preview", "queue": "interactive", "user_id": "u"}
+    service._client.register_script.return_value.side_effect = [
+        ["v1", json.dumps(job)], ["v2", json.dumps(job)], None
+    ]
+
+    assert list(service.dispatch()) == [("v1", job), ("v2", job)]
+
+
+def test_position_of_dispatched_job_is_none():
+    service = AnalysisSchedulerService()
+    service._client = MagicMock()
+    service._client.lpos.return_value = None
+
+    assert service.position("video", "user") is None
@@ -0,0 +1,65 @@
+import pytest
+import sys
+from pathlib import Path
+
+# Add parent directory to path to allow importing app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+from services.biomechanics import (
+    JOINT_ANGLES,
+    empty_landmarks,
+    compute_joint_angles,
+    build_frame_records,
+)
+
+
+def _reference_angle(a, b, c):
+    """Scalar angle computation previously used inline in AnalysisService"""
+    ba = np.array(a[:2], dtype=np.float64) - np.array(b[:2], dtype=np.float64)
+    bc = np.array(c[:2], dtype=np.float64) - np.array(b[:2], dtype=np.float64)
+    cosine_angle = np.dot(ba, bc) / (np.linalg.norm(ba) * np.linalg.norm(bc))
+    return np.degrees(np.arccos(cosine_angle))
+
+
+@pytest.fixture
+def landmarks():
+    rng = np.random.default_rng(42)
+    data = rng.uniform(0.0, 1.0, size=(6, 33, 4)).astype(np.float32)
+    data[:, :, 3] = 0.9
+    data[2] = np.nan  # No pose detected
+    data[4, 26, 3] = 0.2  # Right knee hidden
+    return data
+
+
+def test_joint_angles_match_scalar_reference(landmarks):
+    angles = compute_joint_angles(landmarks)
+
+    assert list(angles.keys()) == list(JOINT_ANGLES.keys())
+    for name, (a, b, c) in JOINT_ANGLES.items():
+        for frame in (0, 1, 3, 5):
+            expected = _reference_angle(landmarks[frame, a], landmarks[frame, b], landmarks[frame, c])
+            assert angles[name][frame] == pytest.approx(expected, abs=1e-6)
+
+
+def test_joint_angles_visibility_masking(landmarks):
+    angles = compute_joint_angles(landmarks)
+
+    assert all(np.isnan(values[2]) for values in angles.values())
+    assert np.isnan(angles["right_knee_angle"][4])
+    assert not np.isnan(angles["left_knee_angle"][4])
+
+
+def test_build_frame_records_structure(landmarks):
+    frames = build_frame_records(np.arange(6), np.arange(6) / 60.0, landmarks)
+
+    assert len(frames) == 6
+    assert frames[2] == {"frame": 2, "timestamp": pytest.approx(2 / 60.0), "landmarks": []}
+    assert len(frames[0]["landmarks"]) == 33
+    assert set(frames[0]["landmarks"][0].keys()) == {"x", "y", "z", "visibility"}
+    assert set(frames[0]["metrics"].keys()) == set(JOINT_ANGLES.keys())
+    assert "right_knee_angle" not in frames[4]["metrics"]
+
+
+def test_empty_clip():
+    assert build_frame_records(np.array([]), np.array([]), empty_landmarks(0)) == []
@@ -0,0 +1,64 @@
+import sys
+from pathlib import Path
+
+# Add parent directory to path to allow importing app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from celery_app import celery_app, QUEUES, QUEUE_INTERACTIVE, QUEUE_FEEDBACK, QUEUE_BULK, QUEUE_HOUSEKEEPING
+
+
+def _queue(task_name, **options):
+    return celery_app.amqp.router.route(options, task_name)["queue"].name
+
+
+def test_analysis_routes_to_interactive_queue():
+    assert _queue("tasks.video_analysis.analyze_video_task") == QUEUE_INTERACTIVE
+
+
+def test_explicit_queue_overrides_route():
+    assert _queue("tasks.video_analysis.analyze_video_task", queue=QUEUE_BULK) == QUEUE_BULK
+
+
+def test_module_globs_and_default_queue():
+    assert _queue("tasks.feedback.generate_feedback") == QUEUE_FEEDBACK
+    assert _queue("tasks.housekeeping.purge") == QUEUE_HOUSEKEEPING
+    assert _queue("tasks.unknown.task") == QUEUE_BULK
+
+
+def test_scheduler_sweep_runs_periodically_on_housekeeping_queue():
+    entry = celery_app.conf.beat_schedule["sweep-analysis-scheduler"]
+
+    assert _queue(entry["task"]) == QUEUE_HOUSEKEEPING
+    assert entry["schedule"] > 0
+    assert "tasks.housekeeping" in celery_app.conf.imports
+
+
+def test_long_tasks_are_acked_late_one_at_a_time():
+    assert celery_app.conf.worker_prefetch_multiplier == 1
+    assert celery_app.conf.task_acks_late is True
+    assert [queue.name for queue in celery_app.conf.task_queues] == list(QUEUES)
+
+
+def test_worker_processes_are_recycled():
+    assert celery_app.conf.worker_max_tasks_per_child > 0
+    assert celery_app.conf.worker_max_memory_per_child > 0
+
+
+def test_results_are_binary_compressed_and_expire():
+    conf = celery_app.conf
+
+    assert conf.task_serializer == conf.result_serializer == "msgpack"
+    assert conf.result_compression == "gzip"
+    assert conf.result_expires > 0
+
+
+def test_manifest_round_trips_through_msgpack():
+    from kombu.serialization import dumps, loads, prepare_accept_content
+
+    manifest = {
+        "video_id": "v", "tier": "full", "cache_key": None,
+        "processing_info": {"segments": 2, "sampling": {"mode": "target_fps", "target_fps": 60.0}},
+    }
+    content_type, encoding, body = dumps(manifest, serializer="msgpack")
+
+    assert loads(body, content_type, encoding, accept=prepare_accept_content(celery_app.conf.accept_content)) == manifest
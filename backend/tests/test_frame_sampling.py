@@ -0,0 +1,63 @@
+import pytest
+import sys
+from pathlib import Path
+
+# Add parent directory to path to allow importing app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+from services.frame_sampling import FrameSampler
+
+
+def test_target_fps_downsamples_high_frame_rate():
+    sampler = FrameSampler(mode="target_fps", source_fps=240, target_fps=60)
+    kept = [i for i in range(240) if sampler.should_process(i)]
+
+    assert sampler.stride == 4
+    assert len(kept) == 60
+    assert kept[:3] == [0, 4, 8]
+
+
+def test_target_fps_keeps_every_frame_below_target():
+    sampler = FrameSampler(mode="target_fps", source_fps=30, target_fps=60)
+    assert all(sampler.should_process(i) for i in range(30))
+
+
+def test_stride_mode():
+    sampler = FrameSampler(mode="stride", source_fps=60, stride=3)
+    assert [i for i in range(10) if sampler.should_process(i)] == [0, 3, 6, 9]
+
+
+def test_adaptive_mode_densifies_around_motion_peak():
+    sampler = FrameSampler(mode="adaptive", source_fps=240, target_fps=30)
+    still = np.zeros((120, 160, 3), dtype=np.uint8)
+    kept = []
+    for i in range(100):
+        image = still.copy()
+        if i >= 50:
+            # Sudden large motion: alternate bright/dark frames
+            image[:] = 255 if i % 2 else 0
+        if sampler.should_process(i, image, i / 240):
+            kept.extend(index for index, _, _ in sampler.take_lookbehind())
+            kept.append(i)
+
+    assert sampler.needs_pixels
+    assert [i for i in kept if i < 48] == list(range(0, 48, 8))
+    # The spike at 51 also brings back the frames skipped since the grid point at 48
+    assert set(range(48, 60)).issubset(kept)
+    assert kept == sorted(set(kept))
+
+
+def test_adaptive_lookbehind_only_after_spike():
+    sampler = FrameSampler(mode="adaptive", source_fps=240, target_fps=30)
+    still = np.zeros((120, 160, 3), dtype=np.uint8)
+    for i in range(40):
+        if sampler.should_process(i, still, i / 240):
+            assert sampler.take_lookbehind() == []
+    # Skipped frames are not held past the next grid point
+    assert len(sampler._skipped) < sampler.stride
+
+
+def test_unknown_mode_rejected():
+    with pytest.raises(ValueError):
+        FrameSampler(mode="random")
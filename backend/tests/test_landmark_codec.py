@@ -0,0 +1,86 @@
+import pytest
+import sys
+from pathlib import Path
+
+# Add parent directory to path to allow importing app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import json
+import numpy as np
+from services.pose_sequence import PoseSequence, select_window
+from services.landmark_codec import (
+    encode_landmarks,
+    decode_landmarks,
+    parse_header,
+    decode_landmark_rows,
+    frame_range_span,
+)
+
+
+@pytest.fixture
+def sequence():
+    rng = np.random.default_rng(7)
+    landmarks = rng.uniform(0.0, 1.0, size=(120, 33, 4)).astype(np.float32)
+    landmarks[10] = np.nan
+    return PoseSequence(
+        np.arange(0, 240, 2, dtype=np.int32),
+        np.arange(120) / 60.0,
+        landmarks,
+    )
+
+
+@pytest.mark.parametrize("dtype,tolerance", [("float32", 0), ("float16", 1e-3)])
+def test_round_trip(sequence, dtype, tolerance):
+    decoded = decode_landmarks(encode_landmarks(sequence, dtype))
+
+    assert decoded.frame_indices.tolist() == sequence.frame_indices.tolist()
+    np.testing.assert_array_equal(decoded.timestamps, sequence.timestamps)
+    np.testing.assert_allclose(decoded.landmarks, sequence.landmarks, atol=tolerance)
+    assert np.isnan(decoded.landmarks[10]).all()
+
+
+def test_blob_is_much_smaller_than_json(sequence):
+    blob = encode_landmarks(sequence, "float16")
+    as_json = json.dumps(sequence.to_frames())
+
+    assert len(blob) * 10 < len(as_json)
+
+
+def test_frame_range_span_reads_only_requested_rows(sequence):
+    blob = encode_landmarks(sequence, "float32")
+    header = parse_header(blob)
+    offset, length = frame_range_span(header, 20, 25)
+
+    rows = decode_landmark_rows(header, blob[offset:offset + length])
+    np.testing.assert_array_equal(rows, sequence.landmarks[20:25])
+
+
+def test_rejects_foreign_data():
+    with pytest.raises(ValueError):
+        decode_landmarks(b"not a landmark blob at all")
+
+
+def test_legacy_frames_round_trip(sequence):
+    frames = sequence.to_frames()
+    restored = PoseSequence.from_frames(frames)
+
+    np.testing.assert_allclose(restored.landmarks, sequence.landmarks)
+    assert restored.to_frames() == frames
+
+
+def test_select_window_by_time_and_frame(sequence):
+    lo, hi = select_window(sequence.frame_indices, sequence.timestamps, start_time=0.5, end_time=1.0)
+    assert (lo, hi) == (30, 60)
+
+    lo, hi = select_window(sequence.frame_indices, sequence.timestamps, start_frame=11, end_frame=21)
+    assert sequence.frame_indices[lo:hi].tolist() == [12, 14, 16, 18, 20]
+
+    assert select_window(sequence.frame_indices, sequence.timestamps, start_time=5.0, end_time=1.0) == (120, 120)
+
+
+def test_landmark_subset_keeps_metrics(sequence):
+    frames = sequence.to_frames(landmark_indices=[11, 12])
+
+    assert len(frames[0]["landmarks"]) == 2
+    assert frames[0]["landmarks"][0]["x"] == pytest.approx(float(sequence.landmarks[0, 11, 0]))
+    assert frames[0]["metrics"] == sequence.to_frames()[0]["metrics"]
@@ -0,0 +1,53 @@
+import pytest
+import sys
+from pathlib import Path
+
+# Add parent directory to path to allow importing app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+from services.biomechanics import empty_landmarks
+from services.pose_sequence import PoseSequence
+from services.metric_summary import WHOLE_CLIP, summarize_metrics
+
+
+def _arm(frames=20):
+    """Right arm whose elbow opens linearly from 90 to 180 degrees"""
+    landmarks = empty_landmarks(frames)
+    landmarks[:, :, 3] = 0.0
+    angles = np.radians(np.linspace(90, 180, frames))
+    landmarks[:, 12] = (0.5, 0.3, 0.0, 1.0)
+    landmarks[:, 14] = (0.5, 0.5, 0.0, 1.0)
+    landmarks[:, 16, 0] = 0.5 + 0.2 * np.sin(angles)
+    landmarks[:, 16, 1] = 0.5 - 0.2 * np.cos(angles)
+    landmarks[:, 16, 3] = 1.0
+    landmarks[:, 16, 2] = 0.0
+    return PoseSequence(np.arange(frames, dtype=np.int32) * 2, np.arange(frames) / 30.0, landmarks)
+
+
+def test_whole_clip_aggregates():
+    rows = summarize_metrics(_arm())
+
+    assert [(r["metric"], r["phase"]) for r in rows] == [("right_elbow_angle", WHOLE_CLIP)]
+    row = rows[0]
+    assert row["count"] == 20
+    assert row["min"] == pytest.approx(90, abs=0.1)
+    assert row["max"] == pytest.approx(180, abs=0.1)
+    assert row["p50"] == pytest.approx(135, abs=0.1)
+    assert row["p10"] < row["p50"] < row["p90"]
+
+
+def test_per_phase_rows_use_source_frames():
+    phases = {"phases": [
+        {"name": "backswing", "start_frame": 0, "end_frame": 20},
+        {"name": "contact", "start_frame": 20, "end_frame": 40},
+    ]}
+    rows = {r["phase"]: r for r in summarize_metrics(_arm(), phases)}
+
+    assert rows["backswing"]["count"] == 10
+    assert rows["backswing"]["max"] < rows["contact"]["min"]
+
+
+def test_no_rows_without_pose():
+    sequence = PoseSequence(np.arange(5, dtype=np.int32), np.arange(5) / 30.0, empty_landmarks(5))
+    assert summarize_metrics(sequence) == []
@@ -0,0 +1,69 @@
+import pytest
+import sys
+from pathlib import Path
+
+# Add parent directory to path to allow importing app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+from services.biomechanics import empty_landmarks
+from services.pose_sequence import PoseSequence
+from services.phase_segmentation import PHASES, moving_average, summarize_phases
+
+
+def _stroke(fps=60):
+    """Right wrist: rest, slow backswing, accelerating forward swing, decelerating follow-through, rest"""
+    t = np.arange(0, 2.5, 1 / fps)
+    u = np.clip((t - 0.5) / 0.4, 0, 1)
+    x = 0.5 - 0.2 * (1 - np.cos(np.pi * u)) / 2
+    u = np.clip((t - 0.9) / 0.4, 0, 1)
+    forward = 0.3 + 0.5 * u ** 2
+    tau = np.clip(t - 1.3, 0, 0.4)
+    follow = 0.8 + 2.5 * tau - 3.125 * tau ** 2
+    x = np.where(t >= 0.9, np.where(t < 1.3, forward, follow), x)
+
+    landmarks = np.zeros((len(t), 33, 4), dtype=np.float32)
+    landmarks[:, :, 3] = 1.0
+    landmarks[:, 12, :2] = (0.5, 0.3)  # Shoulder
+    landmarks[:, 14, :2] = (0.5, 0.45)  # Elbow
+    landmarks[:, 16, 0] = x
+    landmarks[:, 16, 1] = 0.55
+    return PoseSequence(np.arange(len(t), dtype=np.int32), t, landmarks)
+
+
+def test_phases_follow_stroke_order():
+    summary = summarize_phases(_stroke())
+
+    assert summary["dominant_side"] == "right"
+    assert summary["contact"]["timestamp"] == pytest.approx(1.3, abs=0.05)
+    names = [phase["name"] for phase in summary["phases"]]
+    assert names == list(PHASES)
+
+    bounds = {phase["name"]: (phase["start_time"], phase["end_time"]) for phase in summary["phases"]}
+    assert bounds["backswing"][0] == pytest.approx(0.55, abs=0.1)
+    assert bounds["forward_swing"][0] == pytest.approx(0.9, abs=0.05)
+    assert bounds["recovery"][0] == pytest.approx(1.65, abs=0.1)
+
+    # Phases tile the clip without overlap
+    for previous, current in zip(summary["phases"], summary["phases"][1:]):
+        assert previous["end_frame"] == current["start_frame"]
+
+
+def test_phase_metrics_are_summarised():
+    summary = summarize_phases(_stroke())
+    contact = next(p for p in summary["phases"] if p["name"] == "contact")
+
+    stats = contact["metrics"]["right_elbow_angle"]
+    assert stats["min"] <= stats["mean"] <= stats["max"]
+    assert "left_knee_angle" not in contact["metrics"]
+
+
+def test_no_phases_without_pose():
+    sequence = PoseSequence(np.arange(3, dtype=np.int32), np.arange(3) / 30.0, empty_landmarks(3))
+    assert summarize_phases(sequence) is None
+    assert summarize_phases(PoseSequence.empty()) is None
+
+
+def test_moving_average_ignores_nan():
+    values = np.array([1.0, np.nan, 3.0, 5.0])
+    np.testing.assert_allclose(moving_average(values, 3), [1.0, 2.0, 4.0, 4.0])
@@ -0,0 +1,185 @@
+import pytest
+import sys
+from pathlib import Path
+
+# Add parent directory to path to allow importing app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+from services.biomechanics import empty_landmarks
+from services.pose_sequence import PoseSequence
+from services.metric_summary import WHOLE_CLIP
+from services.pose_comparison import banded_dtw, body_normalized_vectors, compare_sequences, pair_strokes, subsample_rows
+
+
+def _full_dtw_cost(a, b):
+    """Reference O(n * m) implementation"""
+    n, m = len(a), len(b)
+    cost = np.full((n + 1, m + 1), np.inf)
+    cost[0, 0] = 0.0
+    for i in range(1, n + 1):
+        for j in range(1, m + 1):
+            local = np.linalg.norm(a[i - 1] - b[j - 1])
+            cost[i, j] = local + min(cost[i - 1, j - 1], cost[i - 1, j], cost[i, j - 1])
+    return cost[n, m]
+
+
+def _swing(frames, side="right", x_offset=0.0, scale=1.0):
+    """Standing player whose arm sweeps through an arc; elbow opens 60 -> 180 degrees"""
+    landmarks = empty_landmarks(frames)
+    landmarks[:, :, 2] = 0.0
+    landmarks[:, :, 3] = 1.0
+    body = {
+        11: (0.45, 0.30), 12: (0.55, 0.30), 13: (0.40, 0.45), 14: (0.60, 0.45),
+        15: (0.40, 0.60), 16: (0.60, 0.60), 23: (0.47, 0.60), 24: (0.53, 0.60),
+        25: (0.47, 0.75), 26: (0.53, 0.75), 27: (0.47, 0.90), 28: (0.53, 0.90),
+    }
+    for index, (x, y) in body.items():
+        landmarks[:, index, 0] = x
+        landmarks[:, index, 1] = y
+
+    elbow, wrist = (14, 16) if side == "right" else (13, 15)
+    sign = 1.0 if side == "right" else -1.0
+    opening = np.radians(np.linspace(60, 180, frames))
+    landmarks[:, wrist, 0] = landmarks[:, elbow, 0] + sign * 0.15 * np.sin(opening)
+    landmarks[:, wrist, 1] = landmarks[:, elbow, 1] - 0.15 * np.cos(opening)
+
+    landmarks[:, :, 0] = (landmarks[:, :, 0] - 0.5) * scale + 0.5 + x_offset
+    landmarks[:, :, 1] = (landmarks[:, :, 1] - 0.6) * scale + 0.6
+    return PoseSequence(np.arange(frames, dtype=np.int32), np.arange(frames) / 30.0, landmarks)
+
+
+def test_banded_dtw_matches_full_dtw_when_unconstrained():
+    rng = np.random.default_rng(0)
+    a = rng.normal(size=(17, 3))
+    b = rng.normal(size=(23, 3))
+
+    path_a, path_b, total = banded_dtw(a, b, band=1.0)
+
+    assert total == pytest.approx(_full_dtw_cost(a, b))
+    assert (path_a[0], path_b[0]) == (0, 0)
+    assert (path_a[-1], path_b[-1]) == (16, 22)
+    steps = np.stack([np.diff(path_a), np.diff(path_b)], axis=1)
+    assert np.isin(steps, (0, 1)).all() and (steps.sum(axis=1) > 0).all()
+    assert total == pytest.approx(sum(np.linalg.norm(a[i] - b[j]) for i, j in zip(path_a, path_b)))
+
+
+def test_banded_dtw_recovers_time_warp():
+    t = np.linspace(0, 1, 200)
+    a = np.stack([np.cos(np.pi * t), np.sin(np.pi * t)], axis=1)
+    b = np.stack([np.cos(np.pi * t ** 1.3), np.sin(np.pi * t ** 1.3)], axis=1)
+
+    path_a, path_b, total = banded_dtw(a, b, band=0.1)
+
+    # b[j] == a[i] where t_j ** 1.3 == t_i
+    expected = np.rint((t[path_a] ** (1 / 1.3)) * 199)
+    assert np.abs(path_b - expected).max() <= 3
+    assert total / len(path_a) < 0.01
+
+
+def test_body_normalization_ignores_position_and_size():
+    near = body_normalized_vectors(_swing(10).landmarks)
+    far = body_normalized_vectors(_swing(10, x_offset=0.2, scale=0.5).landmarks)
+
+    np.testing.assert_allclose(near, far, atol=1e-5)
+
+
+def test_compare_identical_clips():
+    clip = _swing(40)
+    phases = {"dominant_side": "right", "phases": [
+        {"name": "backswing", "start_frame": 0, "end_frame": 20},
+        {"name": "forward_swing", "start_frame": 20, "end_frame": 40},
+    ]}
+
+    result = compare_sequences(clip, clip, phases, phases)
+
+    assert result["mirrored"] is False
+    assert result["distance"] == pytest.approx(0.0, abs=1e-6)
+    assert result["mapping"]["user_frames"] == list(range(40))
+    assert result["mapping"]["reference_frames"] == list(range(40))
+    assert [p["name"] for p in result["phases"]] == [WHOLE_CLIP, "backswing", "forward_swing"]
+    elbow = result["phases"][0]["metrics"]["right_elbow_angle"]
+    assert elbow["mean_abs_diff"] == pytest.approx(0.0, abs=1e-3)
+
+
+def test_compare_slower_reference_maps_frames_in_order():
+    user = _swing(30)
+    reference = _swing(60)
+
+    result = compare_sequences(user, reference)
+
+    mapping = result["mapping"]
+    assert mapping["user_frames"] == list(range(30))
+    assert np.all(np.diff(mapping["reference_frames"]) >= 0)
+    assert abs(mapping["reference_frames"][15] - 30) <= 2
+    assert result["phases"][0]["metrics"]["right_elbow_angle"]["mean_abs_diff"] < 3.0
+
+
+def test_compare_mirrors_opposite_handed_reference():
+    result = compare_sequences(
+        _swing(30, side="right"), _swing(30, side="left"),
+        {"dominant_side": "right"}, {"dominant_side": "left"}
+    )
+
+    assert result["mirrored"] is True
+    assert result["distance"] == pytest.approx(0.0, abs=1e-5)
+    assert result["phases"][0]["metrics"]["right_elbow_angle"]["mean_abs_diff"] == pytest.approx(0.0, abs=1e-3)
+
+
+def test_compare_without_pose_returns_none():
+    empty = PoseSequence(np.arange(5, dtype=np.int32), np.arange(5) / 30.0, empty_landmarks(5))
+
+    assert compare_sequences(empty, _swing(10)) is None
+
+
+def _stroke(index, start, end, stroke_type="forehand", embedding=None):
+    return {
+        "stroke_index": index, "start_frame": start, "end_frame": end,
+        "stroke_type": stroke_type, "embedding": embedding,
+    }
+
+
+def test_pair_strokes_prefers_same_type_then_closest_embedding():
+    user = [_stroke(0, 0, 10, embedding=[0.0, 1.0]), _stroke(1, 10, 20, "serve"), _stroke(2, 20, 30, "lob")]
+    reference = [
+        _stroke(0, 0, 10, "serve"),
+        _stroke(1, 10, 20, embedding=[1.0, 0.0]),
+        _stroke(2, 20, 30, embedding=[0.1, 0.9]),
+    ]
+
+    pairs = [(u["stroke_index"], r["stroke_index"]) for u, r in pair_strokes(user, reference)]
+
+    # No lob in the reference: any stroke will do
+    assert pairs == [(0, 2), (1, 0), (2, 0)]
+
+
+def test_compare_aligns_stroke_windows_only():
+    user = _swing(60)
+    reference = _swing(90)
+    user_strokes = [_stroke(0, 10, 30), _stroke(1, 40, 55)]
+    reference_strokes = [_stroke(0, 30, 60)]
+
+    result = compare_sequences(user, reference, user_strokes=user_strokes, reference_strokes=reference_strokes)
+
+    user_frames = result["mapping"]["user_frames"]
+    assert user_frames == list(range(10, 30)) + list(range(40, 55))
+    assert all(30 <= frame < 60 for frame in result["mapping"]["reference_frames"])
+    assert [(s["stroke_index"], s["reference_stroke_index"]) for s in result["strokes"]] == [(0, 0), (1, 0)]
+
+
+def test_compare_caps_frames_per_window():
+    result = compare_sequences(_swing(2000), _swing(3000), max_frames=100)
+
+    assert len(result["mapping"]["user_frames"]) == 100
+    assert result["mapping"]["user_frames"][0] == 0 and result["mapping"]["user_frames"][-1] == 1999
+    assert result["strokes"] == []
+    assert result["phases"][0]["metrics"]["right_elbow_angle"]["mean_abs_diff"] < 3.0
+
+
+def test_subsample_rows_keeps_ends():
+    rows = np.arange(5, 1005)
+
+    assert subsample_rows(rows, 0) is rows
+    assert subsample_rows(rows[:10], 20).tolist() == rows[:10].tolist()
+    sampled = subsample_rows(rows, 50)
+    assert len(sampled) == 50 and sampled[0] == 5 and sampled[-1] == 1004
@@ -0,0 +1,122 @@
+import pytest
+import sys
+from pathlib import Path
+
+# Add parent directory to path to allow importing app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+from services.biomechanics import empty_landmarks
+from services.pose_sequence import PoseSequence
+from services.pose_embedding import EMBEDDING_DIM, embed_strokes, nearest, stroke_embedding
+from services.reference_index import ReferenceIndex
+
+
+def _swing(frames, side="right", fps=30.0, reach=0.15):
+    """Standing player whose hitting elbow opens from 60 to 180 degrees"""
+    landmarks = empty_landmarks(frames)
+    landmarks[:, :, 2] = 0.0
+    landmarks[:, :, 3] = 1.0
+    body = {
+        11: (0.45, 0.30), 12: (0.55, 0.30), 13: (0.40, 0.45), 14: (0.60, 0.45),
+        15: (0.40, 0.60), 16: (0.60, 0.60), 23: (0.47, 0.60), 24: (0.53, 0.60),
+        25: (0.47, 0.75), 26: (0.53, 0.75), 27: (0.47, 0.90), 28: (0.53, 0.90),
+    }
+    for index, (x, y) in body.items():
+        landmarks[:, index, 0] = x
+        landmarks[:, index, 1] = y
+
+    elbow, wrist = (14, 16) if side == "right" else (13, 15)
+    sign = 1.0 if side == "right" else -1.0
+    opening = np.radians(np.linspace(60, 180, frames))
+    landmarks[:, wrist, 0] = landmarks[:, elbow, 0] + sign * reach * np.sin(opening)
+    landmarks[:, wrist, 1] = landmarks[:, elbow, 1] - reach * np.cos(opening)
+    return PoseSequence(np.arange(frames, dtype=np.int32), np.arange(frames) / fps, landmarks)
+
+
+def _embed(clip, side="right"):
+    return stroke_embedding(clip, side, float(clip.timestamps[len(clip) // 2]))
+
+
+def test_embedding_has_fixed_length():
+    short = _embed(_swing(20))
+    long = _embed(_swing(90))
+
+    assert short.shape == long.shape == (EMBEDDING_DIM,)
+    assert short.dtype == np.float32
+
+
+def test_embedding_ignores_duration_and_frame_rate():
+    base = _embed(_swing(30))
+    slower = _embed(_swing(60, fps=60.0))
+    different = _embed(_swing(30, reach=0.08))
+
+    assert np.linalg.norm(base - slower) < 0.1 * np.linalg.norm(base - different)
+
+
+def test_left_handed_stroke_matches_mirrored_right_handed_stroke():
+    right = _embed(_swing(30, side="right"), "right")
+    left = _embed(_swing(30, side="left"), "left")
+
+    np.testing.assert_allclose(right, left, atol=1e-4)
+
+
+def test_embedding_without_pose_is_none():
+    clip = PoseSequence(np.arange(5, dtype=np.int32), np.arange(5) / 30.0, empty_landmarks(5))
+
+    assert stroke_embedding(clip, "right", 0.1) is None
+
+
+def test_embed_strokes_uses_source_frames():
+    clip = _swing(60)
+    clip.frame_indices[:] = np.arange(60) * 2
+    strokes = [
+        {"start_frame": 0, "end_frame": 60, "side": "right", "contact_time": 0.5},
+        {"start_frame": 60, "end_frame": 120, "side": "right", "contact_time": 1.5},
+    ]
+
+    first, second = embed_strokes(clip, strokes)
+
+    np.testing.assert_allclose(first, stroke_embedding(clip[0:30], "right", 0.5))
+    np.testing.assert_allclose(second, stroke_embedding(clip[30:60], "right", 1.5))
+
+
+def test_nearest_matches_sorted_brute_force():
+    rng = np.random.default_rng(1)
+    matrix = rng.normal(size=(50, 8)).astype(np.float32)
+    queries = rng.normal(size=(3, 8)).astype(np.float32)
+
+    indices, distances = nearest(matrix, queries, 4)
+
+    for q in range(3):
+        exact = np.linalg.norm(matrix - queries[q], axis=1)
+        np.testing.assert_array_equal(indices[q], np.argsort(exact)[:4])
+        np.testing.assert_allclose(distances[q], np.sort(exact)[:4], rtol=1e-4)
+
+
+def test_nearest_with_fewer_rows_than_k():
+    matrix = np.eye(3, dtype=np.float32)
+
+    indices, distances = nearest(matrix, matrix[[2]], 10)
+
+    assert indices.shape == (1, 3)
+    assert indices[0, 0] == 2
+    assert distances[0, 0] == pytest.approx(0.0, abs=1e-6)
+
+
+def test_reference_search_skips_the_queried_video(monkeypatch):
+    index = ReferenceIndex()
+    monkeypatch.setattr(index, "refresh", lambda db: None)
+    rng = np.random.default_rng(3)
+    index._matrix = rng.normal(size=(4, EMBEDDING_DIM)).astype(np.float32)
+    index._rows = [
+        {"video_id": video_id, "stroke_index": i, "stroke_type": stroke_type}
+        for i, (video_id, stroke_type) in enumerate([("ref", "forehand"), ("ref", "serve"), ("pro", "forehand"), ("pro", "serve")])
+    ]
+
+    own = index.search(None, index._matrix[:1], k=5, stroke_types=["forehand"])
+    excluded = index.search(None, index._matrix[:1], k=5, stroke_types=["forehand"], exclude_video_id="ref")
+
+    assert own[0][0]["video_id"] == "ref" and own[0][0]["distance"] == pytest.approx(0.0, abs=1e-3)
+    assert [(m["video_id"], m["stroke_index"]) for m in excluded[0]] == [("pro", 2)]
+    assert index.search(None, index._matrix[:1], exclude_video_id="ref")[0][0]["video_id"] == "pro"
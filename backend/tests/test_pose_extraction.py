@@ -0,0 +1,207 @@
+import pytest
+import sys
+from pathlib import Path
+
+# Add parent directory to path to allow importing app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import os
+import cv2
+import numpy as np
+from types import SimpleNamespace
+from services import pose_extractors
+from services.biomechanics import empty_landmarks
+from services.pose_extraction import plan_segments, uncovered_ranges, stitch_segments, extract_segment, SegmentPool
+from services.pose_sequence import PoseSequenceBuffer
+
+
+def _segment(indices):
+    indices = np.asarray(indices, dtype=np.int32)
+    landmarks = empty_landmarks(len(indices))
+    landmarks[:, 0, 0] = indices
+    return {
+        "frame_indices": indices,
+        "timestamps": indices / 30.0,
+        "landmarks": landmarks,
+    }
+
+
+def test_short_video_is_not_split():
+    assert plan_segments(300, 30.0, 8, 10.0, 1.0) == [(0, None, 0)]
+
+
+def test_serial_when_single_worker():
+    assert plan_segments(9000, 30.0, 1, 10.0, 1.0) == [(0, None, 0)]
+
+
+def test_segments_cover_video_with_overlap():
+    segments = plan_segments(1800, 30.0, 4, 10.0, 1.0)
+
+    assert segments == [(0, 450, 0), (450, 900, 420), (900, 1350, 870), (1350, None, 1320)]
+
+
+def test_segment_count_limited_by_minimum_length():
+    assert len(plan_segments(900, 30.0, 8, 10.0, 1.0)) == 3
+
+
+def test_stitch_keeps_frames_continuous():
+    sequence = stitch_segments([
+        _segment(range(0, 10)),
+        _segment(range(9, 20)),  # Seek landed one frame early
+        _segment([]),
+        _segment(range(20, 25)),
+    ])
+
+    assert sequence.frame_indices.tolist() == list(range(25))
+    assert sequence.timestamps[-1] == pytest.approx(24 / 30.0)
+    assert sequence.landmarks[:, 0, 0].tolist() == list(range(25))
+
+
+def test_stitch_empty():
+    sequence = stitch_segments([_segment([])])
+    assert len(sequence) == 0
+    assert sequence.landmarks.shape == (0, 33, 4)
+
+
+def test_segments_of_a_partial_range():
+    segments = plan_segments(1800, 30.0, 2, 10.0, 1.0, start_frame=900, end_frame=None)
+
+    assert segments == [(900, 1350, 870), (1350, None, 1320)]
+    assert plan_segments(1800, 30.0, 4, 10.0, 1.0, 300, 400) == [(300, 400, 270)]
+
+
+def test_uncovered_ranges_resume_after_last_chunk():
+    assert uncovered_ranges([], False) == [(0, None)]
+    assert uncovered_ranges([(0, 300), (300, 600)], False) == [(600, None)]
+    assert uncovered_ranges([(0, 300), (900, 1200)], True) == [(300, 900)]
+    assert uncovered_ranges([(0, 300), (300, 300)], True) == []
+
+
+class _FakePose:
+    """Stands in for mp.solutions.pose.Pose: no model download, never detects"""
+
+    def __init__(self, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def process(self, image):
+        return SimpleNamespace(pose_landmarks=None)
+
+    def reset(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.mark.parametrize("prefetch", [0, 2])
+def test_extract_segment_flushes_chunks(tmp_path, monkeypatch, prefetch):
+    path = str(tmp_path / "clip.mp4")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), 30, (64, 48))
+    for i in range(25):
+        writer.write(np.full((48, 64, 3), i, dtype=np.uint8))
+    writer.release()
+    monkeypatch.setattr(pose_extractors.mp.solutions.pose, "Pose", _FakePose)
+    monkeypatch.setattr(pose_extractors, "_cache", {})
+
+    options = {
+        "sampling_mode": "stride", "target_fps": 30.0, "stride": 2, "motion_factor": 2.0,
+        "max_dim": 0, "decoder": "opencv", "model_complexity": 0,
+    }
+    chunks = []
+    result = extract_segment(path, options, 4, None, 0, flush=chunks.append, flush_frames=4, prefetch=prefetch)
+
+    assert [(c["start"], c["end"], c["eof"]) for c in chunks] == [(4, 11, False), (11, 19, False), (19, 25, True)]
+    assert chunks[0]["frame_indices"].tolist() == [4, 6, 8, 10]
+    assert chunks[-1]["frame_indices"].tolist() == [20, 22, 24]
+    assert len(result["frame_indices"]) == 0
+    assert result["end_position"] == 25
+    assert result["peak_rss_kb"] > 0
+
+
+class _CountingExtractor(pose_extractors.PoseExtractor):
+    """Records when this process built its graph and how many segments reused it"""
+    built = 0
+    name = "counting"
+
+    def __init__(self):
+        _CountingExtractor.built += 1
+        self.warm_frames = 0
+        self.resets = 0
+
+    def detect(self, image_rgb, timestamp_ms):
+        if timestamp_ms == 0 and not image_rgb.any():
+            self.warm_frames += 1
+        return None
+
+    def reset(self):
+        self.resets += 1
+
+    def describe(self):
+        return {"extractor": self.name, "pid": os.getpid(), "built": self.built, "warm_frames": self.warm_frames}
+
+
+def test_segment_pool_reuses_warm_graphs_across_videos(tmp_path, monkeypatch):
+    path = str(tmp_path / "clip.mp4")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), 30, (64, 48))
+    for i in range(40):
+        writer.write(np.full((48, 64, 3), 50 + i, dtype=np.uint8))
+    writer.release()
+    # Inherited by the forked pool processes
+    monkeypatch.setattr(pose_extractors, "create_extractor", lambda options: _CountingExtractor())
+    monkeypatch.setattr(pose_extractors, "_cache", {})
+
+    options = {
+        "sampling_mode": "all", "target_fps": 30.0, "stride": 1, "motion_factor": 2.0,
+        "max_dim": 0, "decoder": "opencv", "model_complexity": 0,
+    }
+    jobs = [(path, options, start, start + 20, start, None, 0, 0) for start in (0, 20)]
+    pool = SegmentPool(2, warm_options=[options])
+    try:
+        first = pool.map(jobs)
+        second = pool.map(jobs)
+    finally:
+        pool.close()
+
+    described = [result["extractor"] for result in first + second]
+    # Graphs are built once per process, at start-up (the blank warm-up frame),
+    # and the second video runs on the same processes
+    assert all(d["built"] == 1 and d["warm_frames"] == 1 for d in described)
+    assert len({d["pid"] for d in described}) <= 2
+    assert os.getpid() not in {d["pid"] for d in described}
+    assert all(result["frame_indices"].tolist()[:1] in ([0], [20]) for result in first)
+    assert not pool.usable
+
+
+def test_buffer_grows_and_keeps_rows():
+    buffer = PoseSequenceBuffer(capacity=2)
+    pose = np.ones((33, 4), dtype=np.float32)
+    for i in range(5):
+        buffer.append(i * 2, i / 30.0, pose if i % 2 == 0 else None)
+
+    assert buffer.capacity == 8
+    sequence = buffer.take()
+
+    assert sequence.frame_indices.tolist() == [0, 2, 4, 6, 8]
+    assert sequence.landmarks.shape == (5, 33, 4)
+    assert (sequence.landmarks[[0, 2, 4]] == 1).all()
+    assert np.isnan(sequence.landmarks[[1, 3]]).all()
+
+
+def test_buffer_take_copies_and_reuses_storage():
+    buffer = PoseSequenceBuffer(capacity=4)
+    buffer.append(0, 0.0, np.zeros((33, 4), dtype=np.float32))
+    storage = buffer.landmarks
+    first = buffer.take()
+
+    buffer.append(1, 0.1, None)
+    second = buffer.take()
+
+    assert buffer.landmarks is storage and len(buffer) == 0
+    assert (first.landmarks == 0).all()
+    assert np.isnan(second.landmarks).all()
@@ -0,0 +1,141 @@
+import pytest
+import sys
+from pathlib import Path
+
+# Add parent directory to path to allow importing app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+from types import SimpleNamespace
+from services import pose_extractors
+from services.pose_extractors import TasksPoseExtractor, cached_extractor, create_extractor, model_path, warm_extractor
+
+
+class _FakeLandmarker:
+    """Stands in for a VIDEO-mode PoseLandmarker: records timestamps, one fixed pose"""
+
+    def __init__(self):
+        self.timestamps = []
+        self.closed = False
+
+    def detect_for_video(self, image, timestamp_ms):
+        self.timestamps.append(timestamp_ms)
+        point = SimpleNamespace(x=0.5, y=0.25, z=0.0, visibility=0.9)
+        return SimpleNamespace(pose_landmarks=[[point] * 33])
+
+    def close(self):
+        self.closed = True
+
+
+class _FakePose:
+    """Stands in for mp.solutions.pose.Pose: counts graph builds and resets"""
+    built = 0
+
+    def __init__(self, **kwargs):
+        _FakePose.built += 1
+        self.resets = 0
+        self.frames = 0
+
+    def process(self, image):
+        self.frames += 1
+        return SimpleNamespace(pose_landmarks=None)
+
+    def reset(self):
+        self.resets += 1
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_pose(monkeypatch):
+    _FakePose.built = 0
+    monkeypatch.setattr(pose_extractors.mp.solutions.pose, "Pose", _FakePose)
+    monkeypatch.setattr(pose_extractors, "_cache", {})
+
+
+@pytest.fixture
+def tasks_extractor(tmp_path, monkeypatch):
+    (tmp_path / "pose_landmarker_lite.task").write_bytes(b"model")
+    monkeypatch.setattr(TasksPoseExtractor, "_open", lambda self: _FakeLandmarker())
+    return TasksPoseExtractor(0, str(tmp_path))
+
+
+def test_model_path_uses_cached_file(tmp_path, monkeypatch):
+    (tmp_path / "pose_landmarker_full.task").write_bytes(b"model")
+    monkeypatch.setattr(pose_extractors.urllib.request, "urlopen", lambda *a, **k: pytest.fail("downloaded"))
+
+    assert model_path("full", str(tmp_path)) == str(tmp_path / "pose_landmarker_full.task")
+
+
+def test_model_path_rejects_unknown_variant(tmp_path):
+    with pytest.raises(ValueError):
+        model_path("huge", str(tmp_path))
+
+
+def test_tasks_extractor_returns_landmark_array(tasks_extractor):
+    landmarks = tasks_extractor.detect(np.zeros((4, 4, 3), dtype=np.uint8), 0)
+
+    assert landmarks.shape == (33, 4)
+    assert landmarks.dtype == np.float32
+    np.testing.assert_allclose(landmarks[0], (0.5, 0.25, 0.0, 0.9))
+    assert tasks_extractor.describe() == {"extractor": "tasks", "model": "lite"}
+
+
+def test_tasks_extractor_keeps_timestamps_increasing(tasks_extractor):
+    image = np.zeros((4, 4, 3), dtype=np.uint8)
+    for timestamp in (0, 33, 33, 20, 66):
+        tasks_extractor.detect(image, timestamp)
+
+    assert tasks_extractor._landmarker.timestamps == [0, 33, 34, 35, 66]
+
+
+def test_tasks_extractor_reset_starts_new_landmarker(tasks_extractor):
+    image = np.zeros((4, 4, 3), dtype=np.uint8)
+    tasks_extractor.detect(image, 500)
+    old = tasks_extractor._landmarker
+
+    tasks_extractor.reset()
+    tasks_extractor.detect(image, 0)
+
+    assert old.closed
+    assert tasks_extractor._landmarker.timestamps == [0]
+
+
+def test_create_extractor_rejects_unknown_backend():
+    with pytest.raises(ValueError):
+        create_extractor({"extractor": "openpose", "model_complexity": 1})
+
+
+def test_cached_extractor_builds_once_and_resets(fake_pose):
+    options = {"extractor": "solutions", "model_complexity": 1}
+
+    first = cached_extractor(options)
+    second = cached_extractor(options)
+    other = cached_extractor({"extractor": "solutions", "model_complexity": 0})
+
+    assert first is second
+    assert other is not first
+    assert _FakePose.built == 2
+    assert first._pose.resets == 1
+
+
+def test_cached_extractor_is_per_process(fake_pose, monkeypatch):
+    options = {"extractor": "solutions", "model_complexity": 1}
+    parent = cached_extractor(options)
+
+    monkeypatch.setattr(pose_extractors.os, "getpid", lambda: -1)
+    child = cached_extractor(options)
+
+    assert child is not parent
+    assert parent._pose.resets == 0
+
+
+def test_warm_extractor_runs_one_frame(fake_pose):
+    options = {"extractor": "solutions", "model_complexity": 2}
+
+    warm_extractor(options)
+    extractor = cached_extractor(options)
+
+    assert _FakePose.built == 1
+    assert extractor._pose.frames == 1
@@ -0,0 +1,92 @@
+import sys
+from pathlib import Path
+
+# Add parent directory to path to allow importing app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from sqlalchemy.dialects import postgresql
+from services.progress_service import ProgressService
+
+
+def _sql(statement) -> str:
+    return " ".join(str(statement.compile(dialect=postgresql.dialect())).split())
+
+
+def _executed(db) -> list:
+    return [_sql(call.args[0]) for call in db.execute.call_args_list]
+
+
+def test_refresh_upserts_only_changed_metrics_under_user_lock():
+    db = MagicMock()
+    ProgressService().refresh(db, uuid.uuid4(), ["right_knee_angle", "left_elbow_angle", "right_knee_angle"])
+
+    lock, upsert, stale = _executed(db)
+    assert "pg_advisory_xact_lock(hashtext(" in lock
+    assert upsert.startswith("INSERT INTO user_metric_progress")
+    assert "ON CONFLICT (user_id, metric) DO UPDATE SET session_count = excluded.session_count" in upsert
+    assert "last_value = excluded.last_value" in upsert
+    assert "analysis_metrics.metric IN (__[POSTCOMPILE_metric_1])" in upsert
+    # Metrics left without any value lose their row, other metrics are untouched
+    assert stale.startswith("DELETE FROM user_metric_progress")
+    assert "user_metric_progress.metric NOT IN (SELECT analysis_metrics.metric" in stale
+    assert "user_metric_progress.metric IN (__[POSTCOMPILE_metric_" in stale
+    assert db.execute.call_args_list[1].args[0].compile().params["metric_1"] == ["left_elbow_angle", "right_knee_angle"]
+
+
+def test_refresh_all_metrics_of_user():
+    db = MagicMock()
+    ProgressService().refresh(db, uuid.uuid4())
+
+    _, upsert, stale = _executed(db)
+    assert "analysis_metrics.metric IN" not in upsert
+    assert "user_metric_progress.metric IN" not in stale
+
+
+def test_refresh_without_user_or_metrics_is_noop():
+    db = MagicMock()
+    ProgressService().refresh(db, None)
+    ProgressService().refresh(db, uuid.uuid4(), [])
+    db.execute.assert_not_called()
+
+
+def _summary_row(metric, mean):
+    return SimpleNamespace(
+        metric=metric, session_count=2, mean=mean, min=mean - 5, max=mean + 5,
+        first_at=datetime(2026, 1, 1), last_at=datetime(2026, 2, 1), last_value=mean + 1
+    )
+
+
+def _point(metric, day, mean):
+    return SimpleNamespace(
+        metric=metric, video_id=uuid.uuid4(), recorded_at=datetime(2026, 1, day), mean=mean, p10=mean - 2, p90=mean + 2
+    )
+
+
+def test_get_progress_groups_points_under_summaries():
+    db = MagicMock()
+    summary = db.query.return_value.filter.return_value
+    summary.filter.return_value.order_by.return_value = [_summary_row("right_knee_angle", 140.0)]
+    db.execute.return_value = [_point("right_knee_angle", 1, 138.0), _point("right_knee_angle", 20, 142.0)]
+
+    result = ProgressService().get_progress(db, uuid.uuid4(), ["right_knee_angle"], limit=10)
+
+    assert list(result) == ["right_knee_angle"]
+    assert result["right_knee_angle"]["summary"]["session_count"] == 2
+    assert result["right_knee_angle"]["summary"]["last_value"] == 141.0
+    assert [point["mean"] for point in result["right_knee_angle"]["series"]] == [138.0, 142.0]
+    series_query = _sql(db.execute.call_args.args[0])
+    assert "row_number() OVER (PARTITION BY analysis_metrics.metric ORDER BY analysis_metrics.recorded_at DESC)" in series_query
+    assert "anon_1.rank <= " in series_query
+
+
+def test_get_progress_without_summary_skips_series_query():
+    db = MagicMock()
+    db.query.return_value.filter.return_value.order_by.return_value = []
+
+    assert ProgressService().get_progress(db, uuid.uuid4()) == {}
+    db.execute.assert_not_called()
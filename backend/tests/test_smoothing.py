@@ -0,0 +1,149 @@
+import pytest
+import sys
+from pathlib import Path
+
+# Add parent directory to path to allow importing app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+from services.biomechanics import empty_landmarks
+from services.pose_sequence import PoseSequence
+from services.smoothing import (
+    fill_gaps,
+    savgol_coefficients,
+    savgol_kernels,
+    savgol_smooth,
+    one_euro_smooth,
+    smooth_sequence,
+)
+
+
+def _ramp(frames=30):
+    landmarks = empty_landmarks(frames)
+    landmarks[:, :, 0] = np.linspace(0.0, 1.0, frames)[:, None]
+    landmarks[:, :, 1] = 0.5
+    landmarks[:, :, 2] = 0.0
+    landmarks[:, :, 3] = 0.9
+    return landmarks
+
+
+def test_fill_gaps_interpolates_short_gaps_only():
+    timestamps = np.arange(30) / 30.0
+    landmarks = _ramp()
+    landmarks[5:7] = np.nan     # 2 missing frames: filled
+    landmarks[15:25] = np.nan   # 10 missing frames: too long
+
+    filled, mask = fill_gaps(landmarks, timestamps, 0.2)
+
+    assert mask.nonzero()[0].tolist() == [5, 6]
+    np.testing.assert_allclose(filled[5:7, 0, 0], _ramp()[5:7, 0, 0], atol=1e-6)
+    assert np.isnan(filled[15:25]).all()
+
+
+def test_fill_gaps_per_landmark_uses_timestamps():
+    # Irregular sampling: interpolation follows time, not frame position
+    timestamps = np.array([0.0, 0.01, 0.02, 0.1, 0.11])
+    landmarks = empty_landmarks(5)
+    landmarks[:, :, :] = timestamps[:, None, None]
+    landmarks[1:3, 4] = np.nan  # one landmark lost for two frames
+
+    filled, mask = fill_gaps(landmarks, timestamps, 0.2)
+
+    np.testing.assert_allclose(filled[1:3, 4, 0], [0.01, 0.02], atol=1e-6)
+    # Frames still had a pose: they are not reported as filled
+    assert not mask.any()
+    assert filled.dtype == landmarks.dtype
+
+
+def test_fill_gaps_disabled():
+    landmarks = _ramp()
+    landmarks[5] = np.nan
+    filled, mask = fill_gaps(landmarks, np.arange(30) / 30.0, 0.0)
+    assert np.isnan(filled[5]).all()
+    assert not mask.any()
+
+
+def test_savgol_preserves_polynomials_and_reduces_noise():
+    kernel = savgol_coefficients(7, 2)
+    assert kernel.sum() == pytest.approx(1.0)
+
+    rng = np.random.default_rng(1)
+    clean = _ramp(60)
+    noisy = clean.copy()
+    noisy[:, :, :2] += rng.normal(0, 0.01, size=(60, 33, 2)).astype(np.float32)
+
+    timestamps = np.arange(60) / 60.0
+    smoothed = savgol_smooth(noisy, timestamps, 7 / 60, 2)
+
+    assert np.abs(smoothed[:, :, 0] - clean[:, :, 0]).std() < np.abs(noisy[:, :, 0] - clean[:, :, 0]).std()
+    np.testing.assert_array_equal(smoothed[:, :, 3], noisy[:, :, 3])
+
+
+def test_savgol_kernels_match_classic_filter_on_regular_grid():
+    timestamps = np.arange(40) / 60.0
+    kernels, half = savgol_kernels(timestamps, 6 / 60, 2)
+
+    assert half == 3
+    np.testing.assert_allclose(kernels[20], savgol_coefficients(7, 2), atol=1e-9)
+
+
+def test_savgol_window_is_in_seconds_not_frames():
+    sparse_t = np.arange(30) / 30.0
+    # Same second of motion sampled twice as densely
+    dense_t = np.arange(60) / 60.0
+    sparse, dense = _ramp(30), _ramp(60)
+    sparse[:, :, 0] = np.sin(2 * np.pi * sparse_t)[:, None]
+    dense[:, :, 0] = np.sin(2 * np.pi * dense_t)[:, None]
+
+    _, sparse_half = savgol_kernels(sparse_t, 0.2, 2)
+    _, dense_half = savgol_kernels(dense_t, 0.2, 2)
+
+    # Twice the frames per window at twice the rate: the same span of time
+    assert dense_half == 2 * sparse_half
+    smoothed_sparse = savgol_smooth(sparse, sparse_t, 0.2, 2)
+    smoothed_dense = savgol_smooth(dense, dense_t, 0.2, 2)
+    np.testing.assert_allclose(smoothed_dense[::2][5:-5, 0, 0], smoothed_sparse[5:-5, 0, 0], atol=0.02)
+
+
+def test_savgol_keeps_raw_values_next_to_gaps():
+    timestamps = np.arange(30) / 30.0
+    landmarks = _ramp()
+    landmarks[:, :, 0] += np.where(np.arange(30) % 2, 0.05, -0.05)[:, None]
+    landmarks[15] = np.nan
+
+    smoothed = savgol_smooth(landmarks, timestamps, 0.2, 2)
+
+    assert np.isnan(smoothed[15, :, :3]).all()
+    np.testing.assert_array_equal(smoothed[13:18, 0, 0], landmarks[13:18, 0, 0])
+    assert not np.allclose(smoothed[5, 0, 0], landmarks[5, 0, 0])
+
+
+def test_savgol_rejects_even_window():
+    with pytest.raises(ValueError):
+        savgol_coefficients(6, 2)
+
+
+def test_one_euro_keeps_gaps_and_tracks_signal():
+    landmarks = _ramp()
+    landmarks[10] = np.nan
+    timestamps = np.arange(30) / 30.0
+    smoothed = one_euro_smooth(landmarks, timestamps)
+    sluggish = one_euro_smooth(landmarks, timestamps, beta=0.0)
+
+    assert np.isnan(smoothed[10, :, :3]).all()
+    assert smoothed[-1, 0, 0] == pytest.approx(1.0, abs=0.05)
+    # Speed-adaptive cutoff: less lag than a fixed low-pass
+    assert abs(1.0 - smoothed[-1, 0, 0]) < abs(1.0 - sluggish[-1, 0, 0])
+
+
+def test_smooth_sequence_describes_stage():
+    landmarks = _ramp()
+    landmarks[3] = np.nan
+    sequence = PoseSequence(np.arange(30, dtype=np.int32), np.arange(30) / 30.0, landmarks)
+
+    cleaned, description = smooth_sequence(sequence, "savgol", max_gap_seconds=0.1)
+
+    assert description["filled_frames"] == 1
+    assert not np.isnan(cleaned.landmarks).any()
+    with pytest.raises(ValueError):
+        smooth_sequence(sequence, "kalman")
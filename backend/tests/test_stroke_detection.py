@@ -0,0 +1,74 @@
+import pytest
+import sys
+from pathlib import Path
+
+# Add parent directory to path to allow importing app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+from services.pose_sequence import PoseSequence
+from services.stroke_detection import find_speed_peaks, guess_stroke_type, detect_strokes
+
+
+def _session(strokes=3, fps=60, period=4.3):
+    """Right wrist repeating: backswing, forward swing, follow-through, slow return, rest"""
+    t = np.arange(0, strokes * period, 1 / fps)
+    local = t % period
+
+    def ease(a, b, t0, t1):
+        u = np.clip((local - t0) / (t1 - t0), 0, 1)
+        return a + (b - a) * (1 - np.cos(np.pi * u)) / 2
+
+    u = np.clip((local - 0.9) / 0.4, 0, 1)
+    forward = 0.3 + 0.5 * u ** 2
+    tau = np.clip(local - 1.3, 0, 0.4)
+    follow = 0.8 + 2.5 * tau - 3.125 * tau ** 2
+    x = np.where(local < 0.9, ease(0.5, 0.3, 0.5, 0.9),
+                 np.where(local < 1.3, forward, np.where(local < 1.8, follow, ease(1.3, 0.5, 1.8, 3.8))))
+
+    landmarks = np.zeros((len(t), 33, 4), dtype=np.float32)
+    landmarks[:, :, 3] = 1.0
+    landmarks[:, :, :2] = 0.5
+    landmarks[:, 16, 0] = x
+    return PoseSequence(np.arange(len(t), dtype=np.int32), t, landmarks)
+
+
+def test_each_swing_becomes_a_stroke():
+    strokes = detect_strokes(_session(3))
+
+    assert [s["index"] for s in strokes] == [0, 1, 2]
+    assert [s["contact_time"] for s in strokes] == pytest.approx([1.3, 5.6, 9.9], abs=0.05)
+    assert all(s["side"] == "right" for s in strokes)
+    for stroke in strokes:
+        assert stroke["start_time"] < stroke["contact_time"] < stroke["end_time"]
+        assert stroke["phases"]["phases"][0]["start_frame"] == stroke["start_frame"]
+    for previous, current in zip(strokes, strokes[1:]):
+        assert previous["end_frame"] <= current["start_frame"]
+
+
+def test_still_session_has_no_strokes():
+    sequence = _session(1)
+    sequence.landmarks[:, 16, 0] = 0.5
+    assert detect_strokes(sequence) == []
+
+
+def test_close_peaks_are_merged():
+    t = np.arange(10) / 10.0
+    speed = np.array([0, 2, 0, 3, 0, 0, 0, 0, 2.5, 0], dtype=float)
+    assert find_speed_peaks(speed, t, min_speed=1.5, min_separation=0.5).tolist() == [3, 8]
+
+
+def test_guess_stroke_type():
+    pose = np.zeros((33, 4), dtype=np.float32)
+    pose[0, :2] = (0.5, 0.2)    # Nose
+    pose[11, :2] = (0.6, 0.35)  # Left shoulder
+    pose[12, :2] = (0.4, 0.35)  # Right shoulder
+
+    pose[16, :2] = (0.3, 0.5)
+    assert guess_stroke_type(pose, "right") == "forehand"
+    pose[16, :2] = (0.7, 0.5)
+    assert guess_stroke_type(pose, "right") == "backhand"
+    pose[16, :2] = (0.4, 0.1)
+    assert guess_stroke_type(pose, "right") == "serve"
+    pose[0] = np.nan
+    assert guess_stroke_type(pose, "right") == "unknown"
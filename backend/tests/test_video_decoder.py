@@ -0,0 +1,127 @@
+import pytest
+import shutil
+import sys
+from pathlib import Path
+
+# Add parent directory to path to allow importing app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import cv2
+import numpy as np
+from services.frame_sampling import FrameSampler
+from services.video_decoder import FramePrefetcher, VideoFrameReader, compute_inference_size
+
+
+@pytest.fixture
+def video_path(tmp_path):
+    path = str(tmp_path / "clip.mp4")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), 60, (1280, 720))
+    for i in range(12):
+        writer.write(np.full((720, 1280, 3), i * 10, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+def test_compute_inference_size_preserves_aspect_ratio():
+    assert compute_inference_size(3840, 2160, 960) == (960, 540)
+    assert compute_inference_size(2160, 3840, 960) == (540, 960)
+    assert compute_inference_size(864, 480, 960) == (864, 480)
+    assert compute_inference_size(3840, 2160, 0) == (3840, 2160)
+
+
+def test_reader_downscales_and_samples(video_path):
+    with VideoFrameReader(video_path, sampler=FrameSampler("stride", stride=3), max_dim=640) as reader:
+        frames = list(reader)
+
+    assert reader.source_size == (1280, 720)
+    assert [index for index, _, _ in frames] == [0, 3, 6, 9]
+    assert frames[1][1] == pytest.approx(3 / 60.0, abs=1e-3)
+    assert frames[0][2].shape == (360, 640, 3)
+    assert reader.position == 12
+
+
+def test_reader_rejects_unknown_backend(video_path):
+    with pytest.raises(ValueError):
+        VideoFrameReader(video_path, backend="gstreamer")
+
+
+@pytest.mark.parametrize("backend", [
+    "opencv",
+    pytest.param("ffmpeg", marks=pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")),
+])
+def test_reader_adaptive_lookbehind(tmp_path, backend):
+    path = str(tmp_path / "swing.mp4")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), 60, (320, 240))
+    for i in range(40):
+        # Still shot, then a sudden flash from frame 27 on
+        writer.write(np.full((240, 320, 3), 255 if i >= 27 and i % 2 else 0, dtype=np.uint8))
+    writer.release()
+
+    sampler = FrameSampler("adaptive", target_fps=15)
+    with VideoFrameReader(path, sampler=sampler, max_dim=160, backend=backend) as reader:
+        frames = list(reader)
+    indices = [index for index, _, _ in frames]
+
+    assert sampler.stride == 4
+    assert indices[:6] == [0, 4, 8, 12, 16, 20]
+    # Frames 25 and 26 precede the spike at 27 and are analysed too
+    assert {24, 25, 26, 27}.issubset(indices)
+    assert indices == sorted(set(indices))
+    assert all(image.shape == (120, 160, 3) for _, _, image in frames)
+    timestamps = [timestamp for _, timestamp, _ in frames]
+    assert timestamps == sorted(timestamps)
+
+
+def test_prefetcher_yields_same_frames(video_path):
+    with VideoFrameReader(video_path, sampler=FrameSampler("stride", stride=2), max_dim=320) as reader:
+        expected = [(index, timestamp, image.copy()) for index, timestamp, image in reader]
+
+    reader = VideoFrameReader(video_path, sampler=FrameSampler("stride", stride=2), max_dim=320)
+    with FramePrefetcher(reader, depth=2) as prefetcher:
+        frames = [(index, timestamp, image.copy()) for index, timestamp, image in prefetcher]
+
+    assert [f[:2] for f in frames] == [f[:2] for f in expected]
+    for (_, _, image), (_, _, reference) in zip(frames, expected):
+        np.testing.assert_array_equal(image, reference)
+    assert prefetcher.position == 12
+    assert len(prefetcher._buffers) == 4
+
+
+def test_prefetcher_position_follows_consumer(video_path):
+    reader = VideoFrameReader(video_path, max_dim=320)
+    with FramePrefetcher(reader, depth=4) as prefetcher:
+        frames = iter(prefetcher)
+        next(frames)
+        next(frames)
+        # The decode thread may be ahead, but the consumer has seen frames 0 and 1
+        assert prefetcher.position == 2
+
+
+def test_prefetcher_stops_when_consumer_stops_early(video_path):
+    reader = VideoFrameReader(video_path, max_dim=320)
+    with FramePrefetcher(reader, depth=1) as prefetcher:
+        for index, _, _ in prefetcher:
+            if index == 1:
+                break
+
+    assert prefetcher._thread is None
+    assert reader.cap is None
+
+
+class _FailingReader:
+    position = 0
+
+    def __iter__(self):
+        yield 0, 0.0, np.zeros((4, 4, 3), dtype=np.uint8)
+        raise RuntimeError("corrupt frame")
+
+    def close(self):
+        pass
+
+
+def test_prefetcher_reraises_decode_errors():
+    with FramePrefetcher(_FailingReader(), depth=2) as prefetcher:
+        frames = iter(prefetcher)
+        next(frames)
+        with pytest.raises(RuntimeError, match="corrupt frame"):
+            next(frames)
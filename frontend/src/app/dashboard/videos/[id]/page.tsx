@@ -234,7 +234,15 @@ export default function VideoPlayerPage() {
                                 variant={analysis?.status === 'pending' || analysis?.status === 'processing' ? "secondary" : "default"}
                             >
                                 {analyzing || (analysis && (analysis.status === 'pending' || analysis.status === 'processing')) ? (
-                                    <><Loader2 className="mr-2 h-4 w-4 animate-spin" /> Analyse en cours...</>
+                                    <>
+                                        <Loader2 className="mr-2 h-4 w-4 animate-spin" /> Analyse en cours...
+                                        {analysis?.progress?.total_frames > 0 && (
+                                            <span className="ml-1 tabular-nums">
+                                                {Math.round(100 * analysis.progress.frames_processed / analysis.progress.total_frames)}%
+                                                {analysis.progress.eta_seconds != null && ` (~${Math.ceil(analysis.progress.eta_seconds)}s)`}
+                                            </span>
+                                        )}
+                                    </>
                                 ) : (
                                     <><Activity className="mr-2 h-4 w-4" /> Lancer l'analyse</>
                                 )}
@@ -314,7 +322,7 @@ export default function VideoPlayerPage() {
                             onLoadedMetadata={handleLoadedMetadata}
                             crossOrigin="anonymous"
                         />
-                        {analysis && analysis.status === 'completed' && dimensions.width > 0 && (
+                        {analysis && analysis.data && dimensions.width > 0 && (
                             <PoseOverlay
                                 data={analysis.data}
                                 currentTime={currentTime}
@@ -322,6 +330,11 @@ export default function VideoPlayerPage() {
                                 height={dimensions.height}
                             />
                         )}
+                        {analysis && analysis.quality_tier === 'preview' && (
+                            <div className="absolute top-2 left-2 flex items-center gap-1 rounded bg-black/70 px-2 py-1 text-xs text-zinc-300">
+                                <Loader2 className="h-3 w-3 animate-spin" /> Aperçu — analyse complète en cours
+                            </div>
+                        )}
                     </div>
 
                     {/* Reference Video */}
@@ -47,9 +47,23 @@ export const PoseOverlay: React.FC<PoseOverlayProps> = ({ data, currentTime, wid
 
         if (!data || data.length === 0) return;
 
-        // Find frame closest to current time
-        // Optimization: Could use binary search or keep track of last index
-        const frame = data.find(f => Math.abs(f.timestamp - currentTime) < 0.1); // 100ms tolerance
+        // Find frame closest to current time (frames are sorted by timestamp).
+        // Analysed frames may be sampled from the source video, so the tolerance
+        // grows with the spacing between neighbouring analysed frames.
+        let lo = 0;
+        let hi = data.length - 1;
+        while (lo < hi) {
+            const mid = (lo + hi) >> 1;
+            if (data[mid].timestamp < currentTime) lo = mid + 1;
+            else hi = mid;
+        }
+        const candidate = lo > 0 && Math.abs(data[lo - 1].timestamp - currentTime) <= Math.abs(data[lo].timestamp - currentTime)
+            ? lo - 1
+            : lo;
+        const neighbour = data[Math.min(candidate + 1, data.length - 1)];
+        const spacing = Math.abs(neighbour.timestamp - data[candidate].timestamp);
+        const tolerance = Math.max(0.1, spacing); // at least 100ms
+        const frame = Math.abs(data[candidate].timestamp - currentTime) < tolerance ? data[candidate] : undefined;
 
         if (frame && frame.landmarks) {
             // Draw connections